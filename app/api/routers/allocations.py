@@ -4,15 +4,22 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Path, status, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Path, Request, status, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.db.base import get_db
 from app.db import models as m
-from app.schemas.allocations import AllocationCreate, AllocationUpdate, AllocationOut
+from app.schemas.allocations import AllocationCreate, AllocationUpdate, AllocationOut, PortfolioValuation
 from app.auth.dependencies.authz import read_only, admin_required
+from app.cache.versions import ALLOCATIONS, bump_versions, init_resource_etag, not_modified, resource_etag
+from app.integrations.quote_batcher import get_quote_batcher
+from app.services.analytics import invalidate_aum
+from app.services.assets import normalize_ticker, resolve_asset_id
+from app.services.positions import apply_lot_delta
+from app.services.snapshots import repair_snapshots
+from app.services.valuation import value_portfolio
 
 router = APIRouter(prefix="/clients/{client_id}/allocations", tags=["allocations"])
 
@@ -24,30 +31,28 @@ async def _ensure_client_exists(db: AsyncSession, client_id: int) -> None:
         raise HTTPException(status_code=404, detail="Client not found")
 
 
-async def _get_or_create_asset(db: AsyncSession, ticker: str) -> m.Asset:
-    """Busca Asset por ticker; cria se não existir (normaliza UPPER)."""
-    ticker_up = ticker.strip().upper()
-    res = await db.execute(select(m.Asset).where(m.Asset.ticker == ticker_up))
-    asset = res.scalar_one_or_none()
-    if asset:
-        return asset
-    asset = m.Asset(ticker=ticker_up)
-    db.add(asset)
-    await db.flush()  # garante asset.id
-    return asset
-
-
 @router.get(
     "",
     response_model=List[AllocationOut],
+    responses={304: {"description": "Não modificado (If-None-Match)"}},
     dependencies=[Depends(read_only)],
 )
 async def list_allocations(
+    request: Request,
+    response: Response,
     client_id: int = Path(..., ge=1, description="ID do cliente"),
     db: AsyncSession = Depends(get_db),
 ) -> List[AllocationOut]:
-    """Lista alocações (sem cálculos)."""
+    """Lista alocações (sem cálculos). ETag forte: `If-None-Match` igual → 304 sem consultar o banco."""
+    etag = await resource_etag(ALLOCATIONS, client_id)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
     await _ensure_client_exists(db, client_id)
+    etag = etag or await init_resource_etag(ALLOCATIONS, client_id)
+    if etag is not None:
+        response.headers["ETag"] = etag
 
     # Eager-load do asset p/ evitar lazy-load em AsyncSession (MissingGreenlet)
     res = await db.execute(
@@ -71,6 +76,25 @@ async def list_allocations(
     ]
 
 
+@router.get(
+    "/valuation",
+    response_model=PortfolioValuation,
+    dependencies=[Depends(read_only)],
+)
+async def get_allocations_valuation(
+    client_id: int = Path(..., ge=1, description="ID do cliente"),
+    db: AsyncSession = Depends(get_db),
+    batcher = Depends(get_quote_batcher),
+) -> PortfolioValuation:
+    """
+    Alocações com preço atual, variação diária %, valor de mercado, P&L e
+    rentabilidade acumulada por posição, mais os totais da carteira.
+    Cotações: uma consulta (cache por símbolo + micro-batching) p/ os tickers distintos.
+    """
+    await _ensure_client_exists(db, client_id)
+    return await value_portfolio(db, client_id, batcher)
+
+
 @router.post(
     "",
     response_model=AllocationOut,
@@ -80,27 +104,40 @@ async def list_allocations(
 async def create_allocation(
     client_id: int,
     payload: AllocationCreate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ) -> AllocationOut:
-    """Cria alocação; upsert de Asset por ticker."""
+    """
+    Cria alocação; upsert de Asset por ticker e atualiza a posição (mesma transação).
+    Snapshots a partir do buy_date são recalculados em background.
+    """
     await _ensure_client_exists(db, client_id)
-    asset = await _get_or_create_asset(db, payload.ticker)
+    ticker = normalize_ticker(payload.ticker)
+    if not ticker:
+        raise HTTPException(status_code=422, detail="Ticker must not be empty")
+    asset_id = await resolve_asset_id(db, ticker)
 
     row = m.Allocation(
         client_id=client_id,
-        asset_id=asset.id,
+        asset_id=asset_id,
         quantity=payload.quantity,
         buy_price=payload.buy_price,
         buy_date=payload.buy_date,
     )
     db.add(row)
+    await apply_lot_delta(
+        db, client_id, asset_id, payload.quantity, payload.quantity * payload.buy_price, 1
+    )
     await db.commit()
     await db.refresh(row)
+    await bump_versions(ALLOCATIONS, [client_id])
+    await invalidate_aum()
+    background_tasks.add_task(repair_snapshots, [client_id], row.buy_date)
 
     return AllocationOut(
         id=row.id,
         client_id=row.client_id,
-        ticker=asset.ticker,  # já resolvido
+        ticker=ticker,  # já resolvido
         quantity=row.quantity,
         buy_price=row.buy_price,
         buy_date=row.buy_date,
@@ -116,9 +153,13 @@ async def update_allocation(
     client_id: int,
     allocation_id: int,
     payload: AllocationUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ) -> AllocationOut:
-    """Atualiza parcialmente quantity/buy_price/buy_date (não troca ticker)."""
+    """
+    Atualiza parcialmente quantity/buy_price/buy_date (não troca ticker).
+    Snapshots a partir do menor buy_date (antigo/novo) são recalculados em background.
+    """
     await _ensure_client_exists(db, client_id)
 
     res = await db.execute(
@@ -133,6 +174,9 @@ async def update_allocation(
     if not row:
         raise HTTPException(status_code=404, detail="Allocation not found")
 
+    old_quantity, old_cost = row.quantity, row.quantity * row.buy_price
+    old_buy_date = row.buy_date
+
     if payload.quantity is not None:
         row.quantity = payload.quantity
     if payload.buy_price is not None:
@@ -142,8 +186,20 @@ async def update_allocation(
 
     ticker = row.asset.ticker  # lê antes do commit
 
+    await apply_lot_delta(
+        db,
+        client_id,
+        row.asset_id,
+        row.quantity - old_quantity,
+        row.quantity * row.buy_price - old_cost,
+        0,
+    )
+
     await db.commit()
     await db.refresh(row)
+    await bump_versions(ALLOCATIONS, [client_id])
+    await invalidate_aum()
+    background_tasks.add_task(repair_snapshots, [client_id], min(old_buy_date, row.buy_date))
 
     return AllocationOut(
         id=row.id,
@@ -164,9 +220,10 @@ async def update_allocation(
 async def delete_allocation(
     client_id: int,
     allocation_id: int,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ) -> Response:
-    """Remove alocação do cliente."""
+    """Remove alocação do cliente (snapshots a partir do buy_date recalculados em background)."""
     await _ensure_client_exists(db, client_id)
 
     res = await db.execute(
@@ -179,6 +236,11 @@ async def delete_allocation(
     if not row:
         raise HTTPException(status_code=404, detail="Allocation not found")
 
+    await apply_lot_delta(db, client_id, row.asset_id, -row.quantity, -row.quantity * row.buy_price, -1)
+    buy_date = row.buy_date
     await db.delete(row)
     await db.commit()
+    await bump_versions(ALLOCATIONS, [client_id])
+    await invalidate_aum()
+    background_tasks.add_task(repair_snapshots, [client_id], buy_date)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+"""Import em lote de alocações (CSV/NDJSON em streaming)."""
+
+from datetime import date
+from typing import Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies.authz import admin_required
+from app.cache.versions import ALLOCATIONS, bump_versions
+from app.db.base import get_db
+from app.schemas.allocations import AllocationBulkResult
+from app.services.allocations_bulk import (
+    ALLOC_BULK_BATCH_SIZE,
+    FORMATS,
+    BulkFormatError,
+    import_allocations,
+)
+from app.services.analytics import invalidate_aum
+from app.services.snapshots import schedule_repair_snapshots
+
+router = APIRouter(tags=["allocations"])
+
+
+@router.post(
+    "/allocations:bulk",
+    response_model=AllocationBulkResult,
+    dependencies=[Depends(admin_required)],
+    responses={
+        400: {"description": "Corpo inválido (ex.: cabeçalho CSV incompleto)"},
+        415: {"description": "Content-Type não suportado"},
+    },
+)
+async def bulk_import_allocations(
+    request: Request,
+    batch_size: int = Query(ALLOC_BULK_BATCH_SIZE, ge=1, le=50_000, description="Linhas por transação"),
+    db: AsyncSession = Depends(get_db),
+) -> AllocationBulkResult:
+    """
+    Importa alocações de vários clientes de uma vez.
+
+    - `Content-Type: text/csv` → cabeçalho com client_id,ticker,quantity,buy_price,buy_date
+    - `Content-Type: application/x-ndjson` → um objeto JSON por linha com os mesmos campos
+
+    O corpo é lido em streaming e gravado em lotes (um commit por lote).
+    Linhas inválidas são reportadas em `errors` sem abortar o import.
+    Snapshots dos clientes afetados são recalculados em background.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Use one of: {', '.join(sorted(FORMATS))}",
+        )
+
+    touched: Dict[int, date] = {}
+    try:
+        return await import_allocations(db, request.stream(), fmt, batch_size, touched)
+    except BulkFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        # em qualquer saída (inclusive erro): lotes já commitados invalidam caches
+        if touched:
+            await bump_versions(ALLOCATIONS, touched)
+            await invalidate_aum()
+            # um único reparo set-wise para todos os clientes afetados
+            schedule_repair_snapshots(list(touched), min(touched.values()))
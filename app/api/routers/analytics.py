@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+"""Relatórios agregados da casa (AUM/exposição)."""
+
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies.authz import read_only
+from app.cache.redis_cache import cache_get_json, cache_set_json
+from app.db.base import get_db
+from app.integrations.quote_batcher import get_quote_batcher
+from app.schemas.analytics import AumReport
+from app.services.analytics import AUM_CACHE_KEY, AUM_CACHE_TTL, compute_aum
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get(
+    "/aum",
+    response_model=AumReport,
+    dependencies=[Depends(read_only)],
+)
+async def get_aum(
+    db: AsyncSession = Depends(get_db),
+    batcher = Depends(get_quote_batcher),
+    response: Response = None,
+) -> AumReport:
+    """
+    AUM total agrupado por ativo, por cliente e por status do cliente.
+
+    Cache em Redis (chave 'analytics:aum'), invalidado a cada escrita em
+    alocações/clientes. Header: X-Cache (HIT/MISS).
+    """
+    cached = await cache_get_json(AUM_CACHE_KEY)
+    if cached:
+        if response is not None:
+            response.headers["X-Cache"] = "HIT"
+        return AumReport.model_validate(cached)
+
+    report = await compute_aum(db, batcher)
+    await cache_set_json(AUM_CACHE_KEY, report.model_dump(mode="json"), ttl=AUM_CACHE_TTL)
+    if response is not None:
+        response.headers["X-Cache"] = "MISS"
+    return report
@@ -3,9 +3,11 @@ from __future__ import annotations
 from typing import Any, Dict, List
 from fastapi import APIRouter, Depends, Query, Response
 
-from app.integrations.yahoo import get_yahoo
-from app.cache.redis_cache import cache_get_json, cache_set_json, cache_ttl
-from app.schemas.assets import AssetSearchItem
+from app.integrations.yahoo import get_yahoo, normalize_symbols
+from app.integrations.quote_batcher import get_quote_batcher
+from app.schemas.assets import AssetSearchItem, QuoteItem
+from app.services.asset_search import search_assets
+from app.services.quotes import get_quotes, set_quote_cache_headers
 
 from app.auth.dependencies.authz import read_only
 
@@ -24,35 +26,45 @@ async def list_available_assets(
     response: Response = None,
 ) -> List[Dict[str, Any]]:
     """
-    Lista dinâmica de ativos vinda da busca do Yahoo Finance, com cache em Redis (TTL 1h).
+    Lista dinâmica de ativos vinda da busca do Yahoo Finance, com cache em Redis
+    (stale-while-revalidate: soft TTL 1h, hard TTL configurável).
 
     Fluxo:
-      1) Tenta no Redis (chave 'assets:search:{q}').
-      2) Se não houver, consulta Yahoo, salva no Redis e retorna.
+      1) Tenta o catálogo local (prefixo de símbolo/nome); basta se tiver `limit` itens.
+      2) Tenta no cache L1/Redis (chave 'assets:search:{q}').
+      3) Se expirou o soft TTL, devolve o valor stale e atualiza em background.
+      4) Se não houver, consulta Yahoo, salva no Redis/catálogo e retorna.
+
+    Headers: X-Cache (LOCAL/HIT/STALE/MISS), X-Cache-TTL, X-Cache-Key.
     """
-    key = f"assets:search:{q.strip().lower()}"
-
-    # 1) Tenta cache
-    cached = await cache_get_json(key)
-    if cached:
-        if response is not None:
-            response.headers["X-Cache"] = "HIT"
-            ttl = await cache_ttl(key)
-            if ttl is not None:
-                response.headers["X-Cache-TTL"] = str(ttl)
-            response.headers["X-Cache-Key"] = key
-        return cached[:limit]
-
-    # 2) Consulta Yahoo (sem try/except extra)
-    results = await yahoo.search(query=q, quotes_count=limit)
-
-    # 3) Salva no cache e devolve
-    await cache_set_json(key, results)
+    result = await search_assets(q, limit, yahoo)
     if response is not None:
-        response.headers["X-Cache"] = "MISS"
-        ttl = await cache_ttl(key)
-        if ttl is not None:
-            response.headers["X-Cache-TTL"] = str(ttl)
-        response.headers["X-Cache-Key"] = key
+        response.headers["X-Cache"] = result.cache
+        if result.ttl is not None:
+            response.headers["X-Cache-TTL"] = str(result.ttl)
+        response.headers["X-Cache-Key"] = result.key
+    return result.items
+
 
-    return results[:limit]
+@router.get(
+    "/quotes",
+    response_model=List[QuoteItem],
+    dependencies=[Depends(read_only)],
+)
+async def list_quotes(
+    symbols: str = Query(..., min_length=1, description="Símbolos separados por vírgula (ex.: VALE3.SA,PETR4.SA)"),
+    batcher = Depends(get_quote_batcher),
+    response: Response = None,
+) -> List[Dict[str, Any]]:
+    """
+    Cotações por símbolo com cache em Redis (chave 'quote:{SYMBOL}').
+
+    Fluxo:
+      1) MGET de todos os símbolos no Redis.
+      2) Só os faltantes vão ao Yahoo (via micro-batching) e são gravados no cache.
+    Headers: X-Cache (HIT/MISS/PARTIAL), X-Cache-Hits, X-Cache-Misses.
+    """
+    wanted = normalize_symbols(symbols.split(","))
+    lookup = await get_quotes(wanted, batcher)
+    set_quote_cache_headers(response, lookup)
+    return [lookup.quotes[s] for s in wanted if s in lookup.quotes]
@@ -1,8 +1,8 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
-from sqlalchemy import select, func, or_
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy import select, and_, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
@@ -11,6 +11,10 @@ from app.schemas.client import ClientCreate, ClientUpdate, ClientRead
 from app.schemas.pagination import Page, PageMeta
 from app.db.base import get_db
 from app.auth.dependencies.authz import read_only, admin_required
+from app.cache.versions import ALLOCATIONS, CLIENT, bump_versions, init_resource_etag, not_modified, resource_etag
+from app.services.analytics import invalidate_aum
+from app.services.client_search import SearchMode, search_condition
+from app.services.pagination import CountMode, InvalidCursor, count_rows, decode_cursor, encode_cursor
 
 router = APIRouter(
     prefix="/clients",
@@ -20,6 +24,12 @@ router = APIRouter(
 
 MAX_PAGE_SIZE = 100
 
+# chaves de ordenação (únicas): cada uma tem índice próprio p/ o keyset
+SORT_KEYS = {
+    "id": (Client.id,),
+    "name": (Client.name, Client.id),  # ix_clients_name_id
+}
+
 
 @router.post(
     "",
@@ -44,59 +54,113 @@ async def create_client(
         await session.rollback()
         raise HTTPException(status_code=409, detail="Email já cadastrado")
     await session.refresh(client)
+    await bump_versions(CLIENT, [client.id])
     return client
 
 
 @router.get(
     "/{client_id}",
     response_model=ClientRead,
-    responses={404: {"description": "Cliente não encontrado"}},
+    responses={304: {"description": "Não modificado (If-None-Match)"}, 404: {"description": "Cliente não encontrado"}},
 )
 async def get_client(
     client_id: int,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db),
 ) -> ClientRead:
+    # ETag vem da versão no Redis: 304 sem consultar o Postgres
+    etag = await resource_etag(CLIENT, client_id)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
     client = await session.get(Client, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    etag = etag or await init_resource_etag(CLIENT, client_id)
+    if etag is not None:
+        response.headers["ETag"] = etag
     return client
 
 
 @router.get(
     "",
     response_model=Page[ClientRead],
+    responses={400: {"description": "Cursor inválido (ou cursor com match=fuzzy)"}},
 )
 async def list_clients(
     q: Optional[str] = Query(None, description="Busca por nome ou email (case-insensitive)"),
+    match: SearchMode = Query(
+        "contains", description="contains (trecho) | fuzzy (similaridade, por relevância) | email_prefix"
+    ),
     status_filter: Optional[ClientStatus] = Query(None, alias="status", description="Filtro por status"),
-    page: int = Query(1, ge=1),
+    page: int = Query(1, ge=1, description="Página (só na paginação por offset)"),
     page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    pagination: Literal["offset", "cursor"] = Query(
+        "offset", description="offset (page) | cursor (keyset: `after` = meta.next_cursor)"
+    ),
+    after: Optional[str] = Query(None, description="Cursor opaco da página anterior (implica pagination=cursor)"),
+    sort: Literal["id", "name"] = Query("id", description="Ordenação: id | name (name, id)"),
+    count: Optional[CountMode] = Query(
+        None, description="exact | estimate | none (padrão: exact no offset, none no cursor)"
+    ),
     session: AsyncSession = Depends(get_db),
 ) -> Page[ClientRead]:
     stmt = select(Client)
 
     conditions = []
+    relevance = None
     if q:
-        like = f"%{q}%"
-        conditions.append(or_(Client.name.ilike(like), Client.email.ilike(like)))
+        condition, relevance = search_condition(q, match)
+        conditions.append(condition)
     if status_filter is not None:
         conditions.append(Client.status == status_filter)
     if conditions:
-        from sqlalchemy import and_
         stmt = stmt.where(and_(*conditions))
 
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total = (await session.execute(count_stmt)).scalar_one()
-
-    stmt = stmt.order_by(Client.id).offset((page - 1) * page_size).limit(page_size)
-    result = await session.execute(stmt)
+    use_cursor = pagination == "cursor" or after is not None
+    if use_cursor and relevance is not None:
+        raise HTTPException(status_code=400, detail="match=fuzzy ordena por relevância: use pagination=offset")
+    count = count or ("none" if use_cursor else "exact")
+    total = await count_rows(session, stmt, count, Client.__tablename__)
+
+    key = SORT_KEYS[sort]
+    page_stmt = stmt.order_by(*key) if relevance is None else stmt.order_by(relevance.desc(), *key)
+    if after is not None:
+        try:
+            values = decode_cursor(after, sort, [col.type.python_type for col in key])
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        page_stmt = page_stmt.where(tuple_(*key) > tuple_(*values))
+    elif not use_cursor:
+        page_stmt = page_stmt.offset((page - 1) * page_size)
+
+    # uma linha a mais diz se há próxima página sem precisar do total
+    result = await session.execute(page_stmt.limit(page_size + 1))
     items = list(result.scalars().all())
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    next_cursor = None
+    if has_more and relevance is None:
+        last = items[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, col.key) for col in key])
 
-    pages = (total + page_size - 1) // page_size if total else 0
+    pages = None
+    if total is not None:
+        pages = (total + page_size - 1) // page_size if total else 0
 
     return Page[ClientRead](
         items=items,
-        meta=PageMeta(total=total, page=page, page_size=page_size, pages=pages),
+        meta=PageMeta(
+            total=total,
+            total_estimated=count == "estimate",
+            page=None if use_cursor else page,
+            page_size=page_size,
+            pages=pages,
+            next_cursor=next_cursor,
+        ),
     )
 
 
@@ -126,6 +190,8 @@ async def update_client_put(
         raise HTTPException(status_code=409, detail="Email já cadastrado")
 
     await session.refresh(client)
+    await bump_versions(CLIENT, [client_id])
+    await invalidate_aum()
     return client
 
 
@@ -158,6 +224,8 @@ async def update_client_patch(
         raise HTTPException(status_code=409, detail="Email já cadastrado")
 
     await session.refresh(client)
+    await bump_versions(CLIENT, [client_id])
+    await invalidate_aum()
     return client
 
 
@@ -177,4 +245,7 @@ async def delete_client(
 
     await session.delete(client)
     await session.commit()
+    await bump_versions(CLIENT, [client_id])
+    await bump_versions(ALLOCATIONS, [client_id])  # alocações removidas em cascata
+    await invalidate_aum()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
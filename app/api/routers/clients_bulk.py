@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+"""Upsert em lote de clientes por email (sincronização com CRM)."""
+
+from typing import Any, List
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies.authz import admin_required
+from app.cache.versions import CLIENT, bump_versions
+from app.db.base import get_db
+from app.schemas.client import ClientBulkResult
+from app.services.analytics import invalidate_aum
+from app.services.clients_bulk import (
+    CLIENT_BULK_CHUNK_ROWS,
+    CLIENT_BULK_MAX_ITEMS,
+    OnExisting,
+    upsert_clients,
+)
+
+router = APIRouter(tags=["clients"])
+
+
+@router.post(
+    "/clients:bulk",
+    response_model=ClientBulkResult,
+    dependencies=[Depends(admin_required)],
+    responses={413: {"description": f"Mais de {CLIENT_BULK_MAX_ITEMS} itens"}},
+)
+async def bulk_upsert_clients(
+    items: List[Any] = Body(..., description="Array de {name, email, status?}"),
+    on_existing: OnExisting = Query(
+        "update", description="update (atualiza name/status) | skip (mantém; item sai como conflict, como o 409)"
+    ),
+    chunk_rows: int = Query(CLIENT_BULK_CHUNK_ROWS, ge=1, le=10_000, description="Linhas por statement/commit"),
+    db: AsyncSession = Depends(get_db),
+) -> ClientBulkResult:
+    """
+    Cria ou atualiza até CLIENT_BULK_MAX_ITEMS clientes por chamada, chaveados
+    por email: um `INSERT ... ON CONFLICT (email)` por chunk. Retorna o
+    resultado de cada item na ordem do corpo (created, updated, unchanged,
+    duplicate, conflict, invalid, failed) sem abortar o lote por itens ruins.
+    """
+    if len(items) > CLIENT_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {CLIENT_BULK_MAX_ITEMS} items per request",
+        )
+
+    result = await upsert_clients(db, items, on_existing, chunk_rows)
+
+    changed = [i.id for i in result.items if i.outcome in ("created", "updated")]
+    if changed:
+        await bump_versions(CLIENT, changed)
+    if result.updated:
+        await invalidate_aum()  # nome/status entram no relatório de AUM
+    return result
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+"""Exportação de clientes, alocações e fechamentos (CSV/Excel/Arrow/Parquet) em streaming."""
+
+import os
+from datetime import date
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.auth.dependencies.authz import authenticated
+from app.db.models import ClientStatus
+from app.schemas.exports import ExportDataset, ExportJobCreate, ExportJobOut
+from app.services.export_jobs import (
+    MEDIA_TYPES,
+    enqueue_export,
+    get_job,
+    job_filename,
+    job_out,
+    job_path,
+)
+from app.services.exports import (
+    ARROW_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    EXPORTS,
+    PARQUET_MEDIA_TYPE,
+    XLSX_MEDIA_TYPE,
+    stream_arrow,
+    stream_csv,
+    stream_parquet,
+    stream_xlsx,
+)
+
+# Só leitura de dados: todas as rotas (inclusive o POST que enfileira um job)
+# valem para qualquer usuário autenticado
+router = APIRouter(prefix="/exports", tags=["exports"], dependencies=[Depends(authenticated)])
+
+
+def columnar_filters(
+    client_id: Optional[int] = Query(None, ge=1, description="Cliente (daily_returns: ativos que ele possui)"),
+    ticker: Optional[str] = Query(None, min_length=1, description="Ticker (allocations/daily_returns)"),
+    start: Optional[date] = Query(None, alias="from", description="Início: created_at | buy_date | date"),
+    end: Optional[date] = Query(None, alias="to", description="Fim (inclusive)"),
+    status: Optional[ClientStatus] = Query(None, description="Status (clients)"),
+) -> Dict[str, Any]:
+    if start and end and start > end:
+        raise HTTPException(status_code=422, detail="'from' must be <= 'to'")
+    return {"client_id": client_id, "ticker": ticker, "start": start, "end": end, "status": status}
+
+
+def _download(name: str, ext: str, media_type: str, body) -> StreamingResponse:
+    filename = f"{name}-{date.today().isoformat()}.{ext}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/allocations.csv")
+async def export_allocations_csv(
+    client_id: Optional[int] = Query(None, ge=1, description="Só as alocações deste cliente"),
+) -> StreamingResponse:
+    """Todas as alocações (ou de um cliente) em CSV, lidas por cursor server-side."""
+    return _download("allocations", "csv", CSV_MEDIA_TYPE, stream_csv(EXPORTS["allocations"], client_id=client_id))
+
+
+@router.get("/allocations.xlsx")
+async def export_allocations_xlsx(
+    client_id: Optional[int] = Query(None, ge=1, description="Só as alocações deste cliente"),
+) -> StreamingResponse:
+    """Todas as alocações (ou de um cliente) em Excel (write_only; abas extras acima de ~1M linhas)."""
+    return _download("allocations", "xlsx", XLSX_MEDIA_TYPE, stream_xlsx(EXPORTS["allocations"], client_id=client_id))
+
+
+@router.get("/clients.csv")
+async def export_clients_csv(
+    status: Optional[ClientStatus] = Query(None, description="Filtra por status"),
+) -> StreamingResponse:
+    """Clientes em CSV, lidos por cursor server-side."""
+    return _download("clients", "csv", CSV_MEDIA_TYPE, stream_csv(EXPORTS["clients"], status=status))
+
+
+@router.get("/clients.xlsx")
+async def export_clients_xlsx(
+    status: Optional[ClientStatus] = Query(None, description="Filtra por status"),
+) -> StreamingResponse:
+    """Clientes em Excel (write_only)."""
+    return _download("clients", "xlsx", XLSX_MEDIA_TYPE, stream_xlsx(EXPORTS["clients"], status=status))
+
+
+@router.get("/{dataset}.arrow")
+async def export_arrow(
+    dataset: ExportDataset, filters: Dict[str, Any] = Depends(columnar_filters)
+) -> StreamingResponse:
+    """
+    Arrow IPC (stream) tipado, um RecordBatch por bloco do cursor.
+    Leitura: `pyarrow.ipc.open_stream(body).read_pandas()`.
+    """
+    spec = EXPORTS[dataset]
+    return _download(spec.name, "arrow", ARROW_MEDIA_TYPE, stream_arrow(spec, **filters))
+
+
+@router.get("/{dataset}.parquet")
+async def export_parquet(
+    dataset: ExportDataset, filters: Dict[str, Any] = Depends(columnar_filters)
+) -> StreamingResponse:
+    """Parquet (zstd) tipado, em row groups. Leitura: `pandas.read_parquet(body)`."""
+    spec = EXPORTS[dataset]
+    return _download(spec.name, "parquet", PARQUET_MEDIA_TYPE, stream_parquet(spec, **filters))
+
+
+# --- Jobs assíncronos (processados por app.jobs.export_worker) ---
+# declaradas depois das rotas estáticas acima: `/{job_id}` casaria com "clients.csv"
+
+JOB_ID = Path(..., pattern=r"^[0-9a-f]{32}$", description="ID do job")
+
+
+@router.post("", response_model=ExportJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(payload: ExportJobCreate) -> ExportJobOut:
+    """
+    Enfileira uma exportação grande (qualquer dataset/formato, mesmos filtros
+    das rotas síncronas). Acompanhe em `GET /exports/{job_id}`.
+    """
+    job = await enqueue_export(payload)
+    return job_out(job)
+
+
+@router.get("/{job_id}", response_model=ExportJobOut)
+async def get_export_job(request: Request, job_id: str = JOB_ID) -> ExportJobOut:
+    """Status, contagem de linhas e progresso do job; `download_url` quando pronto."""
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job_out(job, str(request.url_for("download_export_job", job_id=job_id)))
+
+
+@router.get("/{job_id}/download", name="download_export_job")
+async def download_export_job(job_id: str = JOB_ID) -> FileResponse:
+    """Arquivo do job concluído (aceita Range p/ retomar downloads interrompidos)."""
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
+    path = job_path(job)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Export file expired")
+    return FileResponse(path, media_type=MEDIA_TYPES[job["format"]], filename=job_filename(job))
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+"""Métricas internas (contadores in-process do worker que atendeu)."""
+
+from typing import Dict
+
+from fastapi import APIRouter, Depends
+
+from app.core import metrics
+from app.auth.dependencies.authz import admin_required
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", dependencies=[Depends(admin_required)])
+async def get_metrics() -> Dict[str, float]:
+    """Snapshot dos contadores (ex.: yahoo.quotes.issued / yahoo.quotes.coalesced)."""
+    return metrics.snapshot()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+"""Série histórica de valor/rentabilidade da carteira por cliente."""
+
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies.authz import read_only
+from app.db.base import get_db
+from app.db import models as m
+from app.schemas.performance import Interval, PerformanceSeries, Source
+from app.services.performance import load_performance, series_from_snapshots
+from app.services.snapshots import read_snapshots, snapshots_cover
+
+router = APIRouter(prefix="/clients/{client_id}/performance", tags=["performance"])
+
+DEFAULT_RANGE_DAYS = 365
+
+
+@router.get(
+    "",
+    response_model=PerformanceSeries,
+    dependencies=[Depends(read_only)],
+)
+async def get_performance(
+    client_id: int = Path(..., ge=1, description="ID do cliente"),
+    start: Optional[date] = Query(None, alias="from", description="Início (padrão: 1 ano antes de `to`)"),
+    end: Optional[date] = Query(None, alias="to", description="Fim (padrão: hoje)"),
+    interval: Interval = Query("daily", description="daily | weekly | monthly (último pregão do período)"),
+    source: Source = Query("auto", description="auto (rollup se cobrir o período) | live | snapshots"),
+    db: AsyncSession = Depends(get_db),
+) -> PerformanceSeries:
+    """
+    Valor de mercado, custo, P&L e rentabilidade acumulada (simples e TWR)
+    por pregão. `live` recalcula a partir de `allocations` (respeitando buy_date)
+    e `daily_returns`; `snapshots` lê o rollup `portfolio_snapshots`; `auto`
+    usa o rollup só quando ele cobre todos os pregões do período e recalcula
+    caso contrário.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS)
+    if start > end:
+        raise HTTPException(status_code=422, detail="'from' must be <= 'to'")
+
+    res = await db.execute(select(m.Client.id).where(m.Client.id == client_id))
+    if res.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    if source != "live":
+        snapshots = await read_snapshots(db, client_id, start, end)
+        if source == "snapshots" or await snapshots_cover(db, client_id, start, end, snapshots):
+            return series_from_snapshots(client_id, start, end, interval, snapshots)
+    return await load_performance(db, client_id, start, end, interval)
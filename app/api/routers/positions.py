@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+"""Posições consolidadas por cliente (read model `positions`)."""
+
+from decimal import Decimal
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Path
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies.authz import read_only
+from app.db.base import get_db
+from app.db import models as m
+from app.schemas.positions import PositionOut
+
+router = APIRouter(prefix="/clients/{client_id}/positions", tags=["positions"])
+
+AVG_PRICE_QUANT = Decimal("0.00000001")
+
+
+@router.get(
+    "",
+    response_model=List[PositionOut],
+    dependencies=[Depends(read_only)],
+)
+async def list_positions(
+    client_id: int = Path(..., ge=1, description="ID do cliente"),
+    db: AsyncSession = Depends(get_db),
+) -> List[PositionOut]:
+    """
+    Quantidade total, custo e preço médio por ativo do cliente.
+    Uma leitura indexada em `positions` (PK client_id, asset_id), sem reagregar lotes.
+    """
+    res = await db.execute(
+        select(
+            m.Asset.ticker,
+            m.Position.quantity,
+            m.Position.cost_basis,
+            m.Position.lot_count,
+            m.Position.updated_at,
+        )
+        .join(m.Asset, m.Asset.id == m.Position.asset_id)
+        .where(m.Position.client_id == client_id)
+        .order_by(m.Asset.ticker)
+    )
+    rows = res.all()
+    if not rows:
+        found = await db.execute(select(m.Client.id).where(m.Client.id == client_id))
+        if found.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Client not found")
+
+    return [
+        PositionOut(
+            ticker=r.ticker,
+            quantity=r.quantity,
+            cost_basis=r.cost_basis,
+            avg_price=(r.cost_basis / r.quantity).quantize(AVG_PRICE_QUANT) if r.quantity else Decimal(0),
+            lot_count=r.lot_count,
+            updated_at=r.updated_at,
+        )
+        for r in rows
+    ]
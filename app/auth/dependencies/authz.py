@@ -7,6 +7,13 @@ def admin_required(user: User = Depends(get_current_user)) -> User:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
     return user
 
+def authenticated(user: User = Depends(get_current_user)) -> User:
+    """
+    Qualquer usuário autenticado, em qualquer método (ex.: POST que só
+    enfileira trabalho de leitura).
+    """
+    return user
+
 def read_only(request: Request, user: User = Depends(get_current_user)) -> User:
     """
     Libera GET/HEAD/OPTIONS para usuário autenticado.
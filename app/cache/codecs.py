@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+"""
+Codecs versionados para valores do cache.
+
+Formato: MAGIC (0xA7) + versão + id do codec + id da compressão + payload.
+O byte 0xA7 nunca inicia texto UTF-8 válido, então valores antigos gravados
+como JSON puro (sem cabeçalho) continuam legíveis.
+
+Codec (CACHE_CODEC): json | orjson | msgpack
+Compressão (CACHE_COMPRESSION): none | zlib | zstd | lz4 — aplicada só acima
+de CACHE_COMPRESS_MIN_BYTES. Bibliotecas opcionais ausentes caem para
+json/zlib.
+"""
+
+import json
+import logging
+import os
+import zlib
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependência opcional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - dependência opcional
+    lz4_frame = None
+
+MAGIC = 0xA7
+FORMAT_VERSION = 1
+
+CACHE_CODEC = os.getenv("CACHE_CODEC", "orjson")
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zlib")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+
+Encoder = Callable[[Any], bytes]
+Decoder = Callable[[bytes], Any]
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+# id -> (nome, encoder, decoder); None quando a lib não está instalada
+CODECS: Dict[int, Tuple[str, Encoder | None, Decoder | None]] = {
+    0: ("json", _json_dumps, json.loads),
+    1: ("orjson", orjson.dumps if orjson else None, orjson.loads if orjson else None),
+    2: (
+        "msgpack",
+        (lambda v: msgpack.packb(v, use_bin_type=True)) if msgpack else None,
+        (lambda b: msgpack.unpackb(b, raw=False)) if msgpack else None,
+    ),
+}
+
+COMPRESSIONS: Dict[int, Tuple[str, Encoder | None, Decoder | None]] = {
+    0: ("none", lambda b: b, lambda b: b),
+    1: ("zlib", lambda b: zlib.compress(b, 6), zlib.decompress),
+    2: (
+        "zstd",
+        (lambda b: zstandard.ZstdCompressor(level=3).compress(b)) if zstandard else None,
+        (lambda b: zstandard.ZstdDecompressor().decompress(b)) if zstandard else None,
+    ),
+    3: (
+        "lz4",
+        lz4_frame.compress if lz4_frame else None,
+        lz4_frame.decompress if lz4_frame else None,
+    ),
+}
+
+
+def _resolve(table: Dict[int, Tuple[str, Any, Any]], name: str, fallback: int) -> int:
+    for ident, (n, enc, _) in table.items():
+        if n == name:
+            if enc is not None:
+                return ident
+            logger.warning("cache codec %r unavailable; falling back to %r", name, table[fallback][0])
+            return fallback
+    raise ValueError(f"unknown cache codec/compression: {name!r}")
+
+
+class CacheCodec:
+    """Serializa/desserializa valores com cabeçalho de versão, codec e compressão."""
+
+    def __init__(
+        self,
+        codec: str = CACHE_CODEC,
+        compression: str = CACHE_COMPRESSION,
+        compress_min_bytes: int = CACHE_COMPRESS_MIN_BYTES,
+    ):
+        self.codec_id = _resolve(CODECS, codec, 0)
+        self.compression_id = _resolve(COMPRESSIONS, compression, 1)
+        self.compress_min_bytes = compress_min_bytes
+
+    @property
+    def name(self) -> str:
+        return f"{CODECS[self.codec_id][0]}+{COMPRESSIONS[self.compression_id][0]}"
+
+    def encode(self, value: Any) -> bytes:
+        payload = CODECS[self.codec_id][1](value)
+        compression_id = 0
+        if self.compression_id and len(payload) >= self.compress_min_bytes:
+            payload = COMPRESSIONS[self.compression_id][1](payload)
+            compression_id = self.compression_id
+        return bytes((MAGIC, FORMAT_VERSION, self.codec_id, compression_id)) + payload
+
+    @staticmethod
+    def decode(raw: bytes | str) -> Any:
+        """Decodifica qualquer versão conhecida; JSON puro (legado) também é aceito."""
+        if isinstance(raw, str):
+            return json.loads(raw)
+        if not raw or raw[0] != MAGIC:
+            return json.loads(raw)
+        version, codec_id, compression_id = raw[1], raw[2], raw[3]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported cache format version {version}")
+        decompress = COMPRESSIONS.get(compression_id, (None, None, None))[2]
+        loads = CODECS.get(codec_id, (None, None, None))[2]
+        if decompress is None or loads is None:
+            raise ValueError("cache value written with an unknown/unavailable codec")
+        return loads(decompress(raw[4:]))
+
+
+default_codec = CacheCodec()
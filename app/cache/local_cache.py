@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+"""Cache in-process (L1) com tamanho máximo, despejo LRU e TTL."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLLRUCache:
+    """
+    Dict LRU com expiração por entrada.
+
+    Cada entrada guarda também o prazo absoluto da chave no Redis (se
+    conhecido), para responder o TTL sem ir à rede. Os valores são
+    compartilhados entre chamadores: trate-os como somente leitura.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = max(maxsize, 1)
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, Optional[float]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any, Optional[float]]:
+        """(encontrado, valor, prazo_redis) — prazo_redis em time.monotonic()."""
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None, None
+        value, expires_at, remote_deadline = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return False, None, None
+        self._data.move_to_end(key)
+        return True, value, remote_deadline
+
+    def set(self, key: Hashable, value: Any, remote_ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        ttl = self.ttl if remote_ttl is None else min(self.ttl, remote_ttl)
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        remote_deadline = None if remote_ttl is None else now + remote_ttl
+        self._data[key] = (value, now + ttl, remote_deadline)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
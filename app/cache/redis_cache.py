@@ -1,15 +1,58 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
-from typing import Any, Optional
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 from redis.asyncio import Redis
 
+from app.cache.codecs import default_codec
+from app.cache.local_cache import TTLLRUCache
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 DEFAULT_TTL = int(os.getenv("CACHE_TTL_SECONDS", "3600"))  # 1 hora por padrão
 
+# L1 (in-process) na frente do Redis; coerência entre workers via pub/sub
+CACHE_L1_ENABLED = os.getenv("CACHE_L1_ENABLED", "1") not in ("0", "false", "False", "")
+CACHE_L1_MAX_ITEMS = int(os.getenv("CACHE_L1_MAX_ITEMS", "1024"))
+CACHE_L1_TTL_SECONDS = float(os.getenv("CACHE_L1_TTL_SECONDS", "30"))
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")
+
 _redis_singleton: Optional[Redis] = None
+_redis_bytes_singleton: Optional[Redis] = None
+_l1: Optional[TTLLRUCache] = (
+    TTLLRUCache(CACHE_L1_MAX_ITEMS, CACHE_L1_TTL_SECONDS) if CACHE_L1_ENABLED else None
+)
+_worker_id = uuid.uuid4().hex
+_listener_task: Optional[asyncio.Task] = None
+
+# cache_key -> (lock_key, fencing token): a escrita só acontece se o lock
+# ainda guardar aquele token (ver app.cache.redis_lock)
+Fences = Mapping[str, Tuple[str, int]]
+
+# SET EX condicionado ao fencing token de cada chave.
+# KEYS = k1, lock1, k2, lock2...; ARGV = ttl, v1, token1, v2, token2...
+# Retorna 1/0 por chave (gravou / lock expirou ou pertence a outro dono).
+_FENCED_SET_SCRIPT = """
+local out = {}
+for i = 1, #KEYS, 2 do
+    local j = i + 1
+    if redis.call('get', KEYS[j]) == ARGV[j + 1] then
+        redis.call('set', KEYS[i], ARGV[i + 1], 'EX', ARGV[1])
+        out[#out + 1] = 1
+    else
+        out[#out + 1] = 0
+    end
+end
+return out
+"""
 
 
 async def get_redis() -> Redis:
@@ -22,40 +65,278 @@ async def get_redis() -> Redis:
     return _redis_singleton
 
 
-async def cache_get_json(key: str) -> Any | None:
+async def get_redis_bytes() -> Redis:
     """
-    Recupera valor JSON armazenado no Redis.
-    Retorna None se a chave não existir ou valor inválido.
+    Conexão Redis binária (decode_responses=False) usada para os valores do cache,
+    que são gravados pelo codec (app.cache.codecs) e podem estar comprimidos.
     """
-    r = await get_redis()
-    raw = await r.get(key)
+    global _redis_bytes_singleton
+    if _redis_bytes_singleton is None:
+        _redis_bytes_singleton = Redis.from_url(REDIS_URL, decode_responses=False)
+    return _redis_bytes_singleton
+
+
+async def close_redis() -> None:
+    """Fecha as conexões Redis (texto e binária) no shutdown."""
+    global _redis_singleton, _redis_bytes_singleton
+    for conn in (_redis_singleton, _redis_bytes_singleton):
+        if conn is not None:
+            await conn.aclose()
+    _redis_singleton = _redis_bytes_singleton = None
+
+
+def _record(tier: str, hit: bool) -> None:
+    """Contadores cache.{l1,l2}.{hit,miss} + gauge cache.{tier}.hit_ratio."""
+    metrics.incr(f"cache.{tier}.{'hit' if hit else 'miss'}")
+    hits = metrics.get(f"cache.{tier}.hit")
+    total = hits + metrics.get(f"cache.{tier}.miss")
+    metrics.gauge(f"cache.{tier}.hit_ratio", hits / total if total else 0.0)
+
+
+def _loads(raw: Optional[bytes]) -> Any | None:
     if raw is None:
         return None
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
+        return default_codec.decode(raw)
+    except Exception:
+        # valor corrompido/codec desconhecido: trata como ausente
         return None
 
 
-async def cache_set_json(key: str, value: Any, ttl: int = DEFAULT_TTL) -> None:
+async def _publish_invalidation(keys: Iterable[str]) -> None:
+    """Avisa os demais workers para descartarem `keys` do L1."""
+    if _l1 is None:
+        return
+    r = await get_redis()
+    await r.publish(
+        CACHE_INVALIDATION_CHANNEL, json.dumps({"origin": _worker_id, "keys": list(keys)})
+    )
+
+
+async def cache_get_json_with_ttl(key: str) -> Tuple[Any | None, int | None]:
     """
-    Serializa `value` em JSON e armazena no Redis com TTL (expiração em segundos).
+    Recupera valor e TTL (segundos) num único round trip (GET + TTL em pipeline).
+    Se a chave estiver no L1, responde sem ir à rede.
     """
-    r = await get_redis()
-    await r.set(key, json.dumps(value), ex=ttl)
+    if _l1 is not None:
+        found, value, deadline = _l1.get(key)
+        _record("l1", found)
+        if found:
+            ttl = None if deadline is None else max(int(deadline - time.monotonic()), 0)
+            return value, ttl
+
+    r = await get_redis_bytes()
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.ttl(key)
+        raw, t = await pipe.execute()
+
+    value = _loads(raw)
+    _record("l2", value is not None)
+    ttl = t if t is not None and t >= 0 else None
+    if value is not None and _l1 is not None:
+        _l1.set(key, value, remote_ttl=ttl)
+    return value, ttl
+
+
+async def cache_get_json(key: str) -> Any | None:
+    """
+    Recupera valor armazenado (L1 e depois Redis).
+    Retorna None se a chave não existir ou valor inválido.
+    """
+    value, _ = await cache_get_json_with_ttl(key)
+    return value
+
+
+async def cache_set_json(key: str, value: Any, ttl: int = DEFAULT_TTL, fence: Optional[Tuple[str, int]] = None) -> bool:
+    """
+    Serializa `value` (codec padrão) e armazena no Redis com TTL (expiração em segundos).
+    Com `fence` (lock_key, token), só grava se o lock ainda for desse token.
+    Retorna se gravou.
+    """
+    if fence is not None:
+        return bool(await cache_mset_json({key: value}, ttl=ttl, fences={key: fence}))
+    r = await get_redis_bytes()
+    await r.set(key, default_codec.encode(value), ex=ttl)
+    if _l1 is not None:
+        _l1.set(key, value, remote_ttl=ttl)
+        await _publish_invalidation([key])
+    return True
+
+
+async def cache_get_swr(key: str) -> Tuple[Any | None, str | None, int | None]:
+    """
+    Leitura stale-while-revalidate: retorna (valor, estado, ttl).
+
+    estado = "FRESH" antes do soft TTL, "STALE" entre o soft e o hard TTL
+    (o Redis expira a chave no hard TTL). `ttl` é o tempo restante até o
+    próximo limite (soft se FRESH, hard se STALE). Valores gravados sem
+    envelope (cache_set_json) são tratados como FRESH.
+    """
+    raw, ttl = await cache_get_json_with_ttl(key)
+    if raw is None:
+        return None, None, None
+    if not (isinstance(raw, dict) and "soft_until" in raw and "v" in raw):
+        return raw, "FRESH", ttl
+
+    soft_left = int(raw["soft_until"] - time.time())
+    if soft_left > 0:
+        return raw["v"], "FRESH", soft_left if ttl is None else min(soft_left, ttl)
+    return raw["v"], "STALE", ttl
+
+
+async def cache_set_swr(
+    key: str, value: Any, soft_ttl: int, hard_ttl: int, fence: Optional[Tuple[str, int]] = None
+) -> bool:
+    """
+    Grava `value` com envelope de soft TTL; a chave expira no Redis após `hard_ttl`.
+    """
+    envelope = {"v": value, "soft_until": time.time() + soft_ttl}
+    return await cache_set_json(key, envelope, ttl=max(hard_ttl, soft_ttl), fence=fence)
+
+
+async def cache_mget_json(keys: Sequence[str]) -> Dict[str, Any]:
+    """
+    Recupera vários valores (L1 e, para o restante, um único MGET).
+    Retorna dict apenas com as chaves encontradas (e válidas).
+    """
+    if not keys:
+        return {}
+
+    out: Dict[str, Any] = {}
+    remote: List[str] = []
+    for key in keys:
+        if _l1 is not None:
+            found, value, _ = _l1.get(key)
+            _record("l1", found)
+            if found:
+                out[key] = value
+                continue
+        remote.append(key)
+
+    if not remote:
+        return out
+
+    r = await get_redis_bytes()
+    for key, raw in zip(remote, await r.mget(remote)):
+        value = _loads(raw)
+        _record("l2", value is not None)
+        if value is None:
+            continue
+        out[key] = value
+        if _l1 is not None:
+            _l1.set(key, value)
+    return out
+
+
+async def cache_mset_json(items: Mapping[str, Any], ttl: int = DEFAULT_TTL, fences: Optional[Fences] = None) -> List[str]:
+    """
+    Armazena vários valores com TTL num único round trip (pipeline de SET EX;
+    o MSET nativo não aceita expiração).
+
+    Chaves presentes em `fences` só são gravadas se o lock correspondente ainda
+    guardar o token (um dono cujo lock expirou não sobrescreve o valor de quem
+    o sucedeu). Retorna as chaves gravadas.
+    """
+    if not items:
+        return []
+    fences = fences or {}
+    fenced = [k for k in items if k in fences]
+    plain = [k for k in items if k not in fences]
+
+    r = await get_redis_bytes()
+    async with r.pipeline(transaction=False) as pipe:
+        for key in plain:
+            pipe.set(key, default_codec.encode(items[key]), ex=ttl)
+        if fenced:
+            keys: List[Any] = []
+            args: List[Any] = [ttl]
+            for key in fenced:
+                lock, token = fences[key]
+                keys += [key, lock]
+                args += [default_codec.encode(items[key]), str(token)]
+            pipe.eval(_FENCED_SET_SCRIPT, len(keys), *keys, *args)
+        results = await pipe.execute()
+
+    written = list(plain)
+    if fenced:
+        written += [k for k, ok in zip(fenced, results[-1]) if int(ok)]
+        rejected = len(fenced) - (len(written) - len(plain))
+        if rejected:
+            metrics.incr("cache.lock.fenced_out", rejected)
+    if _l1 is not None and written:
+        for key in written:
+            _l1.set(key, items[key], remote_ttl=ttl)
+        await _publish_invalidation(written)
+    return written
 
 
 async def cache_delete(key: str) -> None:
     """
-    Remove chave do Redis.
+    Remove chave do Redis (e do L1 de todos os workers).
     """
     r = await get_redis()
     await r.delete(key)
+    if _l1 is not None:
+        _l1.delete(key)
+        await _publish_invalidation([key])
+
 
 async def cache_ttl(key: str) -> int | None:
     """
     Retorna o TTL (segundos) da chave, ou None se não existir ou não tiver expiração.
     """
+    if _l1 is not None:
+        found, _, deadline = _l1.get(key)
+        if found and deadline is not None:
+            return max(int(deadline - time.monotonic()), 0)
     r = await get_redis()
     t = await r.ttl(key)
-    return t if t >= 0 else None
\ No newline at end of file
+    return t if t >= 0 else None
+
+
+async def _listen_invalidations() -> None:
+    """Assina o canal de invalidação e descarta do L1 as chaves gravadas por outros workers."""
+    while True:
+        try:
+            r = await get_redis()
+            pubsub = r.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            try:
+                async for message in pubsub.listen():
+                    try:
+                        data = json.loads(message["data"])
+                    except (TypeError, json.JSONDecodeError):
+                        continue
+                    if data.get("origin") == _worker_id:
+                        continue
+                    for key in data.get("keys") or []:
+                        _l1.delete(key)
+            finally:
+                await pubsub.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Sem o canal não há coerência: esvazia o L1 e tenta reconectar
+            logger.exception("cache invalidation listener failed; retrying")
+            _l1.clear()
+            await asyncio.sleep(1)
+
+
+async def start_cache_invalidation_listener() -> None:
+    """Sobe o listener de invalidação (no startup), se o L1 estiver habilitado."""
+    global _listener_task
+    if _l1 is not None and _listener_task is None:
+        _listener_task = asyncio.create_task(_listen_invalidations())
+
+
+async def stop_cache_invalidation_listener() -> None:
+    """Encerra o listener de invalidação (no shutdown)."""
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+"""
+Lock distribuído no Redis (SET NX PX + fencing token) contra cache stampede.
+
+Em um miss, apenas o vencedor do lock consulta o upstream; os demais
+workers/pods esperam brevemente pelo valor que o vencedor grava no cache.
+Se o valor não aparecer dentro de CACHE_LOCK_WAIT_MS, o perdedor cai para
+o upstream (contador cache.lock.fallback).
+
+O fencing token é conferido na escrita (`fence`/`fences` de
+app.cache.redis_cache): um vencedor cujo lock expirou no meio do fetch não
+sobrescreve o valor gravado pelo dono seguinte.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+from app.cache.redis_cache import get_redis
+from app.core import metrics
+
+T = TypeVar("T")
+
+CACHE_LOCK_TIMEOUT_MS = int(os.getenv("CACHE_LOCK_TIMEOUT_MS", "10000"))
+CACHE_LOCK_WAIT_MS = int(os.getenv("CACHE_LOCK_WAIT_MS", "3000"))
+CACHE_LOCK_POLL_MS = int(os.getenv("CACHE_LOCK_POLL_MS", "50"))
+
+FENCE_KEY = "lock:fence"
+
+# SET NX PX de cada lock com um fencing token crescente (INCR em FENCE_KEY).
+# KEYS = locks..., FENCE_KEY; ARGV[1] = PX. Retorna token (ou 0 se ocupado).
+_ACQUIRE_SCRIPT = """
+local fence = KEYS[#KEYS]
+local out = {}
+for i = 1, #KEYS - 1 do
+    local token = redis.call('incr', fence)
+    if redis.call('set', KEYS[i], token, 'NX', 'PX', ARGV[1]) then
+        out[i] = token
+    else
+        out[i] = 0
+    end
+end
+return out
+"""
+
+# Remove o lock apenas se ainda pertencer ao token informado
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def lock_key(name: str) -> str:
+    return f"lock:{name}"
+
+
+def fence(name: str, token: int) -> Tuple[str, int]:
+    """(lock_key, token) para as escritas condicionadas do cache."""
+    return lock_key(name), token
+
+
+async def acquire_many(names: Iterable[str], timeout_ms: int = CACHE_LOCK_TIMEOUT_MS) -> Dict[str, int]:
+    """
+    Tenta obter vários locks num único round trip.
+    Retorna {nome: fencing_token} apenas para os locks obtidos.
+    """
+    names = list(names)
+    if not names:
+        return {}
+    r = await get_redis()
+    keys = [lock_key(n) for n in names] + [FENCE_KEY]
+    tokens = await r.eval(_ACQUIRE_SCRIPT, len(keys), *keys, timeout_ms)
+    won = {name: int(token) for name, token in zip(names, tokens) if int(token) > 0}
+
+    metrics.incr("cache.lock.acquired", len(won))
+    metrics.incr("cache.lock.contended", len(names) - len(won))
+    return won
+
+
+async def acquire(name: str, timeout_ms: int = CACHE_LOCK_TIMEOUT_MS) -> Optional[int]:
+    """Tenta obter o lock `name`; retorna o fencing token ou None se já estiver em uso."""
+    return (await acquire_many([name], timeout_ms)).get(name)
+
+
+async def release_many(tokens: Dict[str, int]) -> None:
+    """Libera os locks cujo valor ainda é o token informado (não apaga lock alheio)."""
+    if not tokens:
+        return
+    r = await get_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        for name, token in tokens.items():
+            pipe.eval(_RELEASE_SCRIPT, 1, lock_key(name), str(token))
+        await pipe.execute()
+
+
+async def release(name: str, token: int) -> None:
+    await release_many({name: token})
+
+
+async def wait_for(
+    read: Callable[[], Awaitable[Optional[T]]],
+    wait_ms: int = CACHE_LOCK_WAIT_MS,
+    poll_ms: int = CACHE_LOCK_POLL_MS,
+) -> Optional[T]:
+    """Consulta `read()` periodicamente até obter valor ou esgotar `wait_ms`."""
+    deadline = time.monotonic() + wait_ms / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(poll_ms / 1000)
+        value = await read()
+        if value is not None:
+            return value
+    return None
+
+
+async def load_with_lock(
+    name: str,
+    read: Callable[[], Awaitable[Optional[T]]],
+    load: Callable[[Optional[Tuple[str, int]]], Awaitable[T]],
+) -> T:
+    """
+    Caminho de miss protegido: o vencedor executa `load(fence)` (que deve
+    gravar no cache condicionado ao fence); perdedores esperam `read()`
+    retornar o valor do vencedor. No fallback, `load(None)` grava sem fence.
+    """
+    token = await acquire(name)
+    if token is not None:
+        try:
+            return await load(fence(name, token))
+        finally:
+            await release(name, token)
+
+    value = await wait_for(read)
+    if value is not None:
+        metrics.incr("cache.lock.waited_hit")
+        return value
+
+    metrics.incr("cache.lock.fallback")
+    return await load(None)
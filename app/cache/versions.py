@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+"""
+Contadores de versão por recurso (Redis) para ETag forte / If-None-Match.
+
+Cada recurso tem uma chave `ver:{tipo}:{id}`, incrementada (INCR) após o
+commit de toda escrita que muda sua representação. O ETag é derivado só da
+versão, então `GET` com `If-None-Match` igual responde 304 sem tocar no
+Postgres nem serializar.
+
+A leitura da versão não escreve: chave ausente (nunca servida, expirada ou
+Redis reiniciado) significa "sem ETag" e o GET segue para o banco. Só o
+caminho 200, depois de confirmar o recurso no banco, inicializa a chave
+(SET NX a partir do relógio, em ns): a nova versão nunca coincide com um
+ETag emitido antes. Se outra escrita criou a chave nesse meio-tempo, a
+resposta sai sem ETag (o dado lido pode ser anterior a ela).
+
+`If-None-Match: *` não é honrado: a versão existir não prova que o recurso
+existe (a remoção também incrementa).
+"""
+
+import os
+import time
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+
+from app.cache.redis_cache import get_redis
+from app.core import metrics
+
+VERSION_TTL_SECONDS = int(os.getenv("VERSION_TTL_SECONDS", str(7 * 24 * 3600)))
+
+CLIENT = "client"  # GET /clients/{id}
+ALLOCATIONS = "allocations"  # GET /clients/{id}/allocations
+
+
+def _key(kind: str, resource_id: int) -> str:
+    return f"ver:{kind}:{resource_id}"
+
+
+async def get_version(kind: str, resource_id: int) -> Optional[str]:
+    """Versão atual, ou None se a chave não existe (não cria)."""
+    r = await get_redis()
+    return await r.get(_key(kind, resource_id))
+
+
+async def init_version(kind: str, resource_id: int) -> Optional[str]:
+    """Cria a versão se ausente; None se a chave já tinha sido criada por outro."""
+    version = str(time.time_ns())
+    r = await get_redis()
+    created = await r.set(_key(kind, resource_id), version, nx=True, ex=VERSION_TTL_SECONDS)
+    return version if created else None
+
+
+async def bump_versions(kind: str, resource_ids: Iterable[int]) -> None:
+    """Nova versão p/ cada recurso (chamar após o commit da escrita)."""
+    ids = set(resource_ids)
+    if not ids:
+        return
+    r = await get_redis()
+    async with r.pipeline(transaction=False) as pipe:
+        for resource_id in ids:
+            key = _key(kind, resource_id)
+            pipe.set(key, time.time_ns(), nx=True, ex=VERSION_TTL_SECONDS)
+            pipe.incr(key)
+            pipe.expire(key, VERSION_TTL_SECONDS)
+        await pipe.execute()
+
+
+def _etag(kind: str, resource_id: int, version: Optional[str]) -> Optional[str]:
+    return f'"{kind}-{resource_id}-{version}"' if version is not None else None
+
+
+async def resource_etag(kind: str, resource_id: int) -> Optional[str]:
+    """ETag da versão atual; None se ainda não há versão (só leitura)."""
+    return _etag(kind, resource_id, await get_version(kind, resource_id))
+
+
+async def init_resource_etag(kind: str, resource_id: int) -> Optional[str]:
+    """ETag para o caminho 200 quando `resource_etag` veio None (após ler o banco)."""
+    return _etag(kind, resource_id, await init_version(kind, resource_id))
+
+
+def _matches(header: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match (comparação fraca, RFC 9110): lista de tags (`*` ignorado)."""
+    if not header or etag is None:
+        return False
+    return any(c.strip().removeprefix("W/") == etag for c in header.split(","))
+
+
+def _record(not_modified: bool) -> None:
+    """Contadores etag.{304,200} + gauge etag.304_ratio."""
+    metrics.incr("etag.304" if not_modified else "etag.200")
+    hits = metrics.get("etag.304")
+    total = hits + metrics.get("etag.200")
+    metrics.gauge("etag.304_ratio", hits / total if total else 0.0)
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """Resposta 304 se o If-None-Match bater com `etag`; None para seguir com o 200."""
+    hit = _matches(request.headers.get("if-none-match"), etag)
+    _record(hit)
+    if hit:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+"""Contadores/gauges in-process simples (por worker) expostos em GET /metrics."""
+
+from collections import defaultdict
+from typing import Dict
+
+_counters: Dict[str, float] = defaultdict(float)
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Incrementa o contador `name`."""
+    _counters[name] += value
+
+
+def gauge(name: str, value: float) -> None:
+    """Define o valor atual de um gauge (ex.: razões calculadas)."""
+    _counters[name] = value
+
+
+def get(name: str) -> float:
+    """Valor atual do contador (0 se nunca incrementado)."""
+    return _counters.get(name, 0)
+
+
+def snapshot() -> Dict[str, float]:
+    """Cópia ordenada de todos os contadores."""
+    return dict(sorted(_counters.items()))
+
+
+def reset() -> None:
+    """Zera todos os contadores."""
+    _counters.clear()
@@ -11,6 +11,7 @@ from sqlalchemy import (
     ForeignKey,
     Integer,
     Numeric,
+    Sequence,
     String,
     UniqueConstraint,
     CheckConstraint,
@@ -29,6 +30,15 @@ class ClientStatus(str, Enum):
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # keyset de GET /clients?sort=name: (name, id) > (:name, :id)
+        Index("ix_clients_name_id", "name", "id"),
+        # busca (q): ILIKE '%q%' e similaridade (pg_trgm) em nome/email
+        Index("ix_clients_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_clients_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        # prefixo de email: lower(email) LIKE 'q%' (independe da collation)
+        Index("ix_clients_email_lower_prefix", text("lower(email) text_pattern_ops")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(120), nullable=False, index=True)
@@ -62,6 +72,22 @@ class Asset(Base):
     )
 
 
+class AssetCatalogItem(Base):
+    """Catálogo local com os itens sanitizados vistos nas buscas do Yahoo."""
+
+    __tablename__ = "asset_catalog"
+
+    symbol: Mapped[str] = mapped_column(String(32), primary_key=True)
+    shortname: Mapped[Optional[str]] = mapped_column(String(255))
+    longname: Mapped[Optional[str]] = mapped_column(String(255))
+    exch: Mapped[Optional[str]] = mapped_column(String(32))
+    exch_disp: Mapped[Optional[str]] = mapped_column(String(64))
+    type_disp: Mapped[Optional[str]] = mapped_column(String(64))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=text("now()")
+    )
+
+
 class Allocation(Base):
     __tablename__ = "allocations"
     __table_args__ = (
@@ -83,17 +109,56 @@ class Allocation(Base):
     asset: Mapped["Asset"] = relationship(back_populates="allocations")
 
 
+class Position(Base):
+    """Posição consolidada por (cliente, ativo), mantida incrementalmente a cada lote."""
+
+    __tablename__ = "positions"
+
+    client_id: Mapped[int] = mapped_column(
+        ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True
+    )
+    asset_id: Mapped[int] = mapped_column(
+        ForeignKey("assets.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    quantity: Mapped[Numeric] = mapped_column(Numeric(28, 8), nullable=False)
+    cost_basis: Mapped[Numeric] = mapped_column(Numeric(28, 8), nullable=False)
+    lot_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=text("now()")
+    )
+
+    asset: Mapped["Asset"] = relationship()
+
+
+class PortfolioSnapshot(Base):
+    """Rollup diário da carteira por cliente (valor, custo e rentabilidade no pregão)."""
+
+    __tablename__ = "portfolio_snapshots"
+
+    client_id: Mapped[int] = mapped_column(
+        ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True
+    )
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+    value: Mapped[Numeric] = mapped_column(Numeric(28, 8), nullable=False)
+    cost: Mapped[Numeric] = mapped_column(Numeric(28, 8), nullable=False)
+    return_pct: Mapped[Optional[Numeric]] = mapped_column(Numeric(14, 6))
+
+
 class DailyReturn(Base):
+    """Fechamentos diários; tabela particionada por ano (ver app/db/partitions.py)."""
+
     __tablename__ = "daily_returns"
     __table_args__ = (
+        # unique composta = índice (asset_id, date) em cada partição
         UniqueConstraint("asset_id", "date", name="uq_daily_returns_asset_date"),
-        Index("ix_daily_returns_asset_id", "asset_id"),
-        Index("ix_daily_returns_date", "date"),
+        Index("ix_daily_returns_date_brin", "date", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (date)"},
     )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # PK precisa conter a chave de partição
+    id: Mapped[int] = mapped_column(Integer, Sequence("daily_returns_id_seq"), primary_key=True)
     asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), nullable=False)
-    date: Mapped[date] = mapped_column(Date, nullable=False)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
     close_price: Mapped[Numeric] = mapped_column(Numeric(20, 8), nullable=False)
 
     asset: Mapped["Asset"] = relationship(back_populates="daily_returns")
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+"""
+Partições anuais de `daily_returns` (PARTITION BY RANGE (date)).
+
+Cada ano vira `daily_returns_y{ANO}`; a partição DEFAULT recebe datas fora
+dos anos criados. `ensure_daily_returns_partitions` cria os anos que faltam
+antes de os dados chegarem; se a DEFAULT já tiver linhas daquele ano, elas
+são movidas para a nova partição na mesma transação (a tabela é criada
+avulsa, recebe as linhas e só então é anexada).
+"""
+
+from typing import List, Set
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PARENT = "daily_returns"
+DEFAULT_PARTITION = f"{PARENT}_default"
+
+
+def partition_name(year: int) -> str:
+    return f"{PARENT}_y{year}"
+
+
+def partition_ddl(year: int) -> List[str]:
+    """Statements que criam e anexam a partição de `year` (movendo linhas da DEFAULT)."""
+    name, lo, hi = partition_name(year), f"{year}-01-01", f"{year + 1}-01-01"
+    return [
+        f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE date >= '{lo}' AND date < '{hi}' RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')",
+    ]
+
+
+async def existing_partitions(db: AsyncSession) -> Set[str]:
+    res = await db.execute(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+            """
+        ),
+        {"parent": PARENT},
+    )
+    return set(res.scalars().all())
+
+
+async def ensure_daily_returns_partitions(db: AsyncSession, first_year: int, last_year: int) -> List[str]:
+    """Cria as partições anuais de [first_year, last_year] que não existem. Retorna as criadas (faz commit)."""
+    existing = await existing_partitions(db)
+    created = []
+    for year in range(first_year, last_year + 1):
+        if partition_name(year) in existing:
+            continue
+        for stmt in partition_ddl(year):
+            await db.execute(text(stmt))
+        created.append(partition_name(year))
+    if created:
+        await db.commit()
+    return created
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+"""
+Micro-batching de cotações entre requisições.
+
+Pedidos de cotação de vários handlers concorrentes são acumulados por uma
+janela curta (QUOTE_BATCH_WINDOW_MS) e enviados ao Yahoo em poucas chamadas
+grandes (/v7/finance/quote), divididas em blocos seguros para URL. Cada
+chamador recebe apenas os seus símbolos.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+from app.core import metrics
+from app.integrations.yahoo import YahooClient, get_yahoo, normalize_symbols
+
+QUOTE_BATCH_WINDOW_MS = float(os.getenv("QUOTE_BATCH_WINDOW_MS", "15"))
+QUOTE_BATCH_MAX_SYMBOLS = int(os.getenv("QUOTE_BATCH_MAX_SYMBOLS", "50"))
+QUOTE_BATCH_MAX_URL_CHARS = int(os.getenv("QUOTE_BATCH_MAX_URL_CHARS", "1500"))
+
+
+def _chunk_symbols(symbols: Sequence[str], max_symbols: int, max_chars: int) -> List[List[str]]:
+    """Divide símbolos em blocos com no máx. `max_symbols` itens e `max_chars` no parâmetro."""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for sym in symbols:
+        extra = len(sym) + (3 if current else 0)  # vírgula vira %2C na URL
+        if current and (len(current) >= max_symbols or size + extra > max_chars):
+            chunks.append(current)
+            current, size = [], 0
+            extra = len(sym)
+        current.append(sym)
+        size += extra
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class QuoteBatcher:
+    """
+    Agregador de cotações na frente de `YahooClient.quotes()`.
+
+    Métricas: quotes.batch.{requests,flushes,calls,symbols,capacity} e o gauge
+    quotes.batch.fill_ratio (símbolos enviados / capacidade dos blocos).
+    """
+
+    def __init__(
+        self,
+        yahoo: YahooClient,
+        window_ms: float = QUOTE_BATCH_WINDOW_MS,
+        max_batch: int = QUOTE_BATCH_MAX_SYMBOLS,
+        max_url_chars: int = QUOTE_BATCH_MAX_URL_CHARS,
+    ):
+        self._yahoo = yahoo
+        self._window = max(window_ms, 0) / 1000
+        self._max_batch = max(max_batch, 1)
+        self._max_url_chars = max_url_chars
+        self._waiters: List[Tuple[List[str], asyncio.Future]] = []
+        self._symbols: Set[str] = set()
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def quotes(self, symbols: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Mesma interface de `YahooClient.quotes()`, mas agregada na janela."""
+        wanted = normalize_symbols(symbols or [])
+        if not wanted:
+            return {}
+
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        self._waiters.append((wanted, fut))
+        self._symbols.update(wanted)
+        metrics.incr("quotes.batch.requests")
+
+        if len(self._symbols) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._waiters:
+            return
+
+        waiters, symbols = self._waiters, sorted(self._symbols)
+        self._waiters, self._symbols = [], set()
+
+        task = asyncio.ensure_future(self._run(symbols, waiters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, symbols: List[str], waiters: List[Tuple[List[str], asyncio.Future]]) -> None:
+        chunks = _chunk_symbols(symbols, self._max_batch, self._max_url_chars)
+        metrics.incr("quotes.batch.flushes")
+        metrics.incr("quotes.batch.calls", len(chunks))
+        metrics.incr("quotes.batch.symbols", len(symbols))
+        metrics.incr("quotes.batch.capacity", len(chunks) * self._max_batch)
+        metrics.gauge(
+            "quotes.batch.fill_ratio",
+            metrics.get("quotes.batch.symbols") / (metrics.get("quotes.batch.capacity") or 1),
+        )
+
+        results = await asyncio.gather(
+            *(self._yahoo.quotes(chunk) for chunk in chunks), return_exceptions=True
+        )
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        failed: Dict[str, BaseException] = {}
+        for chunk, res in zip(chunks, results):
+            if isinstance(res, BaseException):
+                failed.update({sym: res for sym in chunk})
+            else:
+                merged.update(res)
+
+        for wanted, fut in waiters:
+            if fut.done():  # chamador cancelado
+                continue
+            err = next((failed[s] for s in wanted if s in failed), None)
+            if err is not None:
+                fut.set_exception(err)
+            else:
+                fut.set_result({s: merged[s] for s in wanted if s in merged})
+
+
+# DI (singleton) p/ FastAPI
+_batcher_singleton: QuoteBatcher | None = None
+
+
+async def get_quote_batcher() -> QuoteBatcher:
+    """Retorna instância singleton do QuoteBatcher (sobre o YahooClient singleton)."""
+    global _batcher_singleton
+    yahoo = await get_yahoo()
+    if _batcher_singleton is None or _batcher_singleton._yahoo is not yahoo:
+        _batcher_singleton = QuoteBatcher(yahoo)
+    return _batcher_singleton
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+"""
+Single-flight in-process: chamadas idênticas (ou sobrepostas) em voo
+compartilham uma única chamada upstream e o resultado é repassado a todos.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, TypeVar
+
+from app.core import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes por chave.
+
+    - `do(key, fn)`: uma chamada por chave; demais esperam a mesma task.
+    - `do_many(keys, fn)`: chaves já em voo são reaproveitadas; só as
+      faltantes disparam uma nova chamada `fn(missing)` (retorna dict).
+
+    A chamada upstream roda numa task própria protegida por `shield`, então
+    o cancelamento de um chamador não derruba os demais que esperam.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def _start(self, keys: List[Hashable], coro: Awaitable[Any]) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        for k in keys:
+            self._inflight[k] = task
+
+        def _cleanup(t: asyncio.Task) -> None:
+            for k in keys:
+                if self._inflight.get(k) is t:
+                    del self._inflight[k]
+            if not t.cancelled():
+                t.exception()  # evita "exception was never retrieved"
+
+        task.add_done_callback(_cleanup)
+        metrics.incr(f"{self.name}.issued")
+        return task
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start([key], fn())
+        else:
+            metrics.incr(f"{self.name}.coalesced")
+        return await asyncio.shield(task)
+
+    async def do_many(
+        self,
+        keys: Iterable[K],
+        fn: Callable[[List[K]], Awaitable[Dict[K, V]]],
+    ) -> Dict[K, V]:
+        wanted = list(dict.fromkeys(keys))
+        tasks: List[asyncio.Task] = []
+        missing: List[K] = []
+        for k in wanted:
+            task = self._inflight.get(k)
+            if task is None:
+                missing.append(k)
+            elif task not in tasks:
+                tasks.append(task)
+
+        if tasks:
+            metrics.incr(f"{self.name}.coalesced")
+        if missing:
+            tasks.append(self._start(list(missing), fn(missing)))
+
+        out: Dict[K, V] = {}
+        for result in await asyncio.shield(asyncio.gather(*tasks)):
+            for k in wanted:
+                if k in result:
+                    out[k] = result[k]
+        return out
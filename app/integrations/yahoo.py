@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import os
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
 from typing import Any, Dict, List, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from app.integrations.singleflight import SingleFlight
+
 # Config por env (com defaults)
 YAHOO_BASE_URL = os.getenv("YAHOO_BASE_URL", "https://query1.finance.yahoo.com")
 YAHOO_TIMEOUT_SECONDS = float(os.getenv("YAHOO_TIMEOUT_SECONDS", "8"))
@@ -19,14 +23,48 @@ class YahooError(RuntimeError):
     """Erro de integração Yahoo Finance."""
 
 
+def normalize_symbols(symbols: Sequence[str]) -> List[str]:
+    """Normaliza símbolos (UPPER, sem vazios/duplicados), ordenados."""
+    return sorted({s.strip().upper() for s in symbols if s and s.strip()})
+
+
 def _symbols_to_str(symbols: Sequence[str]) -> str:
     """Normaliza e junta símbolos (AAPL,MSFT,...)"""
-    unique = {s.strip().upper() for s in symbols if s and s.strip()}
-    return ",".join(sorted(unique))
+    return ",".join(normalize_symbols(symbols))
+
+
+def _exchange_tz(meta: Dict[str, Any]) -> tzinfo:
+    """Fuso da bolsa (nome IANA; na falta, o offset em segundos)."""
+    name = meta.get("exchangeTimezoneName")
+    if name:
+        try:
+            return ZoneInfo(name)
+        except ZoneInfoNotFoundError:
+            pass
+    return timezone(timedelta(seconds=meta.get("gmtoffset") or 0))
+
+
+def _open_session_start(meta: Dict[str, Any]) -> int | None:
+    """Início (epoch) do pregão regular se ele está aberto agora; senão None."""
+    regular = (meta.get("currentTradingPeriod") or {}).get("regular") or {}
+    start, end = regular.get("start"), regular.get("end")
+    if not isinstance(start, (int, float)) or not isinstance(end, (int, float)):
+        return None
+    return int(start) if start <= datetime.now(timezone.utc).timestamp() < end else None
+
+
+def _epoch(day: date) -> int:
+    return int(datetime.combine(day, time(), timezone.utc).timestamp())
 
 
 class YahooClient:
-    """Cliente async p/ Yahoo Finance (search + quotes) com retry/backoff."""
+    """
+    Cliente async p/ Yahoo Finance (search + quotes + chart) com retry/backoff.
+
+    Chamadas concorrentes são coalescidas (single-flight): buscas idênticas
+    e cotações de símbolos já em voo compartilham a mesma chamada upstream.
+    Contadores: yahoo.search.{issued,coalesced}, yahoo.quotes.{issued,coalesced}.
+    """
 
     def __init__(self, timeout: float | None = None, base_url: str | None = None):
         self._timeout = timeout or YAHOO_TIMEOUT_SECONDS
@@ -40,6 +78,8 @@ class YahooClient:
                 "User-Agent": "Mozilla/5.0 (compatible; DK-AnkaTech/1.0)",
             },
         )
+        self._search_flight = SingleFlight("yahoo.search")
+        self._quotes_flight = SingleFlight("yahoo.quotes")
 
     async def aclose(self):
         await self._client.aclose()
@@ -52,11 +92,8 @@ class YahooClient:
         ),
         retry=retry_if_exception_type(httpx.HTTPError),
     )
-    async def search(self, query: str, quotes_count: int = 10) -> List[Dict[str, Any]]:
-        """Busca por texto e retorna itens sanitizados (symbol, names, exch*, typeDisp)."""
-        if not query or not query.strip():
-            return []
-
+    async def _fetch_search(self, query: str, quotes_count: int) -> List[Dict[str, Any]]:
+        """Chamada upstream /v1/finance/search (com retry)."""
         params = {"q": query.strip(), "quotesCount": quotes_count, "newsCount": 0}
         try:
             r = await self._client.get("/v1/finance/search", params=params)
@@ -90,15 +127,9 @@ class YahooClient:
         ),
         retry=retry_if_exception_type(httpx.HTTPError),
     )
-    async def quotes(self, symbols: Sequence[str]) -> Dict[str, Dict[str, Any]]:
-        """Cotações para múltiplos símbolos. Chave do dict = símbolo UPPER."""
-        if not symbols:
-            return {}
-
+    async def _fetch_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Chamada upstream /v7/finance/quote (com retry)."""
         params = {"symbols": _symbols_to_str(symbols)}
-        if not params["symbols"]:
-            return {}
-
         try:
             r = await self._client.get("/v7/finance/quote", params=params)
             r.raise_for_status()
@@ -114,6 +145,83 @@ class YahooClient:
         except httpx.HTTPError as e:
             raise YahooError(f"Yahoo quotes failed: {e}") from e
 
+    @retry(
+        reraise=True,
+        stop=stop_after_attempt(YAHOO_RETRIES),
+        wait=wait_exponential(
+            multiplier=YAHOO_BACKOFF_MULTIPLIER, min=YAHOO_BACKOFF_MIN, max=YAHOO_BACKOFF_MAX
+        ),
+        retry=retry_if_exception_type(httpx.HTTPError),
+    )
+    async def _fetch_chart(self, symbol: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Chamada upstream /v8/finance/chart/{symbol} (com retry)."""
+        try:
+            r = await self._client.get(f"/v8/finance/chart/{symbol}", params=params)
+            r.raise_for_status()
+            return r.json() or {}
+        except httpx.HTTPError as e:
+            raise YahooError(f"Yahoo chart failed for {symbol}: {e}") from e
+
+    async def chart(self, symbol: str, start: date, end: date, interval: str = "1d") -> List[Dict[str, Any]]:
+        """
+        Barras diárias de `symbol` entre `start` e `end` (inclusive), em ordem.
+        Cada item: {date, close, adjclose}; barras sem fechamento são descartadas,
+        assim como a do pregão em andamento (o "close" seria o preço intradiário).
+        """
+        symbol = symbol.strip().upper()
+        params = {
+            "period1": _epoch(start),
+            "period2": _epoch(end + timedelta(days=1)),
+            "interval": interval,
+            "includePrePost": "false",
+            "events": "div,splits",
+        }
+        chart = (await self._fetch_chart(symbol, params)).get("chart") or {}
+        if chart.get("error"):
+            raise YahooError(f"Yahoo chart error for {symbol}: {chart['error']}")
+        result = (chart.get("result") or [None])[0] or {}
+
+        meta = result.get("meta") or {}
+        tz = _exchange_tz(meta)
+        open_since = _open_session_start(meta)
+        indicators = result.get("indicators") or {}
+        closes = ((indicators.get("quote") or [{}])[0]).get("close") or []
+        adjcloses = ((indicators.get("adjclose") or [{}])[0]).get("adjclose") or []
+
+        bars: List[Dict[str, Any]] = []
+        for i, ts in enumerate(result.get("timestamp") or []):
+            close = closes[i] if i < len(closes) else None
+            if close is None or (open_since is not None and ts >= open_since):
+                continue
+            day = datetime.fromtimestamp(ts, tz).date()
+            if start <= day <= end:
+                bars.append(
+                    {
+                        "date": day,
+                        "close": close,
+                        "adjclose": adjcloses[i] if i < len(adjcloses) else None,
+                    }
+                )
+        return bars
+
+    async def search(self, query: str, quotes_count: int = 10) -> List[Dict[str, Any]]:
+        """Busca por texto e retorna itens sanitizados (symbol, names, exch*, typeDisp)."""
+        if not query or not query.strip():
+            return []
+
+        q = query.strip()
+        return await self._search_flight.do(
+            (q.lower(), quotes_count),
+            lambda: self._fetch_search(q, quotes_count),
+        )
+
+    async def quotes(self, symbols: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Cotações para múltiplos símbolos. Chave do dict = símbolo UPPER."""
+        wanted = normalize_symbols(symbols or [])
+        if not wanted:
+            return {}
+        return await self._quotes_flight.do_many(wanted, self._fetch_quotes)
+
 
 # DI (singleton) p/ FastAPI
 _yahoo_singleton: YahooClient | None = None
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+"""
+Backfill do histórico de fechamentos (`daily_returns`) pelo chart do Yahoo.
+
+Uso:
+    python -m app.jobs.backfill_daily_closes --start 2015-01-01
+    python -m app.jobs.backfill_daily_closes --start 2020-01-01 --end 2024-12-31 --ticker VALE3.SA --ticker PETR4.SA
+
+Reexecutar é seguro: cada ativo retoma a partir dos dias já gravados.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.integrations.yahoo import YahooClient
+from app.services.daily_returns import (
+    DAILY_CLOSES_BACKFILL_CHUNK_ROWS,
+    DAILY_CLOSES_BACKFILL_WINDOW_DAYS,
+    DAILY_CLOSES_CONCURRENCY,
+    BackfillReport,
+    backfill_closes,
+)
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+async def main(
+    start: date,
+    end: Optional[date] = None,
+    tickers: Optional[List[str]] = None,
+    concurrency: int = DAILY_CLOSES_CONCURRENCY,
+    window_days: int = DAILY_CLOSES_BACKFILL_WINDOW_DAYS,
+    chunk_rows: int = DAILY_CLOSES_BACKFILL_CHUNK_ROWS,
+) -> BackfillReport:
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL não definido")
+    engine = create_async_engine(DATABASE_URL, echo=False)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    yahoo = YahooClient()
+    try:
+        async with Session() as db:
+            report = await backfill_closes(
+                db, yahoo, start, end, tickers, concurrency, window_days, chunk_rows
+            )
+    finally:
+        await yahoo.aclose()
+        await engine.dispose()
+    print(
+        f"{report.start}..{report.end}: assets={report.assets} up_to_date={report.up_to_date} "
+        f"requests={report.requests} written={report.written} failed={len(report.failed)} "
+        f"timings_ms={report.timings_ms}"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Backfill do histórico de fechamentos")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="YYYY-MM-DD (padrão: último pregão concluído)")
+    parser.add_argument("--ticker", action="append", default=None, help="repetível; padrão: todos")
+    parser.add_argument("--concurrency", type=int, default=DAILY_CLOSES_CONCURRENCY)
+    parser.add_argument("--window-days", type=int, default=DAILY_CLOSES_BACKFILL_WINDOW_DAYS)
+    parser.add_argument("--chunk-rows", type=int, default=DAILY_CLOSES_BACKFILL_CHUNK_ROWS)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.start, args.end, args.ticker, args.concurrency, args.window_days, args.chunk_rows)
+    )
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+"""
+Cria antecipadamente as partições anuais de `daily_returns`.
+
+Uso:
+    python -m app.jobs.create_partitions                 # ano corrente + 1 à frente
+    python -m app.jobs.create_partitions --years-ahead 3
+    python -m app.jobs.create_partitions --from-year 2010
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db.partitions import ensure_daily_returns_partitions
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+async def main(years_ahead: int = 1, from_year: Optional[int] = None) -> None:
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL não definido")
+    this_year = date.today().year
+    engine = create_async_engine(DATABASE_URL, echo=False)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with Session() as db:
+        created = await ensure_daily_returns_partitions(db, from_year or this_year, this_year + years_ahead)
+    await engine.dispose()
+    print(f"partitions created: {', '.join(created) or 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cria partições anuais de daily_returns")
+    parser.add_argument("--years-ahead", type=int, default=1)
+    parser.add_argument("--from-year", type=int, default=None, help="padrão: ano corrente")
+    args = parser.parse_args()
+    asyncio.run(main(args.years_ahead, args.from_year))
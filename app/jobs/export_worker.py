@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+"""
+Worker das exportações assíncronas (fila `POST /exports`).
+
+Uso:
+    python -m app.jobs.export_worker                  # 1 job por vez
+    python -m app.jobs.export_worker --concurrency 2
+
+Roda fora da API: os workers HTTP só enfileiram e consultam status. Precisa
+do mesmo REDIS_URL, DATABASE_URL e EXPORT_JOBS_DIR da API. A cada
+EXPORT_MAINTENANCE_INTERVAL_S devolve à fila os jobs de workers mortos
+(`reap_stale_jobs`) e remove os arquivos mais velhos que
+EXPORT_JOB_TTL_SECONDS.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+
+from app.cache.redis_cache import close_redis
+from app.services.export_jobs import ack_job, next_job_id, purge_expired_files, reap_stale_jobs, run_export_job
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MAINTENANCE_INTERVAL_S = float(os.getenv("EXPORT_MAINTENANCE_INTERVAL_S", "30"))
+ERROR_BACKOFF_S = 1.0
+
+
+async def _consume(worker: str) -> None:
+    """Consome a fila; erro transitório (ex.: Redis fora) não derruba o worker."""
+    while True:
+        try:
+            job_id = await next_job_id(worker)
+            if job_id is None:
+                continue
+            await run_export_job(job_id)
+            await ack_job(worker, job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("export worker %s: error consuming the queue", worker)
+            await asyncio.sleep(ERROR_BACKOFF_S)
+
+
+async def _maintain() -> None:
+    """Reaper de jobs órfãos + limpeza de arquivos expirados."""
+    while True:
+        try:
+            reaped = await reap_stale_jobs()
+            if reaped:
+                logger.info("reaped %d stale export jobs", reaped)
+            removed = await asyncio.to_thread(purge_expired_files)
+            if removed:
+                logger.info("purged %d expired export files", removed)
+        except Exception:
+            logger.exception("export worker maintenance failed")
+        await asyncio.sleep(EXPORT_MAINTENANCE_INTERVAL_S)
+
+
+async def main(concurrency: int = 1) -> None:
+    # nome único por processo: a lista de processamento de um worker morto
+    # não é reaproveitada, só esvaziada pelo reaper
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("export worker %s started (concurrency=%d)", prefix, concurrency)
+    try:
+        await asyncio.gather(_maintain(), *(_consume(f"{prefix}:{i}") for i in range(concurrency)))
+    finally:
+        await close_redis()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Worker das exportações assíncronas")
+    parser.add_argument("--concurrency", type=int, default=1, help="jobs simultâneos")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.concurrency))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+"""
+Ingestão dos fechamentos diários em `daily_returns`.
+
+Uso:
+    python -m app.jobs.ingest_daily_closes                  # último pregão de cada ativo
+    python -m app.jobs.ingest_daily_closes --date 2025-01-15  # fechamento daquele dia (chart)
+
+Também pode rodar dentro da API (DAILY_CLOSES_SCHEDULE_ENABLED=1): uma vez
+por dia em DAILY_CLOSES_SCHEDULE_AT (HH:MM, UTC), com lock no Redis para que
+só um worker execute.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.cache.redis_lock import acquire, release
+from app.db.base import AsyncSessionLocal
+from app.integrations.yahoo import YahooClient, get_yahoo
+from app.services.daily_returns import (
+    DAILY_CLOSES_BATCH_SIZE,
+    DAILY_CLOSES_CONCURRENCY,
+    IngestReport,
+    ingest_daily_closes,
+)
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+DAILY_CLOSES_SCHEDULE_ENABLED = os.getenv("DAILY_CLOSES_SCHEDULE_ENABLED", "0") not in ("0", "false", "False", "")
+DAILY_CLOSES_SCHEDULE_AT = os.getenv("DAILY_CLOSES_SCHEDULE_AT", "22:30")  # UTC
+SCHEDULE_LOCK = "job:daily_closes"
+SCHEDULE_LOCK_TIMEOUT_MS = 60 * 60 * 1000
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+async def main(
+    target: Optional[date] = None,
+    batch_size: int = DAILY_CLOSES_BATCH_SIZE,
+    concurrency: int = DAILY_CLOSES_CONCURRENCY,
+) -> IngestReport:
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL não definido")
+    engine = create_async_engine(DATABASE_URL, echo=False)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    yahoo = YahooClient()
+    try:
+        async with Session() as db:
+            report = await ingest_daily_closes(db, yahoo, target, batch_size, concurrency)
+    finally:
+        await yahoo.aclose()
+        await engine.dispose()
+    print(
+        f"{report.target}: assets={report.assets} skipped={report.skipped} "
+        f"written={report.written} snapshots={report.snapshots} unpriced={len(report.unpriced)} "
+        f"failed={len(report.failed)} timings_ms={report.timings_ms}"
+    )
+    return report
+
+
+def _seconds_until(at: str) -> float:
+    hh, mm = (int(x) for x in at.split(":"))
+    now = datetime.now(timezone.utc)
+    run = datetime.combine(now.date(), time(hh, mm), timezone.utc)
+    if run <= now:
+        run += timedelta(days=1)
+    return (run - now).total_seconds()
+
+
+async def _run_scheduled() -> None:
+    """Execução agendada: só o worker que obtém o lock roda a ingestão."""
+    token = await acquire(SCHEDULE_LOCK, SCHEDULE_LOCK_TIMEOUT_MS)
+    if token is None:
+        return
+    try:
+        async with AsyncSessionLocal() as db:
+            await ingest_daily_closes(db, await get_yahoo())
+    finally:
+        await release(SCHEDULE_LOCK, token)
+
+
+async def _scheduler_loop() -> None:
+    while True:
+        await asyncio.sleep(_seconds_until(DAILY_CLOSES_SCHEDULE_AT))
+        try:
+            await _run_scheduled()
+        except Exception:
+            logger.exception("scheduled daily closes ingestion failed")
+        await asyncio.sleep(60)  # não dispara duas vezes no mesmo minuto
+
+
+async def start_daily_closes_scheduler() -> None:
+    """Sobe o agendador (no startup), se DAILY_CLOSES_SCHEDULE_ENABLED."""
+    global _scheduler_task
+    if DAILY_CLOSES_SCHEDULE_ENABLED and _scheduler_task is None:
+        _scheduler_task = asyncio.create_task(_scheduler_loop())
+
+
+async def stop_daily_closes_scheduler() -> None:
+    """Encerra o agendador (no shutdown)."""
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Ingestão dos fechamentos diários")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="grava o fechamento deste dia (YYYY-MM-DD) pelo endpoint de chart")
+    parser.add_argument("--batch-size", type=int, default=DAILY_CLOSES_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DAILY_CLOSES_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(main(args.date, args.batch_size, args.concurrency))
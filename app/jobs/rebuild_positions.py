@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+"""
+Recalcula a tabela `positions` a partir de `allocations` (backfill/reparo).
+
+Uso:
+    python -m app.jobs.rebuild_positions               # todos os clientes
+    python -m app.jobs.rebuild_positions --client-id 42
+"""
+
+import argparse
+import asyncio
+import os
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.services.positions import rebuild_positions
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+async def main(client_id: Optional[int] = None) -> None:
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL não definido")
+    engine = create_async_engine(DATABASE_URL, echo=False)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with Session() as db:
+        total = await rebuild_positions(db, client_id)
+        await db.commit()
+    await engine.dispose()
+    print(f"positions rebuilt: {total}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--client-id", type=int, default=None, help="recalcula só este cliente")
+    args = parser.parse_args()
+    asyncio.run(main(args.client_id))
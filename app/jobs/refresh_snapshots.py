@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+"""
+Recalcula o rollup `portfolio_snapshots` para um intervalo (backfill/reparo).
+
+Uso:
+    python -m app.jobs.refresh_snapshots --from 2024-01-01              # até hoje, todos os clientes
+    python -m app.jobs.refresh_snapshots --from 2024-01-01 --to 2024-12-31 --client-id 42
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.services.snapshots import refresh_snapshots
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+async def main(start: date, end: Optional[date] = None, client_ids: Optional[List[int]] = None) -> None:
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL não definido")
+    engine = create_async_engine(DATABASE_URL, echo=False)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with Session() as db:
+        total = await refresh_snapshots(db, start, end or date.today(), client_ids)
+        await db.commit()
+    await engine.dispose()
+    print(f"snapshots refreshed: {total}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula portfolio_snapshots")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=None, help="YYYY-MM-DD (padrão: hoje)")
+    parser.add_argument("--client-id", type=int, action="append", default=None, help="repetível; padrão: todos")
+    args = parser.parse_args()
+    asyncio.run(main(args.start, args.end, args.client_id))
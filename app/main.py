@@ -6,12 +6,26 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.api.routers.clients import router as clients_router
+from app.api.routers.clients_bulk import router as clients_bulk_router
 from app.api.routers.auth import router as auth_router
 from app.api.routers.assets import router as assets_router
 from app.api.routers.allocations import router as allocations_router
+from app.api.routers.allocations_bulk import router as allocations_bulk_router
+from app.api.routers.positions import router as positions_router
+from app.api.routers.performance import router as performance_router
+from app.api.routers.metrics import router as metrics_router
+from app.api.routers.analytics import router as analytics_router
+from app.api.routers.exports import router as exports_router
 
 from app.integrations.yahoo import close_yahoo_client, get_yahoo
-from app.cache.redis_cache import get_redis
+from app.jobs.ingest_daily_closes import start_daily_closes_scheduler, stop_daily_closes_scheduler
+from app.services.asset_catalog import warm_catalog
+from app.cache.redis_cache import (
+    close_redis,
+    get_redis,
+    start_cache_invalidation_listener,
+    stop_cache_invalidation_listener,
+)
 
 
 @asynccontextmanager
@@ -19,11 +33,15 @@ async def lifespan(app: FastAPI):
     # Startup: aquece dependências
     await get_yahoo()
     await get_redis()
+    await start_cache_invalidation_listener()
+    await warm_catalog()
+    await start_daily_closes_scheduler()
     yield
     # Shutdown: libera recursos
+    await stop_daily_closes_scheduler()
+    await stop_cache_invalidation_listener()
     await close_yahoo_client()
-    redis_conn = await get_redis()
-    await redis_conn.close()
+    await close_redis()
 
 
 def create_app() -> FastAPI:
@@ -41,8 +59,15 @@ def create_app() -> FastAPI:
     # Rotas
     app.include_router(auth_router)        # /auth
     app.include_router(clients_router)     # /clients
+    app.include_router(clients_bulk_router) # /clients:bulk
     app.include_router(assets_router)      # /assets/available
     app.include_router(allocations_router) # /clients/{id}/allocations 
+    app.include_router(allocations_bulk_router) # /allocations:bulk
+    app.include_router(positions_router)   # /clients/{id}/positions
+    app.include_router(performance_router) # /clients/{id}/performance
+    app.include_router(analytics_router)   # /analytics/aum
+    app.include_router(exports_router)     # /exports/*.csv|.xlsx|.arrow|.parquet
+    app.include_router(metrics_router)     # /metrics
 
     return app
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date
 from decimal import Decimal
-from typing import Optional, Annotated
+from typing import List, Optional, Annotated
 
 from pydantic import BaseModel, Field
 
@@ -39,3 +39,52 @@ class AllocationOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class AllocationValuation(AllocationOut):
+    """Alocação + cálculos on-the-fly (None quando não há cotação)."""
+
+    current_price: Optional[float] = None
+    daily_change_pct: Optional[float] = None
+    cost_basis: float
+    market_value: Optional[float] = None
+    pnl: Optional[float] = None
+    accumulated_return_pct: Optional[float] = None
+
+
+class PortfolioTotals(BaseModel):
+    cost_basis: float
+    market_value: float
+    pnl: float
+    daily_pnl: float
+    daily_change_pct: Optional[float] = None
+    accumulated_return_pct: Optional[float] = None
+    priced_positions: int
+    unpriced_positions: int
+
+
+class PortfolioValuation(BaseModel):
+    client_id: int
+    positions: List[AllocationValuation]
+    totals: PortfolioTotals
+
+
+class AllocationBulkRow(AllocationBase):
+    """Linha do import em lote (CSV/NDJSON): alocação + cliente dono."""
+
+    ticker: str = Field(max_length=32, example="VALE3.SA")  # assets.ticker String(32): falha só a linha
+    client_id: int = Field(ge=1)
+
+
+class BulkRowError(BaseModel):
+    line: int  # linha do corpo (1 = primeira; no CSV, o cabeçalho)
+    error: str
+
+
+class AllocationBulkResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    batches: int
+    errors: List[BulkRowError]
+    errors_truncated: bool = False
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.db.models import ClientStatus
+
+
+class AumByAsset(BaseModel):
+    ticker: str
+    quantity: float
+    cost_basis: float
+    market_value: Optional[float] = None  # None quando não há cotação
+    clients: int
+
+
+class AumByClient(BaseModel):
+    client_id: int
+    name: str
+    status: ClientStatus
+    cost_basis: float
+    market_value: float
+    assets: int
+
+
+class AumByStatus(BaseModel):
+    status: ClientStatus
+    cost_basis: float
+    market_value: float
+    clients: int
+
+
+class AumReport(BaseModel):
+    generated_at: datetime
+    total_cost_basis: float
+    total_market_value: float
+    unpriced_tickers: List[str]
+    by_asset: List[AumByAsset]
+    by_client: List[AumByClient]
+    by_status: List[AumByStatus]
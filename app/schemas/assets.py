@@ -10,3 +10,14 @@ class AssetSearchItem(BaseModel):
     exch: str | None = None
     exchDisp: str | None = None
     typeDisp: str | None = None
+
+
+class QuoteItem(BaseModel):
+    symbol: str
+    shortName: str | None = None
+    currency: str | None = None
+    regularMarketPrice: float | None = None
+    regularMarketPreviousClose: float | None = None
+    regularMarketChange: float | None = None
+    regularMarketChangePercent: float | None = None
+    regularMarketTime: int | None = None
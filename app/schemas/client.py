@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 
 from app.db.models import ClientStatus
 
@@ -31,3 +31,35 @@ class ClientRead(ClientBase):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# Upsert em lote por email (POST /clients:bulk) — resultado por item, na ordem do corpo
+ClientBulkOutcome = Literal["created", "updated", "unchanged", "duplicate", "conflict", "invalid", "failed"]
+
+
+# Item de POST /clients:bulk — limites das colunas (name String(120), email
+# String(255)) checados por item, para sair como `invalid` e não derrubar o chunk
+class ClientBulkItem(ClientCreate):
+    name: str = Field(..., max_length=120)
+    email: EmailStr = Field(..., max_length=255)
+
+
+class ClientBulkItemResult(BaseModel):
+    index: int  # posição no array enviado (0-based)
+    email: Optional[str] = None
+    outcome: ClientBulkOutcome
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ClientBulkResult(BaseModel):
+    received: int
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicate: int = 0
+    conflict: int = 0
+    invalid: int = 0
+    failed: int = 0
+    chunks: int = 0
+    items: List[ClientBulkItemResult]
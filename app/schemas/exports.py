@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.db.models import ClientStatus
+
+ExportDataset = Literal["clients", "allocations", "daily_returns"]
+ExportFormat = Literal["csv", "xlsx", "arrow", "parquet"]
+ExportJobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class ExportFilters(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    client_id: Optional[int] = Field(None, ge=1)  # daily_returns: ativos que o cliente possui
+    ticker: Optional[str] = Field(None, min_length=1)  # allocations / daily_returns
+    start: Optional[date] = Field(None, alias="from")  # created_at | buy_date | date
+    end: Optional[date] = Field(None, alias="to")  # inclusive
+    status: Optional[ClientStatus] = None  # clients
+
+    @model_validator(mode="after")
+    def _check_range(self) -> "ExportFilters":
+        if self.start and self.end and self.start > self.end:
+            raise ValueError("'from' must be <= 'to'")
+        return self
+
+
+class ExportJobCreate(ExportFilters):
+    dataset: ExportDataset
+    format: ExportFormat = "csv"
+
+
+class ExportJobOut(BaseModel):
+    id: str
+    dataset: ExportDataset
+    format: ExportFormat
+    status: ExportJobStatus
+    rows_total: Optional[int] = None  # conhecido quando o worker começa
+    rows_done: int = 0
+    progress_pct: float = 0.0
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None  # só quando status == "done"
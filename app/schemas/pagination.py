@@ -1,14 +1,16 @@
 from __future__ import annotations
-from typing import Generic, List, TypeVar
+from typing import Generic, List, Optional, TypeVar
 from pydantic import BaseModel, Field, ConfigDict
 
 T = TypeVar("T")
 
 class PageMeta(BaseModel):
-    total: int = Field(ge=0)
-    page: int = Field(ge=1)
+    total: Optional[int] = Field(None, ge=0)  # None com count=none
+    total_estimated: bool = False  # True com count=estimate
+    page: Optional[int] = Field(None, ge=1)  # só na paginação por offset
     page_size: int = Field(ge=1)
-    pages: int = Field(ge=0)
+    pages: Optional[int] = Field(None, ge=0)
+    next_cursor: Optional[str] = None  # `after` da próxima página (None na última)
 
 class Page(BaseModel, Generic[T]):
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+Interval = Literal["daily", "weekly", "monthly"]
+Source = Literal["auto", "live", "snapshots"]
+
+
+class PerformancePoint(BaseModel):
+    date: date
+    value: float  # valor de mercado (ativos sem preço entram pelo custo)
+    cost: float  # custo dos lotes já comprados
+    pnl: float
+    return_pct: Optional[float] = None  # value / cost - 1
+    twr_pct: float  # rentabilidade acumulada ponderada pelo tempo (desconta aportes)
+
+
+class PerformanceSeries(BaseModel):
+    client_id: int
+    start: date
+    end: date
+    interval: Interval
+    source: Literal["live", "snapshots"]
+    points: List[PerformancePoint]
+    unpriced_tickers: List[str]  # sem fechamento em daily_returns no período (só em "live")
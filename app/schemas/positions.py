@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class PositionOut(BaseModel):
+    ticker: str
+    quantity: Decimal
+    cost_basis: Decimal
+    avg_price: Decimal  # custo médio ponderado = cost_basis / quantity
+    lot_count: int
+    updated_at: Optional[datetime] = None
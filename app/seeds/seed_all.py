@@ -1,11 +1,14 @@
 from __future__ import annotations
 import os, asyncio
 from datetime import date
+from decimal import Decimal
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from app.db import models as m
+from app.services.assets import resolve_asset_id
+from app.services.positions import apply_lot_delta
 
 # hash de senha (usa passlib)
 from passlib.context import CryptContext
@@ -18,17 +21,6 @@ ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "changeme")
 SEED_DEMO = os.getenv("SEED_DEMO", "1") not in ("0", "false", "False", "")
 
-async def _get_or_create_asset(db: AsyncSession, ticker: str) -> m.Asset:
-    t = ticker.strip().upper()
-    r = await db.execute(select(m.Asset).where(m.Asset.ticker == t))
-    asset = r.scalar_one_or_none()
-    if asset:
-        return asset
-    asset = m.Asset(ticker=t)
-    db.add(asset)
-    await db.flush()
-    return asset
-
 async def _ensure_admin(db: AsyncSession) -> None:
     r = await db.execute(select(m.User).where(m.User.email == ADMIN_EMAIL))
     user = r.scalar_one_or_none()
@@ -73,14 +65,17 @@ async def _seed_demo_data(db: AsyncSession) -> None:
         )
         if r.scalar_one_or_none():
             continue
-        asset = await _get_or_create_asset(db, ticker)
+        asset_id = await resolve_asset_id(db, ticker)
         db.add(m.Allocation(
             client_id=client_id,
-            asset_id=asset.id,
+            asset_id=asset_id,
             quantity=qty,
             buy_price=price,
             buy_date=buy_date,
         ))
+        await apply_lot_delta(
+            db, client_id, asset_id, Decimal(qty), Decimal(qty) * Decimal(price), 1
+        )
 
 async def main() -> None:
     if not DATABASE_URL:
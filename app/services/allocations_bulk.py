@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+"""
+Import em lote de alocações (CSV ou NDJSON) lido em streaming.
+
+O corpo é consumido linha a linha e processado em lotes de
+ALLOC_BULK_BATCH_SIZE linhas. Cada lote faz: um upsert de tickers
+(`resolve_asset_ids`), uma checagem de clientes, um INSERT executemany dos
+lotes, um upsert de deltas em `positions` e um commit. Erros de validação são reportados por
+linha; um lote que falha no banco é desfeito sem abortar os demais.
+"""
+
+import codecs
+import csv
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models as m
+from app.schemas.allocations import AllocationBulkResult, AllocationBulkRow, BulkRowError
+from app.services.assets import resolve_asset_ids
+from app.services.positions import PositionDeltas, apply_lot_deltas
+
+logger = logging.getLogger(__name__)
+
+ALLOC_BULK_BATCH_SIZE = int(os.getenv("ALLOC_BULK_BATCH_SIZE", "5000"))
+ALLOC_BULK_MAX_ERRORS = int(os.getenv("ALLOC_BULK_MAX_ERRORS", "1000"))
+
+# Ids por SELECT na checagem de clientes (1 parâmetro cada; limite: 32767 por statement)
+CLIENT_CHECK_CHUNK_ROWS = 5000
+
+CSV_COLUMNS = ("client_id", "ticker", "quantity", "buy_price", "buy_date")
+
+# content-type -> formato
+FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/x-jsonlines": "ndjson",
+}
+
+
+class BulkFormatError(ValueError):
+    """Corpo inválido como um todo (ex.: cabeçalho CSV sem colunas obrigatórias)."""
+
+
+@dataclass
+class _Job:
+    result: AllocationBulkResult = field(
+        default_factory=lambda: AllocationBulkResult(
+            received=0, inserted=0, failed=0, batches=0, errors=[]
+        )
+    )
+    touched: Dict[int, date] = field(default_factory=dict)  # cliente -> menor buy_date gravado
+
+    def fail(self, line: int, error: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < ALLOC_BULK_MAX_ERRORS:
+            self.result.errors.append(BulkRowError(line=line, error=error))
+        else:
+            self.result.errors_truncated = True
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Converte o stream de bytes em linhas de texto (UTF-8, BOM opcional).
+    Bytes inválidos viram U+FFFD e a linha é rejeitada em `_iter_records`.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buf = ""
+    async for chunk in chunks:
+        buf += decoder.decode(chunk)
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buf += decoder.decode(b"", final=True)
+    if buf:
+        yield buf.rstrip("\r")
+
+
+async def _iter_records(
+    lines: AsyncIterator[str], fmt: str
+) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(nº da linha, registro, erro) para cada linha não vazia."""
+    header: Optional[List[str]] = None
+    lineno = 0
+    async for line in lines:
+        lineno += 1
+        if not line.strip():
+            continue
+        if "\ufffd" in line:
+            yield lineno, None, "invalid UTF-8"
+            continue
+
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield lineno, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield lineno, None, "expected a JSON object"
+                continue
+            yield lineno, record, None
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [h.strip().lower() for h in values]
+            missing = [c for c in CSV_COLUMNS if c not in header]
+            if missing:
+                raise BulkFormatError(f"CSV header missing columns: {', '.join(missing)}")
+            continue
+        if len(values) != len(header):
+            yield lineno, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield lineno, dict(zip(header, values)), None
+
+
+async def _existing_clients(db: AsyncSession, client_ids: Set[int]) -> Set[int]:
+    """Ids existentes, em blocos de CLIENT_CHECK_CHUNK_ROWS (limite de parâmetros do Postgres)."""
+    ids = sorted(client_ids)
+    existing: Set[int] = set()
+    for start in range(0, len(ids), CLIENT_CHECK_CHUNK_ROWS):
+        chunk = ids[start : start + CLIENT_CHECK_CHUNK_ROWS]
+        res = await db.execute(select(m.Client.id).where(m.Client.id.in_(chunk)))
+        existing.update(res.scalars().all())
+    return existing
+
+
+async def _flush_batch(db: AsyncSession, job: _Job, batch: List[Tuple[int, AllocationBulkRow]]) -> None:
+    """Grava um lote numa transação; em erro de banco, desfaz e marca as linhas."""
+    if not batch:
+        return
+    job.result.batches += 1
+    pending = batch
+    try:
+        clients = await _existing_clients(db, {row.client_id for _, row in batch})
+        pending = [(lineno, row) for lineno, row in batch if row.client_id in clients]
+        for lineno, row in batch:
+            if row.client_id not in clients:
+                job.fail(lineno, f"client {row.client_id} not found")
+        if not pending:
+            return
+        valid = [row for _, row in pending]
+
+        asset_ids = await resolve_asset_ids(db, (row.ticker for row in valid))
+
+        deltas: PositionDeltas = {}
+        params = []
+        for row in valid:
+            asset_id = asset_ids[row.ticker]
+            params.append(
+                {
+                    "client_id": row.client_id,
+                    "asset_id": asset_id,
+                    "quantity": row.quantity,
+                    "buy_price": row.buy_price,
+                    "buy_date": row.buy_date,
+                }
+            )
+            dq, dc, dl = deltas.get((row.client_id, asset_id), (Decimal(0), Decimal(0), 0))
+            deltas[(row.client_id, asset_id)] = (
+                dq + row.quantity,
+                dc + row.quantity * row.buy_price,
+                dl + 1,
+            )
+
+        await db.execute(insert(m.Allocation), params)  # executemany
+        await apply_lot_deltas(db, deltas)
+        await db.commit()
+        job.result.inserted += len(valid)
+        for row in valid:
+            if row.buy_date < job.touched.get(row.client_id, date.max):
+                job.touched[row.client_id] = row.buy_date
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.warning("bulk allocation batch %d failed", job.result.batches, exc_info=True)
+        reason = f"batch {job.result.batches} rolled back: {e.__class__.__name__}"
+        for lineno, _ in pending:
+            job.fail(lineno, reason)
+
+
+async def import_allocations(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    batch_size: int = ALLOC_BULK_BATCH_SIZE,
+    touched: Optional[Dict[int, date]] = None,
+) -> AllocationBulkResult:
+    """
+    Importa alocações do stream `chunks` (formato 'csv' ou 'ndjson').
+    Se `touched` for informado, recebe {client_id: menor buy_date gravado}.
+    """
+    job = _Job()
+    if touched is not None:
+        job.touched = touched
+    batch: List[Tuple[int, AllocationBulkRow]] = []
+
+    async for lineno, record, error in _iter_records(iter_lines(chunks), fmt):
+        job.result.received += 1
+        if error is not None:
+            job.fail(lineno, error)
+            continue
+        try:
+            row = AllocationBulkRow.model_validate(record)
+        except ValidationError as e:
+            job.fail(lineno, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        row.ticker = row.ticker.strip().upper()
+        if not row.ticker:
+            job.fail(lineno, "ticker: must not be empty")
+            continue
+        batch.append((lineno, row))
+        if len(batch) >= batch_size:
+            await _flush_batch(db, job, batch)
+            batch = []
+
+    await _flush_batch(db, job, batch)
+    return job.result
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+"""
+AUM (assets under management) da casa, agrupado por ativo, cliente e status.
+
+Um único GROUP BY (cliente, ativo) sobre `allocations` + `assets` + `clients`
+e uma única consulta de cotações para todos os tickers distintos; os
+agrupamentos finais são feitos com NumPy (bincount). O relatório fica em
+cache e é invalidado a cada escrita de alocação/cliente.
+"""
+
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.redis_cache import cache_delete
+from app.db import models as m
+from app.integrations.yahoo import YahooError
+from app.schemas.analytics import AumByAsset, AumByClient, AumByStatus, AumReport
+from app.services.quotes import QuoteSource, get_quotes
+
+logger = logging.getLogger(__name__)
+
+AUM_CACHE_KEY = "analytics:aum"
+AUM_CACHE_TTL = int(os.getenv("ANALYTICS_AUM_TTL_SECONDS", "300"))
+
+MONEY_DECIMALS = 2
+
+
+def _money(x: float) -> float:
+    return round(float(x), MONEY_DECIMALS)
+
+
+async def invalidate_aum() -> None:
+    """Descarta o relatório em cache (chamar após escritas em alocações/clientes)."""
+    await cache_delete(AUM_CACHE_KEY)
+
+
+async def compute_aum(db: AsyncSession, source: QuoteSource) -> AumReport:
+    res = await db.execute(
+        select(
+            m.Allocation.client_id,
+            m.Client.name,
+            m.Client.status,
+            m.Asset.ticker,
+            func.sum(m.Allocation.quantity).label("quantity"),
+            func.sum(m.Allocation.quantity * m.Allocation.buy_price).label("cost"),
+        )
+        .join(m.Asset, m.Asset.id == m.Allocation.asset_id)
+        .join(m.Client, m.Client.id == m.Allocation.client_id)
+        .group_by(m.Allocation.client_id, m.Client.name, m.Client.status, m.Asset.ticker)
+    )
+    rows: List[Any] = list(res.all())
+    n = len(rows)
+
+    tickers = sorted({r.ticker for r in rows})
+    quotes: Dict[str, Dict[str, Any]] = {}
+    if tickers:
+        try:
+            quotes = (await get_quotes(tickers, source)).quotes
+        except YahooError:
+            logger.warning("quotes unavailable for AUM report", exc_info=True)
+
+    prices = np.array(
+        [(quotes.get(t) or {}).get("regularMarketPrice") or np.nan for t in tickers], dtype=np.float64
+    )
+
+    # Índices (códigos) por linha do GROUP BY
+    asset_pos = {t: i for i, t in enumerate(tickers)}
+    asset_idx = np.fromiter((asset_pos[r.ticker] for r in rows), dtype=np.int64, count=n)
+    client_ids = sorted({r.client_id for r in rows})
+    client_pos = {cid: i for i, cid in enumerate(client_ids)}
+    client_idx = np.fromiter((client_pos[r.client_id] for r in rows), dtype=np.int64, count=n)
+    statuses = list(m.ClientStatus)
+    status_pos = {s: i for i, s in enumerate(statuses)}
+    status_idx = np.fromiter((status_pos[r.status] for r in rows), dtype=np.int64, count=n)
+
+    qty = np.fromiter((r.quantity for r in rows), dtype=np.float64, count=n)
+    cost = np.fromiter((r.cost for r in rows), dtype=np.float64, count=n)
+    market = np.nan_to_num(qty * prices[asset_idx], nan=0.0)
+
+    n_assets, n_clients, n_status = len(tickers), len(client_ids), len(statuses)
+    asset_qty = np.bincount(asset_idx, weights=qty, minlength=n_assets)
+    asset_cost = np.bincount(asset_idx, weights=cost, minlength=n_assets)
+    asset_clients = np.bincount(asset_idx, minlength=n_assets)
+    client_cost = np.bincount(client_idx, weights=cost, minlength=n_clients)
+    client_market = np.bincount(client_idx, weights=market, minlength=n_clients)
+    client_assets = np.bincount(client_idx, minlength=n_clients)
+    status_cost = np.bincount(status_idx, weights=cost, minlength=n_status)
+    status_market = np.bincount(status_idx, weights=market, minlength=n_status)
+
+    client_info: Dict[int, Any] = {r.client_id: r for r in rows}
+    status_clients = np.bincount(
+        np.array([status_pos[client_info[cid].status] for cid in client_ids], dtype=np.int64),
+        minlength=n_status,
+    )
+
+    by_asset = [
+        AumByAsset(
+            ticker=t,
+            quantity=float(asset_qty[i]),
+            cost_basis=_money(asset_cost[i]),
+            market_value=None if np.isnan(prices[i]) else _money(asset_qty[i] * prices[i]),
+            clients=int(asset_clients[i]),
+        )
+        for i, t in enumerate(tickers)
+    ]
+    by_client = [
+        AumByClient(
+            client_id=cid,
+            name=client_info[cid].name,
+            status=client_info[cid].status,
+            cost_basis=_money(client_cost[i]),
+            market_value=_money(client_market[i]),
+            assets=int(client_assets[i]),
+        )
+        for i, cid in enumerate(client_ids)
+    ]
+    by_status = [
+        AumByStatus(
+            status=s,
+            cost_basis=_money(status_cost[i]),
+            market_value=_money(status_market[i]),
+            clients=int(status_clients[i]),
+        )
+        for i, s in enumerate(statuses)
+    ]
+
+    by_asset.sort(key=lambda a: a.market_value or 0.0, reverse=True)
+    by_client.sort(key=lambda c: c.market_value, reverse=True)
+
+    return AumReport(
+        generated_at=datetime.now(timezone.utc),
+        total_cost_basis=_money(cost.sum()),
+        total_market_value=_money(market.sum()),
+        unpriced_tickers=[t for i, t in enumerate(tickers) if np.isnan(prices[i])],
+        by_asset=by_asset,
+        by_client=by_client,
+        by_status=by_status,
+    )
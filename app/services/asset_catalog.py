@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+"""
+Catálogo local de ativos com índice de prefixo em memória.
+
+Todo item sanitizado vindo de `YahooClient.search` é persistido em
+`asset_catalog` e indexado por símbolo e nome. Consultas de autocomplete são
+respondidas localmente; o Yahoo só é consultado quando o catálogo devolve
+menos de `limit` itens.
+"""
+
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models as m
+from app.db.base import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# (chave do índice -> coluna) entre o item sanitizado e a tabela
+_FIELDS = (
+    ("symbol", "symbol"),
+    ("shortname", "shortname"),
+    ("longname", "longname"),
+    ("exch", "exch"),
+    ("exchDisp", "exch_disp"),
+    ("typeDisp", "type_disp"),
+)
+
+# Ordem de relevância: símbolo exato < prefixo de símbolo < prefixo de nome
+_RANK_EXACT, _RANK_SYMBOL, _RANK_NAME = 0, 1, 2
+
+
+def _terms(item: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """Termos indexados: símbolo, nomes completos e cada palavra dos nomes."""
+    terms = [(item["symbol"].lower(), _RANK_SYMBOL)]
+    for name in (item.get("shortname"), item.get("longname")):
+        if not name:
+            continue
+        name = name.lower()
+        terms.append((name, _RANK_NAME))
+        terms.extend((word, _RANK_NAME) for word in name.split() if word != name)
+    return terms
+
+
+class AssetCatalog:
+    """Índice de prefixo (array ordenado + bisect) sobre símbolos e nomes."""
+
+    def __init__(self) -> None:
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._index: List[Tuple[str, int, str]] = []  # (termo, rank, símbolo)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._items
+
+    def add(self, item: Dict[str, Any]) -> None:
+        symbol = (item.get("symbol") or "").strip().upper()
+        if not symbol:
+            return
+        item = {key: item.get(key) for key, _ in _FIELDS} | {"symbol": symbol}
+        old = self._items.get(symbol)
+        if old == item:
+            return
+        if old is not None:
+            self._remove_terms(old)
+        self._items[symbol] = item
+        for term, rank in set(_terms(item)):
+            insort(self._index, (term, rank, symbol))
+
+    def add_many(self, items: Iterable[Dict[str, Any]]) -> None:
+        for item in items:
+            self.add(item)
+
+    def _remove_terms(self, item: Dict[str, Any]) -> None:
+        for term, rank in set(_terms(item)):
+            entry = (term, rank, item["symbol"])
+            i = bisect_left(self._index, entry)
+            if i < len(self._index) and self._index[i] == entry:
+                del self._index[i]
+
+    def search(self, q: str, limit: int) -> List[Dict[str, Any]]:
+        """Itens cujo símbolo ou nome (ou palavra do nome) começa com `q`."""
+        prefix = q.strip().lower()
+        if not prefix:
+            return []
+
+        best: Dict[str, int] = {}
+        i = bisect_left(self._index, (prefix,))
+        while i < len(self._index):
+            term, rank, symbol = self._index[i]
+            if not term.startswith(prefix):
+                break
+            if rank == _RANK_SYMBOL and term == prefix:
+                rank = _RANK_EXACT
+            if rank < best.get(symbol, rank + 1):
+                best[symbol] = rank
+            i += 1
+
+        ranked = sorted(best.items(), key=lambda kv: (kv[1], len(kv[0]), kv[0]))
+        return [self._items[symbol] for symbol, _ in ranked[:limit]]
+
+
+catalog = AssetCatalog()
+_persist_tasks: Set[asyncio.Task] = set()
+
+
+async def load_catalog(db: AsyncSession) -> int:
+    """Carrega `asset_catalog` e os tickers de `assets` no índice em memória."""
+    res = await db.execute(select(m.AssetCatalogItem))
+    for row in res.scalars():
+        catalog.add({key: getattr(row, col) for key, col in _FIELDS})
+
+    res = await db.execute(select(m.Asset.ticker, m.Asset.name))
+    for ticker, name in res.all():
+        if ticker not in catalog:
+            catalog.add({"symbol": ticker, "shortname": name})
+    return len(catalog)
+
+
+async def warm_catalog() -> None:
+    """Carrega o catálogo no startup; falha de banco não impede a subida do app."""
+    try:
+        async with AsyncSessionLocal() as db:
+            total = await load_catalog(db)
+        logger.info("asset catalog loaded: %d symbols", total)
+    except Exception:
+        logger.warning("asset catalog warm-up failed", exc_info=True)
+
+
+async def upsert_catalog_items(db: AsyncSession, items: List[Dict[str, Any]]) -> None:
+    """INSERT ... ON CONFLICT (symbol) DO UPDATE de vários itens num só statement."""
+    rows = {}
+    for item in items:
+        symbol = (item.get("symbol") or "").strip().upper()
+        if symbol:
+            rows[symbol] = {col: item.get(key) for key, col in _FIELDS} | {"symbol": symbol}
+    if not rows:
+        return
+    stmt = pg_insert(m.AssetCatalogItem).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[m.AssetCatalogItem.symbol],
+        set_={col: stmt.excluded[col] for _, col in _FIELDS[1:]} | {"updated_at": func.now()},
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def _persist(items: List[Dict[str, Any]]) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await upsert_catalog_items(db, items)
+    except Exception:
+        logger.warning("asset catalog persist failed", exc_info=True)
+
+
+def ingest_search_results(items: List[Dict[str, Any]]) -> None:
+    """Indexa itens vindos do Yahoo e agenda a persistência em background."""
+    catalog.add_many(items)
+    if not items:
+        return
+    task = asyncio.create_task(_persist(list(items)))
+    _persist_tasks.add(task)
+    task.add_done_callback(_persist_tasks.discard)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+"""
+Busca de ativos (Yahoo /v1/finance/search) com cache stale-while-revalidate.
+
+- Antes do soft TTL: HIT.
+- Entre soft e hard TTL: STALE — devolve o valor antigo na hora e agenda
+  uma atualização em background (uma por chave neste worker).
+- Após o hard TTL (chave expirada no Redis): MISS — consulta o Yahoo.
+
+Antes de tudo consulta o catálogo local (índice de prefixo em memória): se ele
+tiver ao menos `limit` itens, responde sem rede (X-Cache: LOCAL).
+
+Misses e atualizações são protegidos por lock distribuído (redis_lock): só um
+worker/pod consulta o Yahoo por chave; os demais aguardam o valor gravado.
+Buscas sem resultado também são gravadas (lista vazia, TTL curto de
+ASSETS_SEARCH_NEGATIVE_TTL_SECONDS) para não repetir a consulta a cada pedido.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.cache.redis_cache import DEFAULT_TTL, cache_get_swr, cache_set_swr
+from app.cache.redis_lock import acquire, fence, load_with_lock, release
+from app.core import metrics
+from app.integrations.yahoo import YahooClient
+from app.services.asset_catalog import catalog, ingest_search_results
+
+logger = logging.getLogger(__name__)
+
+ASSETS_SEARCH_SOFT_TTL = int(os.getenv("ASSETS_SEARCH_SOFT_TTL_SECONDS", str(DEFAULT_TTL)))
+ASSETS_SEARCH_HARD_TTL = int(os.getenv("ASSETS_SEARCH_HARD_TTL_SECONDS", str(DEFAULT_TTL * 24)))
+ASSETS_SEARCH_NEGATIVE_TTL = int(os.getenv("ASSETS_SEARCH_NEGATIVE_TTL_SECONDS", "60"))
+
+_refreshing: Set[str] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+@dataclass
+class SearchResult:
+    items: List[Dict[str, Any]]
+    cache: str  # LOCAL | HIT | STALE | MISS
+    ttl: int | None
+    key: str
+
+
+def search_key(q: str) -> str:
+    return f"assets:search:{q.strip().lower()}"
+
+
+async def _fetch_and_store(
+    key: str, q: str, limit: int, yahoo: YahooClient, lock: Optional[Tuple[str, int]] = None
+) -> List[Dict[str, Any]]:
+    results = await yahoo.search(query=q, quotes_count=limit)
+    ingest_search_results(results)
+    if results:
+        await cache_set_swr(key, results, ASSETS_SEARCH_SOFT_TTL, ASSETS_SEARCH_HARD_TTL, fence=lock)
+    else:
+        await cache_set_swr(key, results, ASSETS_SEARCH_NEGATIVE_TTL, ASSETS_SEARCH_NEGATIVE_TTL, fence=lock)
+    return results
+
+
+async def _read_cached(key: str) -> List[Dict[str, Any]] | None:
+    value, _, _ = await cache_get_swr(key)
+    return value
+
+
+async def _refresh(key: str, q: str, limit: int, yahoo: YahooClient) -> None:
+    try:
+        token = await acquire(key)
+        if token is None:
+            return  # outro worker já está atualizando
+        try:
+            await _fetch_and_store(key, q, limit, yahoo, fence(key, token))
+        finally:
+            await release(key, token)
+        metrics.incr("assets.search.refresh.ok")
+    except Exception:
+        # Mantém o valor stale; a próxima leitura tenta de novo
+        metrics.incr("assets.search.refresh.failed")
+        logger.warning("background refresh failed for %s", key, exc_info=True)
+    finally:
+        _refreshing.discard(key)
+
+
+def _schedule_refresh(key: str, q: str, limit: int, yahoo: YahooClient) -> None:
+    """Agenda atualização em background, no máximo uma por chave (neste worker e no lock)."""
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    task = asyncio.create_task(_refresh(key, q, limit, yahoo))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def search_assets(q: str, limit: int, yahoo: YahooClient) -> SearchResult:
+    """Resultados da busca `q` (até `limit`), servindo stale enquanto revalida."""
+    key = search_key(q)
+
+    local = catalog.search(q, limit)
+    if len(local) >= limit:
+        metrics.incr("assets.search.local")
+        return SearchResult(local, "LOCAL", None, key)
+
+    cached, state, ttl = await cache_get_swr(key)
+    if cached is not None:  # lista vazia = busca sem resultado (cache negativo)
+        catalog.add_many(cached)  # aquece o índice deste worker (sem gravar no banco)
+        if state == "STALE":
+            _schedule_refresh(key, q, limit, yahoo)
+            return SearchResult(cached[:limit], "STALE", ttl, key)
+        return SearchResult(cached[:limit], "HIT", ttl, key)
+
+    results = await load_with_lock(
+        key,
+        read=lambda: _read_cached(key),
+        load=lambda lock: _fetch_and_store(key, q, limit, yahoo, lock),
+    )
+    return SearchResult(results[:limit], "MISS", ASSETS_SEARCH_SOFT_TTL, key)
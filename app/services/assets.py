@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+"""
+Resolução ticker -> asset_id sem corrida e sem SELECT prévio.
+
+`INSERT ... ON CONFLICT (ticker) DO NOTHING RETURNING id` cria os ativos
+novos; os que já existiam (não retornados) vêm de um SELECT em seguida.
+Requisições concorrentes para um ticker novo não esbarram na unique
+constraint, e tickers existentes não geram escrita nem lock de linha.
+
+Ids de ativos não mudam, então ficam num cache em memória do processo. Só
+entram no cache as linhas lidas pelo SELECT (já commitadas): um ativo
+recém-inserido pode sumir num rollback da transação chamadora.
+"""
+
+from typing import Dict, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models as m
+
+# Tickers por statement (1 parâmetro cada; limite do Postgres: 32767 por statement)
+RESOLVE_CHUNK_ROWS = 5000
+
+# ticker (UPPER) -> id
+_asset_ids: Dict[str, int] = {}
+
+
+def normalize_ticker(ticker: str) -> str:
+    return ticker.strip().upper()
+
+
+async def resolve_asset_ids(db: AsyncSession, tickers: Iterable[str]) -> Dict[str, int]:
+    """
+    Resolve vários tickers com um INSERT e um SELECT por bloco de
+    RESOLVE_CHUNK_ROWS (não faz commit). Retorna {TICKER: id} com os tickers normalizados em UPPER.
+    """
+    wanted = {normalize_ticker(t) for t in tickers}
+    wanted.discard("")
+    found = {t: _asset_ids[t] for t in wanted if t in _asset_ids}
+    missing = sorted(wanted - found.keys())  # ordem estável evita deadlock entre lotes
+    if not missing:
+        return found
+
+    for start in range(0, len(missing), RESOLVE_CHUNK_ROWS):
+        chunk = missing[start : start + RESOLVE_CHUNK_ROWS]
+        stmt = (
+            pg_insert(m.Asset)
+            .values([{"ticker": t} for t in chunk])
+            .on_conflict_do_nothing(index_elements=[m.Asset.ticker])
+            .returning(m.Asset.id, m.Asset.ticker)
+        )
+        res = await db.execute(stmt)
+        found.update({ticker: asset_id for asset_id, ticker in res.all()})
+
+        existing = [t for t in chunk if t not in found]
+        if existing:
+            res = await db.execute(select(m.Asset.id, m.Asset.ticker).where(m.Asset.ticker.in_(existing)))
+            for asset_id, ticker in res.all():
+                found[ticker] = asset_id
+                _asset_ids[ticker] = asset_id
+    return found
+
+
+async def resolve_asset_id(db: AsyncSession, ticker: str) -> int:
+    """Id do ativo `ticker`, criando-o se necessário (não faz commit)."""
+    ticker = normalize_ticker(ticker)
+    if not ticker:
+        raise ValueError("ticker must not be empty")
+    return (await resolve_asset_ids(db, [ticker]))[ticker]
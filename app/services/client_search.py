@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+"""
+Filtro `q` de GET /clients, servido por índices (ver migração e58f1a3c6d27).
+
+- contains: `name/email ILIKE '%q%'` — o GIN pg_trgm atende a partir de 3
+  caracteres (curingas do usuário são escapados).
+- fuzzy: similaridade por palavra (`name %> q`, pg_trgm.word_similarity_threshold,
+  padrão 0.6) em nome/email, tolera erros de digitação; ordena por relevância.
+- email_prefix: `lower(email) LIKE 'q%'` pelo índice text_pattern_ops —
+  caminho barato para localizar um email conhecido.
+"""
+
+from typing import Literal, Optional, Tuple
+
+from sqlalchemy import ColumnElement, func, or_
+
+from app.db.models import Client
+
+SearchMode = Literal["contains", "fuzzy", "email_prefix"]
+
+
+def like_escape(value: str) -> str:
+    """Escapa curingas do LIKE (`\\` é o escape padrão do Postgres)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_condition(q: str, match: SearchMode) -> Tuple[ColumnElement[bool], Optional[ColumnElement]]:
+    """(condição WHERE, expressão de relevância ou None) para o termo `q`."""
+    if match == "email_prefix":
+        return func.lower(Client.email).like(like_escape(q.strip().lower()) + "%"), None
+    if match == "fuzzy":
+        relevance = func.greatest(func.word_similarity(q, Client.name), func.word_similarity(q, Client.email))
+        return or_(Client.name.op("%>")(q), Client.email.op("%>")(q)), relevance
+    like = f"%{like_escape(q)}%"
+    return or_(Client.name.ilike(like), Client.email.ilike(like)), None
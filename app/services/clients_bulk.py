@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+"""
+Upsert em lote de clientes, chaveado por email (sincronização com o CRM).
+
+Cada item é validado como `ClientBulkItem` (inclui os tamanhos das colunas); um email repetido no corpo vale
+pela última ocorrência (as anteriores saem como `duplicate`, e o
+ON CONFLICT não pode tocar a mesma linha duas vezes no mesmo statement).
+Os itens válidos são gravados em chunks de CLIENT_BULK_CHUNK_ROWS com um
+único `INSERT ... ON CONFLICT (email) ... RETURNING id, email, (xmax = 0)`
+e um commit por chunk:
+
+- on_existing=update: DO UPDATE de name/status só quando mudaram
+  (`created` / `updated`; linhas iguais não são reescritas → `unchanged`);
+- on_existing=skip: DO NOTHING — equivale ao 409 do POST /clients
+  (`conflict`, com o id do cliente existente).
+
+Um chunk que falha no banco é desfeito (`failed`) sem abortar os demais.
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models as m
+from app.schemas.client import ClientBulkItem, ClientBulkItemResult, ClientBulkResult
+
+logger = logging.getLogger(__name__)
+
+CLIENT_BULK_MAX_ITEMS = int(os.getenv("CLIENT_BULK_MAX_ITEMS", "10000"))
+CLIENT_BULK_CHUNK_ROWS = int(os.getenv("CLIENT_BULK_CHUNK_ROWS", "1000"))
+
+OnExisting = Literal["update", "skip"]
+
+
+def _validation_message(exc: ValidationError) -> str:
+    err = exc.errors()[0]
+    loc = ".".join(str(p) for p in err.get("loc", ()))
+    return f"{loc}: {err['msg']}" if loc else err["msg"]
+
+
+def _upsert_stmt(rows: List[Dict[str, Any]], on_existing: OnExisting):
+    stmt = pg_insert(m.Client).values(rows)
+    if on_existing == "update":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[m.Client.email],
+            set_={"name": stmt.excluded.name, "status": stmt.excluded.status},
+            where=tuple_(m.Client.name, m.Client.status).is_distinct_from(
+                tuple_(stmt.excluded.name, stmt.excluded.status)
+            ),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[m.Client.email])
+    return stmt.returning(m.Client.id, m.Client.email, literal_column("(xmax = 0)").label("inserted"))
+
+
+async def upsert_clients(
+    db: AsyncSession,
+    items: List[Any],
+    on_existing: OnExisting = "update",
+    chunk_rows: int = CLIENT_BULK_CHUNK_ROWS,
+) -> ClientBulkResult:
+    """Valida, deduplica e grava `items`; devolve o resultado de cada item (mesma ordem)."""
+    outcomes: List[Optional[ClientBulkItemResult]] = [None] * len(items)
+    latest: Dict[str, Tuple[int, ClientBulkItem]] = {}  # email -> (índice, payload) da última ocorrência
+
+    for index, raw in enumerate(items):
+        try:
+            payload = ClientBulkItem.model_validate(raw)
+        except ValidationError as exc:
+            email = raw.get("email") if isinstance(raw, dict) else None
+            outcomes[index] = ClientBulkItemResult(
+                index=index, email=email if isinstance(email, str) else None,
+                outcome="invalid", error=_validation_message(exc),
+            )
+            continue
+        previous = latest.get(payload.email)
+        if previous is not None:
+            outcomes[previous[0]] = ClientBulkItemResult(
+                index=previous[0], email=payload.email, outcome="duplicate",
+                error=f"email repetido no lote; vale o item {index}",
+            )
+        latest[payload.email] = (index, payload)
+
+    pending = list(latest.values())
+    chunks = 0
+    for start in range(0, len(pending), chunk_rows):
+        chunk = pending[start:start + chunk_rows]
+        rows = [
+            {"name": p.name, "email": p.email, "status": p.status or m.ClientStatus.active}
+            for _, p in chunk
+        ]
+        try:
+            res = await db.execute(_upsert_stmt(rows, on_existing))
+            written = {email: (client_id, inserted) for client_id, email, inserted in res.all()}
+            # não retornadas: iguais (update) ou já existentes (skip) — busca os ids
+            missing = [p.email for _, p in chunk if p.email not in written]
+            existing: Dict[str, int] = {}
+            if missing:
+                found = await db.execute(
+                    select(m.Client.email, m.Client.id).where(m.Client.email.in_(missing))
+                )
+                existing = dict(found.all())
+            await db.commit()
+        except SQLAlchemyError as exc:
+            await db.rollback()
+            logger.warning("clients bulk chunk failed: %s", exc)
+            for index, p in chunk:
+                outcomes[index] = ClientBulkItemResult(
+                    index=index, email=p.email, outcome="failed", error=type(exc).__name__
+                )
+            continue
+        chunks += 1
+
+        for index, p in chunk:
+            if p.email in written:
+                client_id, inserted = written[p.email]
+                outcome = "created" if inserted else "updated"
+            else:
+                client_id = existing.get(p.email)
+                outcome = "unchanged" if on_existing == "update" else "conflict"
+            outcomes[index] = ClientBulkItemResult(
+                index=index, email=p.email, outcome=outcome, id=client_id,
+                error="Email já cadastrado" if outcome == "conflict" else None,
+            )
+
+    result = ClientBulkResult(received=len(items), chunks=chunks, items=outcomes)
+    for item in result.items:
+        setattr(result, item.outcome, getattr(result, item.outcome) + 1)
+    return result
@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+"""
+Fechamentos diários (`daily_returns`): upsert em lote e ingestão a partir
+das cotações do Yahoo.
+
+`upsert_closes` grava um statement multi-linha por lote com
+`ON CONFLICT (asset_id, date) DO UPDATE` (só reescreve preços que mudaram),
+então reexecutar a ingestão é idempotente. `ingest_daily_closes` pula os
+ativos cujo último dia gravado já alcança o pregão esperado (último dia útil
+em UTC), busca os demais em lotes concorrentes (limitados por semáforo) e
+grava/commita cada lote assim que chega — uma falha no meio deixa o que já
+foi gravado e a próxima execução só busca o restante. Cada cotação é
+conferida pela data do pregão (`trade_date`): fim de semana, feriado ou
+ativo suspenso devolvem um pregão já gravado, que é pulado. Com um dia
+explícito, o fechamento daquele dia vem do endpoint de chart. Ao final, os
+pregões gravados são acrescentados ao rollup `portfolio_snapshots`.
+
+`backfill_closes` preenche o histórico pelo endpoint de chart: cada ativo
+retoma a partir da faixa já gravada, os downloads (janelas de
+DAILY_CLOSES_BACKFILL_WINDOW_DAYS) rodam em paralelo limitado e um único
+escritor consome uma fila limitada, gravando em blocos — a memória fica
+limitada a poucas janelas, não ao histórico inteiro.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.db import models as m
+from app.db.partitions import ensure_daily_returns_partitions
+from app.integrations.yahoo import YahooClient, YahooError
+from app.services.snapshots import refresh_snapshots
+
+logger = logging.getLogger(__name__)
+
+DAILY_CLOSES_BATCH_SIZE = int(os.getenv("DAILY_CLOSES_BATCH_SIZE", "50"))
+DAILY_CLOSES_CONCURRENCY = int(os.getenv("DAILY_CLOSES_CONCURRENCY", "4"))
+DAILY_CLOSES_BACKFILL_WINDOW_DAYS = int(os.getenv("DAILY_CLOSES_BACKFILL_WINDOW_DAYS", "365"))
+DAILY_CLOSES_BACKFILL_CHUNK_ROWS = int(os.getenv("DAILY_CLOSES_BACKFILL_CHUNK_ROWS", "5000"))
+
+# Linhas por statement (3 parâmetros cada; limite do Postgres: 32767 por statement)
+UPSERT_CHUNK_ROWS = 10000
+
+# Janela (dias) em que se procura o último fechamento gravado de cada ativo
+LATEST_LOOKBACK_DAYS = 10
+
+# (asset_id, date, close_price)
+CloseRow = Tuple[int, date, Decimal]
+
+
+async def upsert_closes(db: AsyncSession, rows: Sequence[CloseRow]) -> int:
+    """
+    INSERT ... ON CONFLICT (asset_id, date) DO UPDATE em statements multi-linha.
+    Retorna o nº de linhas inseridas/alteradas (não faz commit).
+    """
+    written = 0
+    for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        chunk = {(a, d): p for a, d, p in rows[start : start + UPSERT_CHUNK_ROWS]}  # último vence
+        stmt = pg_insert(m.DailyReturn).values(
+            [{"asset_id": a, "date": d, "close_price": p} for (a, d), p in chunk.items()]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[m.DailyReturn.asset_id, m.DailyReturn.date],
+            set_={"close_price": stmt.excluded.close_price},
+            where=m.DailyReturn.close_price.is_distinct_from(stmt.excluded.close_price),
+        )
+        res = await db.execute(stmt)
+        written += max(res.rowcount or 0, 0)
+    return written
+
+
+async def ensure_partitions(db: AsyncSession, first_year: int, last_year: int) -> None:
+    """Cria partições anuais que faltam; falha (ex.: criada por outro processo) só é logada."""
+    try:
+        created = await ensure_daily_returns_partitions(db, first_year, last_year)
+        if created:
+            logger.info("daily_returns partitions created: %s", ", ".join(created))
+    except SQLAlchemyError:
+        await db.rollback()
+        logger.warning("could not create daily_returns partitions", exc_info=True)
+
+
+def trade_date(quote: Dict[str, Any]) -> Optional[date]:
+    """Data do pregão da cotação (regularMarketTime no fuso da bolsa)."""
+    ts = quote.get("regularMarketTime")
+    if not isinstance(ts, (int, float)):
+        return None
+    tz: Any = timezone.utc
+    tz_name = quote.get("exchangeTimezoneName")
+    if tz_name:
+        try:
+            tz = ZoneInfo(tz_name)
+        except ZoneInfoNotFoundError:
+            tz = timezone(timedelta(milliseconds=quote.get("gmtOffSetMilliseconds") or 0))
+    return datetime.fromtimestamp(ts, tz).date()
+
+
+def expected_session(today: Optional[date] = None) -> date:
+    """Último dia útil (seg-sex) até `today` (UTC) — pregão mais recente esperado."""
+    day = today or datetime.now(timezone.utc).date()
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def last_completed_session(today: Optional[date] = None) -> date:
+    """Último dia útil antes de `today` (UTC): o pregão de hoje pode estar aberto."""
+    day = today or datetime.now(timezone.utc).date()
+    return expected_session(day - timedelta(days=1))
+
+
+def close_row(asset_id: int, quote: Dict[str, Any]) -> Optional[CloseRow]:
+    """Linha de fechamento a partir da cotação; None se o pregão ainda está aberto."""
+    price = quote.get("regularMarketPrice")
+    day = trade_date(quote)
+    if price is None or day is None or quote.get("marketState") == "REGULAR":
+        return None
+    return asset_id, day, Decimal(str(price))
+
+
+@dataclass
+class IngestReport:
+    target: date  # pregão esperado (ou o dia pedido)
+    assets: int = 0
+    skipped: int = 0  # já tinham o pregão (antes ou depois da cotação)
+    written: int = 0
+    snapshots: int = 0  # linhas de portfolio_snapshots (re)calculadas
+    unpriced: List[str] = field(default_factory=list)  # sem cotação ou pregão aberto
+    failed: List[str] = field(default_factory=list)  # lote falhou no Yahoo
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+
+async def ingest_daily_closes(
+    db: AsyncSession,
+    yahoo: YahooClient,
+    target: Optional[date] = None,
+    batch_size: int = DAILY_CLOSES_BATCH_SIZE,
+    concurrency: int = DAILY_CLOSES_CONCURRENCY,
+) -> IngestReport:
+    """
+    Busca e grava o último fechamento de todos os ativos que ainda não o têm.
+    Com `target`, grava o fechamento daquele dia (endpoint de chart).
+    """
+    if target is not None:
+        return await _ingest_day(db, yahoo, target, concurrency)
+    report = IngestReport(target=expected_session())
+    t0 = time.perf_counter()
+    # ano corrente e o seguinte sempre prontos (não caem na DEFAULT)
+    await ensure_partitions(db, report.target.year, report.target.year + 1)
+
+    res = await db.execute(select(m.Asset.id, m.Asset.ticker).order_by(m.Asset.ticker))
+    assets = {ticker: asset_id for asset_id, ticker in res.all()}
+    res = await db.execute(
+        select(m.DailyReturn.asset_id, func.max(m.DailyReturn.date))
+        .where(m.DailyReturn.date >= report.target - timedelta(days=LATEST_LOOKBACK_DAYS))
+        .group_by(m.DailyReturn.asset_id)
+    )
+    latest: Dict[int, date] = dict(res.all())
+    pending = [t for t, asset_id in assets.items() if latest.get(asset_id, date.min) < report.target]
+    report.assets, report.skipped = len(assets), len(assets) - len(pending)
+    t_load = time.perf_counter()
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def fetch(batch: List[str]) -> Tuple[List[str], Optional[Dict[str, Dict[str, Any]]]]:
+        async with sem:
+            try:
+                return batch, await yahoo.quotes(batch)
+            except YahooError:
+                logger.warning("daily closes: quote batch failed (%d symbols)", len(batch), exc_info=True)
+                return batch, None
+
+    tasks = [
+        asyncio.create_task(fetch(pending[i : i + batch_size]))
+        for i in range(0, len(pending), batch_size)
+    ]
+    write_s = 0.0
+    days = set()
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            batch, quotes = await next_done
+            if quotes is None:
+                report.failed.extend(batch)
+                continue
+            rows = []
+            for ticker in batch:
+                row = close_row(assets[ticker], quotes.get(ticker) or {})
+                if row is None:
+                    report.unpriced.append(ticker)
+                elif row[1] <= latest.get(row[0], date.min):
+                    report.skipped += 1  # pregão já gravado (fim de semana, feriado, suspenso)
+                else:
+                    rows.append(row)
+                    days.add(row[1])
+            w0 = time.perf_counter()
+            report.written += await upsert_closes(db, rows)
+            await db.commit()
+            write_s += time.perf_counter() - w0
+    finally:
+        for task in tasks:
+            task.cancel()
+    t_fetch = time.perf_counter()
+
+    # Acrescenta/atualiza o rollup dos pregões gravados (todos os clientes)
+    if days:
+        report.snapshots = await refresh_snapshots(db, min(days), max(days))
+        await db.commit()
+    t_end = time.perf_counter()
+
+    report.timings_ms = {
+        "load": round((t_load - t0) * 1000, 1),
+        "fetch_and_write": round((t_fetch - t_load) * 1000, 1),
+        "write": round(write_s * 1000, 1),
+        "snapshots": round((t_end - t_fetch) * 1000, 1),
+        "total": round((t_end - t0) * 1000, 1),
+    }
+    for phase, ms in report.timings_ms.items():
+        metrics.gauge(f"jobs.daily_closes.{phase}_ms", ms)
+    metrics.incr("jobs.daily_closes.written", report.written)
+    logger.info(
+        "daily closes %s: assets=%d skipped=%d written=%d snapshots=%d unpriced=%d failed=%d timings_ms=%s",
+        report.target,
+        report.assets,
+        report.skipped,
+        report.written,
+        report.snapshots,
+        len(report.unpriced),
+        len(report.failed),
+        report.timings_ms,
+    )
+    return report
+
+
+async def _ingest_day(db: AsyncSession, yahoo: YahooClient, day: date, concurrency: int) -> IngestReport:
+    """Fechamento de um dia específico via chart (`backfill_closes` de um dia)."""
+    t0 = time.perf_counter()
+    backfill = await backfill_closes(db, yahoo, day, day, concurrency=concurrency)
+    report = IngestReport(
+        target=day,
+        assets=backfill.assets,
+        skipped=backfill.up_to_date,
+        written=backfill.written,
+        failed=backfill.failed,
+    )
+    t_fetch = time.perf_counter()
+    if backfill.written:
+        report.snapshots = await refresh_snapshots(db, day, day)
+        await db.commit()
+    t_end = time.perf_counter()
+    report.timings_ms = {
+        "fetch_and_write": round((t_fetch - t0) * 1000, 1),
+        "snapshots": round((t_end - t_fetch) * 1000, 1),
+        "total": round((t_end - t0) * 1000, 1),
+    }
+    return report
+
+
+def _windows(lo: date, hi: date, days: int, descending: bool = False) -> List[Tuple[date, date]]:
+    """Divide [lo, hi] em janelas de até `days` dias."""
+    out = []
+    while lo <= hi:
+        end = min(lo + timedelta(days=days - 1), hi)
+        out.append((lo, end))
+        lo = end + timedelta(days=1)
+    return out[::-1] if descending else out
+
+
+@dataclass
+class BackfillReport:
+    start: date
+    end: date
+    assets: int = 0
+    up_to_date: int = 0  # já tinham o período inteiro
+    requests: int = 0
+    written: int = 0
+    failed: List[str] = field(default_factory=list)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+
+async def backfill_closes(
+    db: AsyncSession,
+    yahoo: YahooClient,
+    start: date,
+    end: Optional[date] = None,
+    tickers: Optional[Sequence[str]] = None,
+    concurrency: int = DAILY_CLOSES_CONCURRENCY,
+    window_days: int = DAILY_CLOSES_BACKFILL_WINDOW_DAYS,
+    chunk_rows: int = DAILY_CLOSES_BACKFILL_CHUNK_ROWS,
+) -> BackfillReport:
+    """
+    Histórico de fechamentos de `start` a `end` (todos os ativos ou só
+    `tickers`). `end` padrão: último pregão concluído.
+    """
+    report = BackfillReport(start=start, end=end or last_completed_session())
+    t0 = time.perf_counter()
+    await ensure_partitions(db, start.year, report.end.year)
+
+    # Faixa já gravada por ativo dentro do período pedido
+    stored = (
+        select(
+            m.DailyReturn.asset_id,
+            func.min(m.DailyReturn.date).label("first"),
+            func.max(m.DailyReturn.date).label("last"),
+        )
+        .where(m.DailyReturn.date.between(start, report.end))
+        .group_by(m.DailyReturn.asset_id)
+        .subquery()
+    )
+    stmt = (
+        select(m.Asset.id, m.Asset.ticker, stored.c.first, stored.c.last)
+        .outerjoin(stored, stored.c.asset_id == m.Asset.id)
+        .order_by(m.Asset.ticker)
+    )
+    if tickers:
+        stmt = stmt.where(m.Asset.ticker.in_({t.strip().upper() for t in tickers}))
+    res = await db.execute(stmt)
+
+    # Janelas por ativo: a cauda (após o último dia gravado) em ordem crescente
+    # e o início (antes do primeiro) em ordem decrescente. Como cada ativo
+    # grava suas janelas em ordem, o que está no banco é sempre uma faixa
+    # contínua e uma execução interrompida retoma de onde parou.
+    jobs = []
+    for asset_id, ticker, first_day, last_day in res.all():
+        if first_day is None:
+            windows = _windows(start, report.end, window_days, descending=True)
+        else:
+            windows = _windows(last_day + timedelta(days=1), report.end, window_days) + _windows(
+                start, first_day - timedelta(days=1), window_days, descending=True
+            )
+        if windows:
+            jobs.append((asset_id, ticker, windows))
+        else:
+            report.up_to_date += 1
+    report.assets = len(jobs) + report.up_to_date
+    t_load = time.perf_counter()
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def download(asset_id: int, ticker: str, windows: List[Tuple[date, date]]) -> None:
+        async with sem:
+            for lo, hi in windows:
+                report.requests += 1
+                try:
+                    bars = await yahoo.chart(ticker, lo, hi)
+                except YahooError:
+                    logger.warning("backfill: chart failed for %s (%s..%s)", ticker, lo, hi, exc_info=True)
+                    report.failed.append(ticker)
+                    return  # próxima execução retoma a partir da faixa gravada
+                await queue.put(
+                    [(asset_id, b["date"], Decimal(str(b["close"]))) for b in bars]
+                )
+
+    async def download_all() -> None:
+        try:
+            await asyncio.gather(*(download(*job) for job in jobs))
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(download_all())
+    write_s = 0.0
+    buffer: List[CloseRow] = []
+    try:
+        while True:
+            rows = await queue.get()
+            if rows is not None:
+                buffer.extend(rows)
+            if buffer and (rows is None or len(buffer) >= chunk_rows):
+                w0 = time.perf_counter()
+                report.written += await upsert_closes(db, buffer)
+                await db.commit()
+                write_s += time.perf_counter() - w0
+                buffer = []
+            if rows is None:
+                break
+        await producer
+    finally:
+        producer.cancel()
+    t_end = time.perf_counter()
+
+    report.timings_ms = {
+        "load": round((t_load - t0) * 1000, 1),
+        "fetch_and_write": round((t_end - t_load) * 1000, 1),
+        "write": round(write_s * 1000, 1),
+        "total": round((t_end - t0) * 1000, 1),
+    }
+    logger.info(
+        "backfill %s..%s: assets=%d up_to_date=%d requests=%d written=%d failed=%d timings_ms=%s",
+        report.start,
+        report.end,
+        report.assets,
+        report.up_to_date,
+        report.requests,
+        report.written,
+        len(report.failed),
+        report.timings_ms,
+    )
+    return report
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+"""
+Fila de exportações assíncronas (Redis) para volumes que não cabem numa
+requisição.
+
+- `enqueue_export` grava o job num hash `exports:job:{id}` (TTL de
+  EXPORT_JOB_TTL_SECONDS) e empurra o id na lista EXPORT_JOBS_QUEUE.
+- O worker (`python -m app.jobs.export_worker`) move cada id da fila para a
+  sua lista de processamento (BLMOVE, `exports:processing:{worker}`), conta
+  as linhas, gera o arquivo em EXPORT_JOBS_DIR com os mesmos writers de
+  app.services.exports e atualiza rows_done/progress a cada bloco do cursor.
+  O id só sai da lista de processamento quando o job termina.
+- Enquanto roda, o job grava `heartbeat_at` a cada
+  EXPORT_HEARTBEAT_INTERVAL_S. `reap_stale_jobs` devolve à fila (ou marca
+  failed após EXPORT_JOB_MAX_ATTEMPTS) os jobs de listas de processamento
+  sem heartbeat há EXPORT_JOB_STALE_SECONDS — worker morto não perde job —
+  e apaga o `.part` órfão.
+- Assumir um job (`queued` -> `running`) é atômico (Lua) e incrementa
+  `attempts`. As escritas do worker no hash valem só para a sua tentativa e
+  só enquanto o hash existe: um worker lento cujo job foi devolvido à fila
+  não sobrescreve o novo dono, e um hash expirado não é recriado sem TTL.
+- A API só lê o hash (status) e serve o arquivo pronto (FileResponse, com
+  Range). API e worker precisam enxergar o mesmo EXPORT_JOBS_DIR.
+
+O arquivo é gravado como `.{tentativa}.part` e renomeado ao terminar: o
+download nunca vê um arquivo pela metade, e duas tentativas nunca
+escrevem no mesmo arquivo.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+
+from app.cache.redis_cache import get_redis
+from app.core import metrics
+from app.db.base import AsyncSessionLocal
+from app.schemas.exports import ExportJobCreate, ExportJobOut
+from app.services.exports import (
+    ARROW_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    EXPORTS,
+    PARQUET_MEDIA_TYPE,
+    XLSX_MEDIA_TYPE,
+    ExportSpec,
+    stream_arrow,
+    stream_csv,
+    stream_parquet,
+    write_xlsx,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_JOBS_DIR = os.getenv("EXPORT_JOBS_DIR", os.path.join(tempfile.gettempdir(), "exports"))
+EXPORT_JOBS_QUEUE = os.getenv("EXPORT_JOBS_QUEUE", "exports:queue")
+EXPORT_JOB_TTL_SECONDS = int(os.getenv("EXPORT_JOB_TTL_SECONDS", str(24 * 3600)))
+EXPORT_PROGRESS_MIN_INTERVAL_S = float(os.getenv("EXPORT_PROGRESS_MIN_INTERVAL_S", "1"))
+EXPORT_HEARTBEAT_INTERVAL_S = float(os.getenv("EXPORT_HEARTBEAT_INTERVAL_S", "10"))
+EXPORT_JOB_STALE_SECONDS = int(os.getenv("EXPORT_JOB_STALE_SECONDS", "120"))
+EXPORT_JOB_MAX_ATTEMPTS = int(os.getenv("EXPORT_JOB_MAX_ATTEMPTS", "3"))
+
+JOB_KEY_PREFIX = "exports:job:"
+PROCESSING_PREFIX = "exports:processing:"
+
+# queued -> running (+ attempts). KEYS[1] = hash do job; ARGV = started_at, heartbeat_at.
+# Retorna o nº da tentativa, ou 0 se o job não está mais queued (ou expirou).
+_CLAIM_SCRIPT = """
+if redis.call('hget', KEYS[1], 'status') ~= 'queued' then
+    return 0
+end
+redis.call('hset', KEYS[1], 'status', 'running', 'started_at', ARGV[1], 'heartbeat_at', ARGV[2])
+return redis.call('hincrby', KEYS[1], 'attempts', 1)
+"""
+
+# HSET só se o hash existe e (ARGV[1] vazio ou) attempts == ARGV[1].
+# KEYS[1] = hash do job; ARGV = tentativa, campo1, valor1, ... Retorna 1/0.
+_UPDATE_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[1] ~= '' and redis.call('hget', KEYS[1], 'attempts') ~= ARGV[1] then
+    return 0
+end
+redis.call('hset', KEYS[1], unpack(ARGV, 2))
+return 1
+"""
+
+MEDIA_TYPES = {
+    "csv": CSV_MEDIA_TYPE,
+    "xlsx": XLSX_MEDIA_TYPE,
+    "arrow": ARROW_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+}
+
+_STREAMS = {"csv": stream_csv, "arrow": stream_arrow, "parquet": stream_parquet}
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def processing_key(worker: str) -> str:
+    return f"{PROCESSING_PREFIX}{worker}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def job_path(job: Dict[str, str]) -> str:
+    return os.path.join(EXPORT_JOBS_DIR, f"{job['id']}.{job['format']}")
+
+
+def part_path(job: Dict[str, str], attempt: int) -> str:
+    return f"{job_path(job)}.{attempt}.part"
+
+
+def job_filename(job: Dict[str, str]) -> str:
+    return f"{job['dataset']}-{job['created_at'][:10]}.{job['format']}"
+
+
+async def enqueue_export(req: ExportJobCreate) -> Dict[str, str]:
+    """Cria o job (status queued) e o coloca na fila. Retorna o hash gravado."""
+    job = {
+        "id": uuid.uuid4().hex,
+        "dataset": req.dataset,
+        "format": req.format,
+        "filters": req.model_dump_json(exclude={"dataset", "format"}),
+        "status": "queued",
+        "rows_done": "0",
+        "created_at": _now(),
+    }
+    r = await get_redis()
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.hset(_job_key(job["id"]), mapping=job)
+        pipe.expire(_job_key(job["id"]), EXPORT_JOB_TTL_SECONDS)
+        pipe.lpush(EXPORT_JOBS_QUEUE, job["id"])
+        await pipe.execute()
+    metrics.incr("exports.jobs.enqueued")
+    return job
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, str]]:
+    r = await get_redis()
+    job = await r.hgetall(_job_key(job_id))
+    return job or None
+
+
+async def _update(job_id: str, attempt: Optional[int] = None, **fields: Any) -> bool:
+    """
+    Grava `fields` no hash do job, só se ele ainda existe (não recria sem TTL)
+    e, com `attempt`, só se a tentativa ainda é a atual. Retorna se gravou.
+    """
+    args = ["" if attempt is None else str(attempt)]
+    for k, v in fields.items():
+        args += [k, str(v)]
+    r = await get_redis()
+    return bool(await r.eval(_UPDATE_SCRIPT, 1, _job_key(job_id), *args))
+
+
+def job_out(job: Dict[str, str], download_url: Optional[str] = None) -> ExportJobOut:
+    """Hash do Redis -> ExportJobOut (progress_pct derivado das contagens)."""
+    total = int(job["rows_total"]) if job.get("rows_total") else None
+    done = int(job.get("rows_done") or 0)
+    if job["status"] == "done":
+        progress = 100.0
+    elif total:
+        progress = round(min(done / total, 1.0) * 100, 1)
+    else:
+        progress = 0.0
+    return ExportJobOut(
+        id=job["id"],
+        dataset=job["dataset"],
+        format=job["format"],
+        status=job["status"],
+        rows_total=total,
+        rows_done=done,
+        progress_pct=progress,
+        size_bytes=int(job["size_bytes"]) if job.get("size_bytes") else None,
+        error=job.get("error"),
+        created_at=job["created_at"],
+        started_at=job.get("started_at"),
+        finished_at=job.get("finished_at"),
+        download_url=download_url if job["status"] == "done" else None,
+    )
+
+
+async def _count_rows(spec: ExportSpec, filters: Dict[str, Any]) -> int:
+    stmt = spec.query(**filters).order_by(None).subquery()
+    async with AsyncSessionLocal() as db:
+        res = await db.execute(select(func.count()).select_from(stmt))
+        return int(res.scalar_one())
+
+
+async def _write_export(spec: ExportSpec, fmt: str, path: str, filters: Dict[str, Any], on_block) -> None:
+    if fmt == "xlsx":
+        await write_xlsx(spec, path, on_block=on_block, **filters)
+        return
+    with open(path, "wb") as fh:
+        async for chunk in _STREAMS[fmt](spec, on_block=on_block, **filters):
+            if chunk:
+                await asyncio.to_thread(fh.write, chunk)
+
+
+async def _heartbeat(job_id: str, attempt: int) -> None:
+    while await _update(job_id, attempt, heartbeat_at=time.time()):
+        await asyncio.sleep(EXPORT_HEARTBEAT_INTERVAL_S)
+    logger.warning("export job %s: attempt %d is no longer current", job_id, attempt)
+
+
+async def _claim(job_id: str) -> int:
+    """queued -> running atomicamente. Retorna a tentativa, ou 0 se outro assumiu."""
+    r = await get_redis()
+    return int(await r.eval(_CLAIM_SCRIPT, 1, _job_key(job_id), _now(), time.time()))
+
+
+async def run_export_job(job_id: str) -> Optional[Dict[str, str]]:
+    """Executa um job da fila (no worker). Falhas ficam no hash (status failed)."""
+    job = await get_job(job_id)
+    if job is None:
+        return None  # expirado
+    attempt = await _claim(job_id)
+    if not attempt:
+        return await get_job(job_id)  # já assumido/processado por outro worker
+    spec = EXPORTS[job["dataset"]]
+    filters = ExportJobCreate.model_validate(
+        {**json.loads(job["filters"]), "dataset": job["dataset"], "format": job["format"]}
+    ).model_dump(exclude={"dataset", "format"})
+
+    t0 = time.perf_counter()
+    os.makedirs(EXPORT_JOBS_DIR, exist_ok=True)
+    path = job_path(job)
+    part = part_path(job, attempt)
+    heartbeat = asyncio.create_task(_heartbeat(job_id, attempt))
+    try:
+        total = await _count_rows(spec, filters)
+        await _update(job_id, attempt, rows_total=total)
+
+        done = 0
+        last_flush = 0.0
+
+        async def on_block(rows: int) -> None:
+            nonlocal done, last_flush
+            done += rows
+            now = time.monotonic()
+            if now - last_flush >= EXPORT_PROGRESS_MIN_INTERVAL_S:
+                last_flush = now
+                await _update(job_id, attempt, rows_done=done)
+
+        await _write_export(spec, job["format"], part, filters, on_block)
+        os.replace(part, path)
+        await _update(
+            job_id,
+            attempt,
+            status="done",
+            rows_done=done,
+            size_bytes=os.path.getsize(path),
+            finished_at=_now(),
+        )
+    except Exception as exc:
+        logger.exception("export job %s failed", job_id)
+        if os.path.exists(part):
+            os.unlink(part)
+        await _update(job_id, attempt, status="failed", error=f"{type(exc).__name__}: {exc}", finished_at=_now())
+    finally:
+        heartbeat.cancel()
+    job = await get_job(job_id)
+    logger.info(
+        "export job %s %s: %s rows in %.0f ms",
+        job_id, job and job["status"], job and job.get("rows_done"), (time.perf_counter() - t0) * 1000,
+    )
+    return job
+
+
+async def next_job_id(worker: str, timeout_s: int = 5) -> Optional[str]:
+    """
+    Bloqueia até `timeout_s` esperando um id na fila; o id é movido para a
+    lista de processamento do `worker` (BLMOVE) até `ack_job`.
+    """
+    r = await get_redis()
+    return await r.blmove(EXPORT_JOBS_QUEUE, processing_key(worker), timeout_s, src="RIGHT", dest="LEFT")
+
+
+async def ack_job(worker: str, job_id: str) -> None:
+    """Retira o job da lista de processamento do `worker` (terminado)."""
+    r = await get_redis()
+    await r.lrem(processing_key(worker), 1, job_id)
+
+
+def _remove_part(job: Dict[str, str]) -> None:
+    part = part_path(job, int(job.get("attempts") or 0))
+    if os.path.exists(part):
+        os.unlink(part)
+
+
+async def reap_stale_jobs(stale_s: int = EXPORT_JOB_STALE_SECONDS) -> int:
+    """
+    Varre as listas de processamento: jobs sem heartbeat há `stale_s` (worker
+    morto) voltam à fila, ou ficam failed após EXPORT_JOB_MAX_ATTEMPTS; ids
+    de jobs terminados ou expirados são descartados. Retorna quantos jobs
+    foram devolvidos/falhados.
+    """
+    r = await get_redis()
+    cutoff = time.time() - stale_s
+    reaped = 0
+    async for key in r.scan_iter(match=f"{PROCESSING_PREFIX}*"):
+        for job_id in await r.lrange(key, 0, -1):
+            job = await get_job(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                await r.lrem(key, 1, job_id)
+                continue
+            # sem heartbeat: ainda não começou; conta da criação
+            if job.get("heartbeat_at"):
+                last = float(job["heartbeat_at"])
+            else:
+                last = datetime.fromisoformat(job["created_at"]).timestamp()
+            if last >= cutoff:
+                continue
+            await asyncio.to_thread(_remove_part, job)
+            reaped += 1
+            attempts = int(job.get("attempts") or 0)
+            if attempts >= EXPORT_JOB_MAX_ATTEMPTS:
+                metrics.incr("exports.jobs.lost")
+                logger.warning("export job %s lost its worker %s times; failing", job_id, attempts)
+                await _update(job_id, attempts, status="failed", error="worker lost", finished_at=_now())
+                await r.lrem(key, 1, job_id)
+                continue
+            # heartbeat_at = agora: carência até o próximo worker assumir
+            requeued = await _update(job_id, attempts, status="queued", rows_done=0, heartbeat_at=time.time())
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.lrem(key, 1, job_id)
+                if requeued:  # senão expirou ou outra tentativa já assumiu
+                    pipe.hdel(_job_key(job_id), "started_at", "rows_total")
+                    pipe.lpush(EXPORT_JOBS_QUEUE, job_id)
+                await pipe.execute()
+            if requeued:
+                metrics.incr("exports.jobs.requeued")
+                logger.warning("export job %s has no heartbeat since %.0fs; requeued", job_id, time.time() - last)
+    return reaped
+
+
+def purge_expired_files(max_age_s: int = EXPORT_JOB_TTL_SECONDS) -> int:
+    """Remove arquivos de exportação mais velhos que o TTL do job. Retorna quantos."""
+    if not os.path.isdir(EXPORT_JOBS_DIR):
+        return 0
+    cutoff = time.time() - max_age_s
+    removed = 0
+    for entry in os.scandir(EXPORT_JOBS_DIR):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.unlink(entry.path)
+            removed += 1
+    return removed
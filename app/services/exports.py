@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+"""
+Exportação de clientes, alocações e fechamentos (CSV, Excel, Arrow e
+Parquet) sem materializar o resultado.
+
+As linhas vêm de um cursor server-side (`AsyncSession.stream` com
+`yield_per`) em blocos de EXPORT_YIELD_PER; cada bloco é serializado e
+enviado antes do próximo ser lido, então a memória fica constante em
+qualquer volume.
+
+- CSV: o cabeçalho sai antes da consulta (primeiro byte imediato).
+- XLSX: openpyxl em modo write_only (linhas vão para arquivo temporário);
+  o .xlsx é um zip, então só pode ser enviado depois de fechado. Planilhas
+  passam de EXCEL_MAX_ROWS linhas viram abas adicionais.
+- Arrow (IPC stream) e Parquet: cada bloco do cursor vira um RecordBatch
+  tipado (schema fixo por exportação: decimal128, date32, timestamp UTC).
+  O IPC sai bloco a bloco; o Parquet agrupa EXPORT_PARQUET_ROW_GROUP_ROWS
+  linhas por row group (zstd) e também é enviado à medida que é escrito
+  (o rodapé vai no fim).
+
+Cada exportação abre a própria sessão: o stream continua depois que o
+handler retorna.
+"""
+
+import asyncio
+import csv
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from sqlalchemy import Select, select
+
+from app.db import models as m
+from app.db.base import AsyncSessionLocal
+from app.services.assets import normalize_ticker
+
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "2000"))
+EXPORT_PARQUET_ROW_GROUP_ROWS = int(os.getenv("EXPORT_PARQUET_ROW_GROUP_ROWS", "100000"))
+EXCEL_MAX_ROWS = 1_048_576 - 1  # limite do Excel menos o cabeçalho
+FILE_CHUNK_BYTES = 64 * 1024
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+_MONEY = pa.decimal128(20, 8)  # Numeric(20, 8) das tabelas
+
+
+OnBlock = Callable[[int], Awaitable[None]]  # progresso: nº de linhas do bloco lido
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    name: str
+    schema: pa.Schema
+    query: Callable[..., Select]
+
+    @property
+    def columns(self) -> Sequence[str]:
+        return self.schema.names
+
+
+def _clients_query(
+    status: Optional[m.ClientStatus] = None,
+    client_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    **_: Any,
+) -> Select:
+    stmt = select(
+        m.Client.id, m.Client.name, m.Client.email, m.Client.status, m.Client.created_at
+    ).order_by(m.Client.id)
+    if status is not None:
+        stmt = stmt.where(m.Client.status == status)
+    if client_id is not None:
+        stmt = stmt.where(m.Client.id == client_id)
+    if start is not None:
+        stmt = stmt.where(m.Client.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(m.Client.created_at < end + timedelta(days=1))
+    return stmt
+
+
+def _allocations_query(
+    client_id: Optional[int] = None,
+    ticker: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    **_: Any,
+) -> Select:
+    stmt = (
+        select(
+            m.Allocation.id,
+            m.Allocation.client_id,
+            m.Client.name,
+            m.Asset.ticker,
+            m.Allocation.quantity,
+            m.Allocation.buy_price,
+            m.Allocation.buy_date,
+        )
+        .join(m.Client, m.Client.id == m.Allocation.client_id)
+        .join(m.Asset, m.Asset.id == m.Allocation.asset_id)
+        .order_by(m.Allocation.id)
+    )
+    if client_id is not None:
+        stmt = stmt.where(m.Allocation.client_id == client_id)
+    if ticker:
+        stmt = stmt.where(m.Asset.ticker == normalize_ticker(ticker))
+    if start is not None:
+        stmt = stmt.where(m.Allocation.buy_date >= start)
+    if end is not None:
+        stmt = stmt.where(m.Allocation.buy_date <= end)
+    return stmt
+
+
+def _daily_returns_query(
+    client_id: Optional[int] = None,
+    ticker: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    **_: Any,
+) -> Select:
+    # ordem (asset_id, date) = índice da unique em cada partição; o intervalo de
+    # datas descarta partições inteiras (pruning) antes de ler qualquer linha
+    stmt = (
+        select(m.DailyReturn.asset_id, m.Asset.ticker, m.DailyReturn.date, m.DailyReturn.close_price)
+        .join(m.Asset, m.Asset.id == m.DailyReturn.asset_id)
+        .order_by(m.DailyReturn.asset_id, m.DailyReturn.date)
+    )
+    if client_id is not None:
+        held = select(m.Allocation.asset_id).where(m.Allocation.client_id == client_id)
+        stmt = stmt.where(m.DailyReturn.asset_id.in_(held))
+    if ticker:
+        stmt = stmt.where(m.Asset.ticker == normalize_ticker(ticker))
+    if start is not None:
+        stmt = stmt.where(m.DailyReturn.date >= start)
+    if end is not None:
+        stmt = stmt.where(m.DailyReturn.date <= end)
+    return stmt
+
+
+EXPORTS: Dict[str, ExportSpec] = {
+    "clients": ExportSpec(
+        "clients",
+        pa.schema(
+            [
+                pa.field("id", pa.int32(), nullable=False),
+                pa.field("name", pa.string(), nullable=False),
+                pa.field("email", pa.string(), nullable=False),
+                pa.field("status", pa.dictionary(pa.int8(), pa.string()), nullable=False),
+                pa.field("created_at", pa.timestamp("us", tz="UTC"), nullable=False),
+            ]
+        ),
+        _clients_query,
+    ),
+    "allocations": ExportSpec(
+        "allocations",
+        pa.schema(
+            [
+                pa.field("id", pa.int32(), nullable=False),
+                pa.field("client_id", pa.int32(), nullable=False),
+                pa.field("client_name", pa.string(), nullable=False),
+                pa.field("ticker", pa.string(), nullable=False),
+                pa.field("quantity", _MONEY, nullable=False),
+                pa.field("buy_price", _MONEY, nullable=False),
+                pa.field("buy_date", pa.date32(), nullable=False),
+            ]
+        ),
+        _allocations_query,
+    ),
+    "daily_returns": ExportSpec(
+        "daily_returns",
+        pa.schema(
+            [
+                pa.field("asset_id", pa.int32(), nullable=False),
+                pa.field("ticker", pa.string(), nullable=False),
+                pa.field("date", pa.date32(), nullable=False),
+                pa.field("close_price", _MONEY, nullable=False),
+            ]
+        ),
+        _daily_returns_query,
+    ),
+}
+
+
+def _csv_cell(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _xlsx_cell(value: Any) -> Any:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)  # Excel não guarda fuso (UTC)
+    return _csv_cell(value)
+
+
+async def iter_row_blocks(
+    stmt: Select, yield_per: int = EXPORT_YIELD_PER, on_block: Optional[OnBlock] = None
+) -> AsyncIterator[List[Any]]:
+    """Blocos de até `yield_per` linhas de um cursor server-side (sessão própria)."""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=yield_per))
+        async for block in result.partitions():
+            yield block
+            if on_block is not None:
+                await on_block(len(block))
+
+
+async def stream_csv(spec: ExportSpec, on_block: Optional[OnBlock] = None, **filters: Any) -> AsyncIterator[bytes]:
+    """CSV em blocos: cabeçalho primeiro, depois um chunk por bloco do cursor."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(spec.columns)
+    yield ("\ufeff" + buf.getvalue()).encode()  # BOM p/ o Excel abrir em UTF-8
+
+    async for block in iter_row_blocks(spec.query(**filters), on_block=on_block):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows([_csv_cell(v) for v in row] for row in block)
+        yield buf.getvalue().encode()
+
+
+async def write_xlsx(spec: ExportSpec, path: str, on_block: Optional[OnBlock] = None, **filters: Any) -> int:
+    """Grava o .xlsx em `path` (openpyxl write_only). Retorna o nº de linhas."""
+    wb = Workbook(write_only=True)
+    ws, rows_in_sheet, sheets, total = None, EXCEL_MAX_ROWS, 0, 0
+    async for block in iter_row_blocks(spec.query(**filters), on_block=on_block):
+        for row in block:
+            if rows_in_sheet >= EXCEL_MAX_ROWS:
+                sheets += 1
+                ws = wb.create_sheet(spec.name if sheets == 1 else f"{spec.name}_{sheets}")
+                ws.append(list(spec.columns))
+                rows_in_sheet = 0
+            ws.append([_xlsx_cell(v) for v in row])
+            rows_in_sheet += 1
+        total += len(block)
+    if ws is None:
+        wb.create_sheet(spec.name).append(list(spec.columns))
+    await asyncio.to_thread(wb.save, path)
+    return total
+
+
+async def stream_xlsx(spec: ExportSpec, **filters: Any) -> AsyncIterator[bytes]:
+    """Gera o .xlsx num arquivo temporário e o envia em chunks (arquivo removido ao fim)."""
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        await write_xlsx(spec, path, **filters)
+        with open(path, "rb") as fh:
+            while chunk := await asyncio.to_thread(fh.read, FILE_CHUNK_BYTES):
+                yield chunk
+    finally:
+        os.unlink(path)
+
+
+def record_batch(spec: ExportSpec, block: Sequence[Sequence[Any]]) -> pa.RecordBatch:
+    """Bloco de linhas do cursor -> RecordBatch no schema da exportação."""
+    columns = list(zip(*block)) if block else [()] * len(spec.schema)
+    arrays = [
+        pa.array([_csv_cell(v) for v in values] if pa.types.is_dictionary(field.type) else values, field.type)
+        for field, values in zip(spec.schema, columns)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=spec.schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escrita do pyarrow que acumula bytes até serem drenados."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+
+async def stream_arrow(spec: ExportSpec, on_block: Optional[OnBlock] = None, **filters: Any) -> AsyncIterator[bytes]:
+    """Arrow IPC (formato stream): schema primeiro, depois um RecordBatch por bloco do cursor."""
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, spec.schema) as writer:
+        yield sink.drain()
+        async for block in iter_row_blocks(spec.query(**filters), on_block=on_block):
+            writer.write_batch(record_batch(spec, block))
+            yield sink.drain()
+    yield sink.drain()  # marcador de fim do stream
+
+
+async def stream_parquet(
+    spec: ExportSpec,
+    row_group_rows: int = EXPORT_PARQUET_ROW_GROUP_ROWS,
+    on_block: Optional[OnBlock] = None,
+    **filters: Any,
+) -> AsyncIterator[bytes]:
+    """Parquet (zstd) com row groups de até `row_group_rows`, enviado conforme é escrito."""
+    sink = _ChunkSink()
+    pending: List[pa.RecordBatch] = []
+    pending_rows = 0
+    with pq.ParquetWriter(sink, spec.schema, compression="zstd") as writer:
+        async for block in iter_row_blocks(spec.query(**filters), on_block=on_block):
+            pending.append(record_batch(spec, block))
+            pending_rows += len(block)
+            if pending_rows >= row_group_rows:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=pending_rows)
+                pending, pending_rows = [], 0
+                yield sink.drain()
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending), row_group_size=pending_rows)
+    yield sink.drain()  # último row group + rodapé
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+"""
+Paginação por keyset (cursor) e contagem estimada.
+
+O cursor é opaco para o cliente: base64url de `{"k": <ordem>, "v": [...]}`
+com os valores da chave de ordenação da última linha da página. A página
+seguinte filtra `(chave) > (valores)` e anda pelo índice; o custo não
+depende da profundidade (ao contrário de OFFSET).
+
+Contagem (`count`):
+- exact: count(*) sobre o filtro (linear no tamanho do resultado);
+- estimate: sem filtros lê `pg_class.reltuples`; com filtros usa as linhas
+  estimadas pelo planner (EXPLAIN), sem executar a consulta;
+- none: não conta.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List, Literal, Optional, Sequence
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CountMode = Literal["exact", "estimate", "none"]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(key: str, values: Sequence[Any]) -> str:
+    raw = json.dumps({"k": key, "v": list(values)}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, key: str, types: Sequence[type]) -> List[Any]:
+    """
+    Valores do cursor; InvalidCursor se malformado, de outra ordenação ou com
+    valor de tipo diferente do da coluna (`types`, um por coluna da chave).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        values = data["v"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursor("cursor inválido") from exc
+    if data.get("k") != key or not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursor("cursor não corresponde à ordenação pedida")
+    if not all(_bindable(v, t) for v, t in zip(values, types)):
+        raise InvalidCursor("cursor inválido")
+    return values
+
+
+def _bindable(value: Any, expected: type) -> bool:
+    """Valor que o Postgres aceita para a coluna (evita erro 500 no bind)."""
+    if isinstance(value, bool) or not isinstance(value, expected):  # bool é subclasse de int
+        return False
+    if isinstance(value, int):
+        return -(2**31) <= value < 2**31  # colunas integer (int4)
+    if isinstance(value, str):
+        return "\x00" not in value  # text não aceita NUL
+    return True
+
+
+async def exact_count(session: AsyncSession, stmt: Select) -> int:
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    return (await session.execute(count_stmt)).scalar_one()
+
+
+async def estimate_count(session: AsyncSession, stmt: Select, table: str) -> int:
+    """
+    Estimativa de linhas: `reltuples` da tabela quando não há WHERE, senão
+    "Plan Rows" do EXPLAIN. Cai para a contagem exata se a tabela nunca foi
+    analisada (reltuples = -1).
+    """
+    if stmt.whereclause is None:
+        res = await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:t AS regclass)"),
+            {"t": table},
+        )
+        estimate = res.scalar_one_or_none()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+        return await exact_count(session, stmt)
+
+    # literais embutidos pelo próprio dialeto (com escape) e SQL cru no driver:
+    # EXPLAIN não aceita a consulta parametrizada como subquery
+    conn = await session.connection()
+    sql = stmt.order_by(None).compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    res = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+    plan = res.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(
+    session: AsyncSession, stmt: Select, mode: CountMode, table: str
+) -> Optional[int]:
+    if mode == "exact":
+        return await exact_count(session, stmt)
+    if mode == "estimate":
+        return await estimate_count(session, stmt, table)
+    return None
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+"""
+Série histórica de valor e rentabilidade da carteira de um cliente.
+
+Três consultas no total (lotes do cliente, fechamentos do período e último
+fechamento anterior ao período), independentemente do nº de dias ou ativos.
+O resto é NumPy: matriz de preços (dias x ativos) com forward-fill, matriz
+de quantidades montada por soma acumulada dos lotes a partir do `buy_date`,
+e valor/custo/retorno por dia como reduções sobre as colunas.
+
+`series_from_snapshots` produz a mesma série a partir do rollup
+`portfolio_snapshots` (uma leitura por PK).
+"""
+
+from datetime import date
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models as m
+from app.schemas.performance import Interval, PerformancePoint, PerformanceSeries
+
+MONEY_DECIMALS = 2
+PCT_DECIMALS = 4
+
+
+def _ffill(prices: np.ndarray) -> np.ndarray:
+    """Forward-fill de NaN ao longo dos dias (eixo 0), por coluna."""
+    n_days = prices.shape[0]
+    idx = np.where(np.isnan(prices), 0, np.arange(n_days)[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return prices[idx, np.arange(prices.shape[1])]
+
+
+def _period_ends(dates: np.ndarray, interval: Interval) -> np.ndarray:
+    """Índice do último dia de cada semana (seg-dom) ou mês."""
+    if interval == "daily" or len(dates) == 0:
+        return np.arange(len(dates))
+    if interval == "weekly":
+        keys = (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7  # 1970-01-01 foi quinta
+    else:
+        keys = dates.astype("datetime64[M]").astype(np.int64)
+    return np.flatnonzero(np.r_[keys[1:] != keys[:-1], True])
+
+
+def _points(
+    dates: np.ndarray, value: np.ndarray, cost: np.ndarray, interval: Interval
+) -> List[PerformancePoint]:
+    """Pontos da série (com TWR) a partir de valor e custo por pregão."""
+    # TWR: retorno diário descontando os aportes do dia (variação do custo)
+    flows = np.r_[0.0, np.diff(cost)]
+    prev = np.r_[0.0, value[:-1]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = np.where(prev > 0, (value - flows) / prev - 1.0, 0.0)
+        simple = value / cost - 1.0
+    twr = np.cumprod(1.0 + daily) - 1.0
+
+    return [
+        PerformancePoint(
+            date=dates[i].item(),
+            value=round(float(value[i]), MONEY_DECIMALS),
+            cost=round(float(cost[i]), MONEY_DECIMALS),
+            pnl=round(float(value[i] - cost[i]), MONEY_DECIMALS),
+            return_pct=None if not np.isfinite(simple[i]) else round(float(simple[i] * 100), PCT_DECIMALS),
+            twr_pct=round(float(twr[i] * 100), PCT_DECIMALS),
+        )
+        for i in _period_ends(dates, interval)
+    ]
+
+
+def compute_performance(
+    client_id: int,
+    start: date,
+    end: date,
+    interval: Interval,
+    lots: Sequence[Any],
+    closes: Sequence[Tuple[int, date, Any]],
+    prior: Sequence[Tuple[int, Any]],
+) -> PerformanceSeries:
+    """
+    `lots` = (asset_id, ticker, quantity, buy_price, buy_date);
+    `closes` = (asset_id, date, close) dentro de [start, end];
+    `prior` = (asset_id, close) do último fechamento antes de `start`.
+    """
+    asset_ids = sorted({lot.asset_id for lot in lots})
+    col = {a: j for j, a in enumerate(asset_ids)}
+    tickers = {lot.asset_id: lot.ticker for lot in lots}
+
+    dates = np.array(sorted({d for _, d, _ in closes}), dtype="datetime64[D]")
+    n_days, n_assets = len(dates), len(asset_ids)
+    if n_days == 0 or n_assets == 0:
+        return PerformanceSeries(
+            client_id=client_id,
+            start=start,
+            end=end,
+            interval=interval,
+            source="live",
+            points=[],
+            unpriced_tickers=sorted(tickers.values()),
+        )
+
+    # Preços: linha 0 = último fechamento anterior ao período (semente do ffill)
+    prices = np.full((n_days + 1, n_assets), np.nan)
+    for asset_id, close in prior:
+        prices[0, col[asset_id]] = float(close)
+    c_asset = np.fromiter((col[a] for a, _, _ in closes), dtype=np.int64, count=len(closes))
+    c_day = np.searchsorted(dates, np.array([d for _, d, _ in closes], dtype="datetime64[D]")) + 1
+    prices[c_day, c_asset] = np.fromiter((float(c) for _, _, c in closes), dtype=np.float64, count=len(closes))
+    prices = _ffill(prices)[1:]
+
+    # Quantidade/custo em carteira: cada lote entra no 1º pregão >= buy_date
+    l_asset = np.fromiter((col[lot.asset_id] for lot in lots), dtype=np.int64, count=len(lots))
+    l_day = np.searchsorted(dates, np.array([lot.buy_date for lot in lots], dtype="datetime64[D]"))
+    l_qty = np.fromiter((float(lot.quantity) for lot in lots), dtype=np.float64, count=len(lots))
+    l_cost = l_qty * np.fromiter((float(lot.buy_price) for lot in lots), dtype=np.float64, count=len(lots))
+    qty = np.zeros((n_days + 1, n_assets))
+    cost = np.zeros((n_days + 1, n_assets))
+    np.add.at(qty, (l_day, l_asset), l_qty)  # l_day == n_days: comprado após o período
+    np.add.at(cost, (l_day, l_asset), l_cost)
+    qty = np.cumsum(qty, axis=0)[:n_days]
+    cost = np.cumsum(cost, axis=0)[:n_days]
+
+    # Sem preço ainda: posição avaliada pelo custo
+    value = np.where(np.isnan(prices), cost, qty * prices).sum(axis=1)
+    total_cost = cost.sum(axis=1)
+
+    priced = ~np.isnan(prices).all(axis=0)
+    return PerformanceSeries(
+        client_id=client_id,
+        start=start,
+        end=end,
+        interval=interval,
+        source="live",
+        points=_points(dates, value, total_cost, interval),
+        unpriced_tickers=sorted(tickers[a] for a in asset_ids if not priced[col[a]]),
+    )
+
+
+async def load_performance(
+    db: AsyncSession,
+    client_id: int,
+    start: date,
+    end: date,
+    interval: Interval = "daily",
+) -> PerformanceSeries:
+    """Carrega lotes e fechamentos (3 consultas) e calcula a série."""
+    res = await db.execute(
+        select(
+            m.Allocation.asset_id,
+            m.Asset.ticker,
+            m.Allocation.quantity,
+            m.Allocation.buy_price,
+            m.Allocation.buy_date,
+        )
+        .join(m.Asset, m.Asset.id == m.Allocation.asset_id)
+        .where(m.Allocation.client_id == client_id, m.Allocation.buy_date <= end)
+    )
+    lots: List[Any] = list(res.all())
+    asset_ids = {lot.asset_id for lot in lots}
+
+    closes: List[Any] = []
+    prior: List[Any] = []
+    if asset_ids:
+        res = await db.execute(
+            select(m.DailyReturn.asset_id, m.DailyReturn.date, m.DailyReturn.close_price)
+            .where(
+                m.DailyReturn.asset_id.in_(asset_ids),
+                m.DailyReturn.date.between(start, end),
+            )
+        )
+        closes = list(res.all())
+        res = await db.execute(
+            select(m.DailyReturn.asset_id, m.DailyReturn.close_price)
+            .where(m.DailyReturn.asset_id.in_(asset_ids), m.DailyReturn.date < start)
+            .distinct(m.DailyReturn.asset_id)
+            .order_by(m.DailyReturn.asset_id, m.DailyReturn.date.desc())
+        )
+        prior = list(res.all())
+
+    return compute_performance(client_id, start, end, interval, lots, closes, prior)
+
+
+def series_from_snapshots(
+    client_id: int,
+    start: date,
+    end: date,
+    interval: Interval,
+    snapshots: Sequence[m.PortfolioSnapshot],
+) -> PerformanceSeries:
+    """Mesma série, lida do rollup `portfolio_snapshots` (sem recalcular lotes/preços)."""
+    n = len(snapshots)
+    dates = np.array([s.date for s in snapshots], dtype="datetime64[D]")
+    value = np.fromiter((float(s.value) for s in snapshots), dtype=np.float64, count=n)
+    cost = np.fromiter((float(s.cost) for s in snapshots), dtype=np.float64, count=n)
+    return PerformanceSeries(
+        client_id=client_id,
+        start=start,
+        end=end,
+        interval=interval,
+        source="snapshots",
+        points=_points(dates, value, cost, interval),
+        unpriced_tickers=[],
+    )
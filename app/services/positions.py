@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+"""
+Read model `positions`: quantidade total, custo e nº de lotes por (cliente, ativo).
+
+Atualizado incrementalmente, na mesma transação da escrita do lote, por um
+upsert que soma deltas (INSERT ... ON CONFLICT DO UPDATE). Posições que
+ficam sem lotes são removidas. `rebuild_positions` recalcula tudo a partir
+de `allocations` (backfill/reparo).
+"""
+
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models as m
+
+# (client_id, asset_id) -> (Δquantity, Δcost_basis, Δlot_count)
+PositionDeltas = Dict[Tuple[int, int], Tuple[Decimal, Decimal, int]]
+
+# Linhas por statement (5 parâmetros cada; limite do Postgres: 32767 por statement)
+UPSERT_CHUNK_ROWS = 5000
+
+
+async def apply_lot_deltas(db: AsyncSession, deltas: PositionDeltas) -> None:
+    """Aplica vários deltas em upserts multi-linha (não faz commit)."""
+    if not deltas:
+        return
+    rows = [
+        {
+            "client_id": client_id,
+            "asset_id": asset_id,
+            "quantity": dq,
+            "cost_basis": dc,
+            "lot_count": dl,
+        }
+        for (client_id, asset_id), (dq, dc, dl) in deltas.items()
+    ]
+    for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        stmt = pg_insert(m.Position).values(rows[start : start + UPSERT_CHUNK_ROWS])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[m.Position.client_id, m.Position.asset_id],
+            set_={
+                "quantity": m.Position.quantity + stmt.excluded.quantity,
+                "cost_basis": m.Position.cost_basis + stmt.excluded.cost_basis,
+                "lot_count": m.Position.lot_count + stmt.excluded.lot_count,
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+
+    if any(dl < 0 for _, _, dl in deltas.values()):
+        client_ids = {client_id for client_id, _ in deltas}
+        await db.execute(
+            delete(m.Position).where(
+                m.Position.client_id.in_(client_ids), m.Position.lot_count <= 0
+            )
+        )
+
+
+async def apply_lot_delta(
+    db: AsyncSession,
+    client_id: int,
+    asset_id: int,
+    quantity: Decimal,
+    cost_basis: Decimal,
+    lot_count: int,
+) -> None:
+    """Aplica o delta de um lote à posição (cliente, ativo) (não faz commit)."""
+    await apply_lot_deltas(db, {(client_id, asset_id): (quantity, cost_basis, lot_count)})
+
+
+async def rebuild_positions(db: AsyncSession, client_id: Optional[int] = None) -> int:
+    """
+    Recalcula as posições a partir de `allocations` (todas ou de um cliente)
+    com DELETE + INSERT ... SELECT GROUP BY. Retorna o nº de posições (não faz commit).
+    """
+    del_stmt = delete(m.Position)
+    src = select(
+        m.Allocation.client_id,
+        m.Allocation.asset_id,
+        func.sum(m.Allocation.quantity),
+        func.sum(m.Allocation.quantity * m.Allocation.buy_price),
+        func.count(),
+    ).group_by(m.Allocation.client_id, m.Allocation.asset_id)
+    if client_id is not None:
+        del_stmt = del_stmt.where(m.Position.client_id == client_id)
+        src = src.where(m.Allocation.client_id == client_id)
+
+    await db.execute(del_stmt)
+    res = await db.execute(
+        insert(m.Position).from_select(
+            ["client_id", "asset_id", "quantity", "cost_basis", "lot_count"], src
+        )
+    )
+    return res.rowcount
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+"""
+Cotações com cache por símbolo (`quote:{SYMBOL}`).
+
+Lê todos os símbolos num único MGET, busca no Yahoo apenas os faltantes e
+grava os novos com pipeline de SET EX. Carteiras que compartilham ativos
+reaproveitam o mesmo preço em cache.
+
+Os faltantes são protegidos por lock distribuído por símbolo: símbolos cujo
+lock está com outro worker são aguardados no cache em vez de buscados.
+Símbolos que o Yahoo não retorna ganham um marcador "não encontrado"
+(QUOTE_NEGATIVE_TTL_SECONDS): quem espera não fica preso até o timeout e o
+próximo pedido não volta ao upstream por eles.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Protocol, Sequence
+
+from fastapi import Response
+
+from app.cache.redis_cache import DEFAULT_TTL, cache_mget_json, cache_mset_json
+from app.cache.redis_lock import acquire_many, fence, release_many, wait_for
+from app.core import metrics
+from app.integrations.yahoo import normalize_symbols
+
+QUOTE_CACHE_TTL = int(os.getenv("QUOTE_CACHE_TTL_SECONDS", str(DEFAULT_TTL)))
+QUOTE_NEGATIVE_TTL = int(os.getenv("QUOTE_NEGATIVE_TTL_SECONDS", "60"))
+
+# Valor gravado para símbolos que o upstream não retornou
+MISSING_QUOTE: Dict[str, Any] = {"missing": True}
+
+# Campos mantidos da resposta bruta do Yahoo (payload compacto no Redis)
+QUOTE_FIELDS = (
+    "symbol",
+    "shortName",
+    "currency",
+    "regularMarketPrice",
+    "regularMarketPreviousClose",
+    "regularMarketChange",
+    "regularMarketChangePercent",
+    "regularMarketTime",
+)
+
+
+class QuoteSource(Protocol):
+    async def quotes(self, symbols: Sequence[str]) -> Dict[str, Dict[str, Any]]: ...
+
+
+@dataclass
+class QuoteLookup:
+    """Resultado da busca: cotações por símbolo + contagem de hits/misses no cache."""
+
+    quotes: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+
+
+def quote_key(symbol: str) -> str:
+    return f"quote:{symbol}"
+
+
+def _compact(raw: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: raw.get(k) for k in QUOTE_FIELDS}
+
+
+def _found(values: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Descarta os marcadores de símbolo não encontrado."""
+    return {sym: q for sym, q in values.items() if q != MISSING_QUOTE}
+
+
+async def get_quotes(symbols: Sequence[str], source: QuoteSource) -> QuoteLookup:
+    """Cotações compactas p/ `symbols`, consultando `source` só para os faltantes."""
+    wanted = normalize_symbols(symbols or [])
+    if not wanted:
+        return QuoteLookup()
+
+    cached = await cache_mget_json([quote_key(s) for s in wanted])
+    quotes: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for sym in wanted:
+        value = cached.get(quote_key(sym))
+        if value is None:
+            missing.append(sym)
+        elif value != MISSING_QUOTE:
+            quotes[sym] = value
+
+    lookup = QuoteLookup(quotes=quotes, hits=len(wanted) - len(missing), misses=len(missing))
+    if not missing:
+        return lookup
+
+    won = await acquire_many([quote_key(s) for s in missing])
+    mine = [s for s in missing if quote_key(s) in won]
+    others = [s for s in missing if quote_key(s) not in won]
+
+    fetched_mine, waited = await asyncio.gather(
+        _fetch_and_store(mine, source, won),
+        _wait_for_others(others),
+    )
+    quotes.update(fetched_mine)
+    quotes.update(_found(waited))
+
+    leftover = [s for s in others if s not in waited]
+    if leftover:
+        metrics.incr("cache.lock.fallback", len(leftover))
+        quotes.update(await _fetch_and_store(leftover, source, {}))
+    return lookup
+
+
+async def _fetch_and_store(
+    symbols: List[str], source: QuoteSource, tokens: Dict[str, int]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Busca `symbols` no upstream, grava no cache e libera os locks em `tokens`.
+    Com lock, a gravação é condicionada ao fencing token; símbolos ausentes
+    da resposta recebem MISSING_QUOTE.
+    """
+    try:
+        if not symbols:
+            return {}
+        fetched = {sym: _compact(raw) for sym, raw in (await source.quotes(symbols)).items()}
+        fences = {name: fence(name, token) for name, token in tokens.items()}
+        await cache_mset_json({quote_key(sym): q for sym, q in fetched.items()}, ttl=QUOTE_CACHE_TTL, fences=fences)
+        absent = [quote_key(sym) for sym in symbols if sym not in fetched]
+        if absent:
+            metrics.incr("quotes.not_found", len(absent))
+            await cache_mset_json(dict.fromkeys(absent, MISSING_QUOTE), ttl=QUOTE_NEGATIVE_TTL, fences=fences)
+        return fetched
+    finally:
+        await release_many(tokens)
+
+
+async def _wait_for_others(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Aguarda no cache os símbolos que outro worker está buscando."""
+    if not symbols:
+        return {}
+    keys = [quote_key(s) for s in symbols]
+    found: Dict[str, Dict[str, Any]] = {}
+
+    async def _read() -> Dict[str, Dict[str, Any]] | None:
+        cached = await cache_mget_json([k for k, s in zip(keys, symbols) if s not in found])
+        for k, s in zip(keys, symbols):
+            if k in cached:
+                found[s] = cached[k]
+        return found if len(found) == len(symbols) else None
+
+    await wait_for(_read)
+    if found:
+        metrics.incr("cache.lock.waited_hit", len(found))
+    return found
+
+
+def set_quote_cache_headers(response: Response | None, lookup: QuoteLookup) -> None:
+    """Headers de inspeção: X-Cache (HIT/MISS/PARTIAL), X-Cache-Hits, X-Cache-Misses."""
+    if response is None:
+        return
+    if lookup.misses == 0:
+        state = "HIT"
+    elif lookup.hits == 0:
+        state = "MISS"
+    else:
+        state = "PARTIAL"
+    response.headers["X-Cache"] = state
+    response.headers["X-Cache-Hits"] = str(lookup.hits)
+    response.headers["X-Cache-Misses"] = str(lookup.misses)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+"""
+Rollup `portfolio_snapshots`: valor, custo e rentabilidade por (cliente, pregão).
+
+`refresh_snapshots` recalcula um intervalo de datas num único
+INSERT ... SELECT (conjunto inteiro, sem laço por cliente/dia): lotes com
+buy_date <= dia x último fechamento <= dia de cada ativo (LATERAL no índice
+(asset_id, date)); ativos ainda sem preço entram pelo custo, como no cálculo
+ao vivo de `app/services/performance.py`.
+
+A ingestão diária acrescenta o pregão do dia; escritas em alocações agendam
+`repair_snapshots` a partir do buy_date afetado. O histórico anterior ao
+deploy só existe após `python -m app.jobs.refresh_snapshots --from ...`;
+até lá `snapshots_cover` devolve False e a API calcula ao vivo.
+"""
+
+import asyncio
+import logging
+from datetime import date
+from typing import List, Optional, Sequence, Set
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models as m
+from app.db.base import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+_repair_tasks: Set[asyncio.Task] = set()
+
+_CLIENT_FILTER = "CAST(:client_ids AS integer[]) IS NULL OR l.client_id = ANY(CAST(:client_ids AS integer[]))"
+
+_REFRESH_SQL = text(
+    f"""
+    INSERT INTO portfolio_snapshots (client_id, date, value, cost, return_pct)
+    SELECT client_id, date, value, cost,
+           CASE WHEN cost > 0 THEN (value / cost - 1) * 100 END
+    FROM (
+        SELECT h.client_id, h.date,
+               SUM(COALESCE(h.quantity * p.close_price, h.cost)) AS value,
+               SUM(h.cost) AS cost
+        FROM (
+            SELECT l.client_id, d.date, l.asset_id,
+                   SUM(l.quantity) AS quantity,
+                   SUM(l.quantity * l.buy_price) AS cost
+            FROM allocations l
+            JOIN (
+                SELECT DISTINCT date FROM daily_returns WHERE date BETWEEN :start AND :end
+            ) d ON l.buy_date <= d.date
+            WHERE {_CLIENT_FILTER}
+            GROUP BY l.client_id, d.date, l.asset_id
+        ) h
+        LEFT JOIN LATERAL (
+            SELECT r.close_price
+            FROM daily_returns r
+            WHERE r.asset_id = h.asset_id AND r.date <= h.date
+            ORDER BY r.date DESC
+            LIMIT 1
+        ) p ON true
+        GROUP BY h.client_id, h.date
+    ) s
+    ON CONFLICT (client_id, date) DO UPDATE
+    SET value = EXCLUDED.value, cost = EXCLUDED.cost, return_pct = EXCLUDED.return_pct
+    """
+)
+
+
+async def refresh_snapshots(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    client_ids: Optional[Sequence[int]] = None,
+) -> int:
+    """
+    Recalcula os snapshots de [start, end] (todos os clientes ou só `client_ids`).
+    Dias sem posição deixam de ter linha. Retorna o nº de linhas gravadas (não faz commit).
+    """
+    ids: Optional[List[int]] = sorted(set(client_ids)) if client_ids is not None else None
+    stmt = delete(m.PortfolioSnapshot).where(m.PortfolioSnapshot.date.between(start, end))
+    if ids is not None:
+        stmt = stmt.where(m.PortfolioSnapshot.client_id.in_(ids))
+    await db.execute(stmt)
+    res = await db.execute(_REFRESH_SQL, {"start": start, "end": end, "client_ids": ids})
+    return max(res.rowcount or 0, 0)
+
+
+async def repair_snapshots(client_ids: Sequence[int], since: date) -> None:
+    """
+    Reparo em background (sessão própria) após escrita retroativa em alocações:
+    recalcula de `since` até hoje. Falhas são logadas; o próximo reparo ou
+    `python -m app.jobs.refresh_snapshots` corrige.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            total = await refresh_snapshots(db, since, date.today(), client_ids)
+            await db.commit()
+        logger.info("snapshots repaired for %d client(s) since %s: %d rows", len(client_ids), since, total)
+    except Exception:
+        logger.warning("snapshot repair failed for clients %s since %s", list(client_ids), since, exc_info=True)
+
+
+def schedule_repair_snapshots(client_ids: Sequence[int], since: date) -> None:
+    """
+    `repair_snapshots` numa task solta (referência mantida até terminar):
+    para caminhos que podem terminar em erro, onde BackgroundTasks não roda.
+    """
+    task = asyncio.create_task(repair_snapshots(list(client_ids), since))
+    _repair_tasks.add(task)
+    task.add_done_callback(_repair_tasks.discard)
+
+
+async def read_snapshots(db: AsyncSession, client_id: int, start: date, end: date) -> List[m.PortfolioSnapshot]:
+    res = await db.execute(
+        select(m.PortfolioSnapshot)
+        .where(
+            m.PortfolioSnapshot.client_id == client_id,
+            m.PortfolioSnapshot.date.between(start, end),
+        )
+        .order_by(m.PortfolioSnapshot.date)
+    )
+    return list(res.scalars().all())
+
+
+async def snapshots_cover(
+    db: AsyncSession, client_id: int, start: date, end: date, snapshots: Sequence[m.PortfolioSnapshot]
+) -> bool:
+    """
+    True se `snapshots` têm todos os pregões de [start, end] em que o cálculo
+    ao vivo teria ponto: dias com fechamento de algum ativo do cliente, a
+    partir da primeira compra. Rollup parcial (backfill não rodado, reparo
+    pendente) devolve False.
+    """
+    if not snapshots:
+        return False
+    lots = select(m.Allocation.asset_id).where(m.Allocation.client_id == client_id, m.Allocation.buy_date <= end)
+    first_buy = (
+        select(func.min(m.Allocation.buy_date)).where(m.Allocation.client_id == client_id).scalar_subquery()
+    )
+    res = await db.execute(
+        select(m.DailyReturn.date)
+        .distinct()
+        .where(
+            m.DailyReturn.asset_id.in_(lots),
+            m.DailyReturn.date.between(start, end),
+            m.DailyReturn.date >= first_buy,
+        )
+    )
+    return set(res.scalars().all()) <= {s.date for s in snapshots}
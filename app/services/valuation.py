@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+"""
+Valorização da carteira de um cliente (preço atual, variação diária e
+rentabilidade acumulada) a partir das alocações e de uma única consulta de
+cotações para os tickers distintos.
+
+As contas são vetorizadas (NumPy float64) sobre todas as alocações de uma vez,
+em vez de aritmética Decimal linha a linha.
+"""
+
+import logging
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models as m
+from app.integrations.yahoo import YahooError
+from app.schemas.allocations import AllocationValuation, PortfolioTotals, PortfolioValuation
+from app.services.quotes import QuoteSource, get_quotes
+
+logger = logging.getLogger(__name__)
+
+MONEY_DECIMALS = 8
+PCT_DECIMALS = 4
+
+
+def _field(quotes: Dict[str, Dict[str, Any]], tickers: Sequence[str], name: str) -> np.ndarray:
+    """Coluna `name` das cotações alinhada a `tickers` (NaN quando ausente)."""
+    values = [(quotes.get(t) or {}).get(name) for t in tickers]
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _opt(x: float, decimals: int) -> float | None:
+    return None if np.isnan(x) else round(float(x), decimals)
+
+
+def _safe_pct(num: float, den: float) -> float | None:
+    return None if not den or np.isnan(num) or np.isnan(den) else round(float(num / den * 100), PCT_DECIMALS)
+
+
+def compute_valuation(
+    client_id: int,
+    rows: Sequence[Any],
+    quotes: Dict[str, Dict[str, Any]],
+) -> PortfolioValuation:
+    """
+    Calcula posições e totais. `rows` = (id, ticker, quantity, buy_price, buy_date).
+    Alocações sem cotação ficam com campos de mercado None e fora dos totais de mercado.
+    """
+    n = len(rows)
+    tickers = [r.ticker for r in rows]
+    qty = np.fromiter((r.quantity for r in rows), dtype=np.float64, count=n)
+    buy = np.fromiter((r.buy_price for r in rows), dtype=np.float64, count=n)
+    price = _field(quotes, tickers, "regularMarketPrice")
+    prev = _field(quotes, tickers, "regularMarketPreviousClose")
+    change_pct = _field(quotes, tickers, "regularMarketChangePercent")
+
+    cost = qty * buy
+    market = qty * price
+    pnl = market - cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        acc_pct = (price / buy - 1.0) * 100.0
+        # Variação diária: usa a do Yahoo; sem ela, deriva do fechamento anterior
+        derived = (price / prev - 1.0) * 100.0
+    daily_pct = np.where(np.isnan(change_pct), derived, change_pct)
+    daily_pnl = np.where(np.isnan(prev), 0.0, qty * (price - prev))
+
+    priced = ~np.isnan(price)
+    total_cost = float(cost.sum())
+    priced_cost = float(cost[priced].sum())
+    total_market = float(market[priced].sum())
+    total_pnl = float(pnl[priced].sum())
+    total_daily_pnl = float(np.nansum(daily_pnl[priced]))
+
+    positions = [
+        AllocationValuation(
+            id=r.id,
+            client_id=client_id,
+            ticker=r.ticker,
+            quantity=r.quantity,
+            buy_price=r.buy_price,
+            buy_date=r.buy_date,
+            current_price=_opt(price[i], MONEY_DECIMALS),
+            daily_change_pct=_opt(daily_pct[i], PCT_DECIMALS),
+            cost_basis=round(float(cost[i]), MONEY_DECIMALS),
+            market_value=_opt(market[i], MONEY_DECIMALS),
+            pnl=_opt(pnl[i], MONEY_DECIMALS),
+            accumulated_return_pct=_opt(acc_pct[i], PCT_DECIMALS),
+        )
+        for i, r in enumerate(rows)
+    ]
+
+    totals = PortfolioTotals(
+        cost_basis=round(total_cost, MONEY_DECIMALS),
+        market_value=round(total_market, MONEY_DECIMALS),
+        pnl=round(total_pnl, MONEY_DECIMALS),
+        daily_pnl=round(total_daily_pnl, MONEY_DECIMALS),
+        daily_change_pct=_safe_pct(total_daily_pnl, total_market - total_daily_pnl),
+        accumulated_return_pct=_safe_pct(total_pnl, priced_cost),
+        priced_positions=int(priced.sum()),
+        unpriced_positions=int(n - priced.sum()),
+    )
+    return PortfolioValuation(client_id=client_id, positions=positions, totals=totals)
+
+
+async def value_portfolio(db: AsyncSession, client_id: int, source: QuoteSource) -> PortfolioValuation:
+    """Carrega as alocações do cliente, busca as cotações (1 chamada) e valoriza."""
+    res = await db.execute(
+        select(
+            m.Allocation.id,
+            m.Asset.ticker,
+            m.Allocation.quantity,
+            m.Allocation.buy_price,
+            m.Allocation.buy_date,
+        )
+        .join(m.Asset, m.Asset.id == m.Allocation.asset_id)
+        .where(m.Allocation.client_id == client_id)
+        .order_by(m.Allocation.id.desc())
+    )
+    rows: List[Any] = list(res.all())
+
+    quotes: Dict[str, Dict[str, Any]] = {}
+    if rows:
+        try:
+            quotes = (await get_quotes({r.ticker for r in rows}, source)).quotes
+        except YahooError:
+            # best-effort: sem cotação, devolve só os campos de custo
+            logger.warning("quotes unavailable for client %s valuation", client_id, exc_info=True)
+
+    return compute_valuation(client_id, rows, quotes)
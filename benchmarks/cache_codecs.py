@@ -0,0 +1,81 @@
+"""
+Micro-benchmark dos codecs de cache (app.cache.codecs) com payloads reais de busca.
+
+Uso:
+    python -m benchmarks.cache_codecs [--iterations 20000]
+
+Compara, para cada combinação disponível de codec x compressão, o tamanho
+gravado no Redis e o tempo médio de encode/decode. O payload "search" é uma
+resposta sanitizada de `YahooClient.search` (q=petr, 10 itens); "search_x5"
+simula listas maiores (autocomplete com limit=50).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from app.cache.codecs import CODECS, COMPRESSIONS, CacheCodec
+
+SEARCH_PAYLOAD: List[Dict[str, Any]] = [
+    {"symbol": "PETR4.SA", "shortname": "PETROBRAS   PN      N2", "longname": "Petróleo Brasileiro S.A. - Petrobras", "exch": "SAO", "exchDisp": "São Paulo", "typeDisp": "Equity"},
+    {"symbol": "PETR3.SA", "shortname": "PETROBRAS   ON      N2", "longname": "Petróleo Brasileiro S.A. - Petrobras", "exch": "SAO", "exchDisp": "São Paulo", "typeDisp": "Equity"},
+    {"symbol": "PBR", "shortname": "Petroleo Brasileiro S.A. Petrob", "longname": "Petróleo Brasileiro S.A. - Petrobras", "exch": "NYQ", "exchDisp": "NYSE", "typeDisp": "Equity"},
+    {"symbol": "PBR-A", "shortname": "Petroleo Brasileiro S.A. Petrob", "longname": "Petróleo Brasileiro S.A. - Petrobras", "exch": "NYQ", "exchDisp": "NYSE", "typeDisp": "Equity"},
+    {"symbol": "PETZ3.SA", "shortname": "PETZ        ON      NM", "longname": "Pet Center Comércio e Participações S.A.", "exch": "SAO", "exchDisp": "São Paulo", "typeDisp": "Equity"},
+    {"symbol": "PETRK25.SA", "shortname": "PETRK25", "longname": None, "exch": "SAO", "exchDisp": "São Paulo", "typeDisp": "Option"},
+    {"symbol": "PETR4F.SA", "shortname": "PETROBRAS   PN      N2", "longname": None, "exch": "SAO", "exchDisp": "São Paulo", "typeDisp": "Equity"},
+    {"symbol": "PET.L", "shortname": "PETRA DIAMONDS LD ORD 0.00005", "longname": "Petra Diamonds Limited", "exch": "LSE", "exchDisp": "London", "typeDisp": "Equity"},
+    {"symbol": "PETS", "shortname": "PetMed Express, Inc.", "longname": "PetMed Express, Inc.", "exch": "NMS", "exchDisp": "NASDAQ", "typeDisp": "Equity"},
+    {"symbol": "PETQ", "shortname": "PetIQ, Inc.", "longname": "PetIQ, Inc.", "exch": "NMS", "exchDisp": "NASDAQ", "typeDisp": "Equity"},
+]
+
+QUOTE_PAYLOAD: Dict[str, Any] = {
+    "symbol": "PETR4.SA",
+    "shortName": "PETROBRAS   PN      N2",
+    "currency": "BRL",
+    "regularMarketPrice": 38.42,
+    "regularMarketPreviousClose": 38.05,
+    "regularMarketChange": 0.37,
+    "regularMarketChangePercent": 0.9724,
+    "regularMarketTime": 1723230000,
+}
+
+PAYLOADS: Dict[str, Any] = {
+    "quote": QUOTE_PAYLOAD,
+    "search": SEARCH_PAYLOAD,
+    "search_x5": SEARCH_PAYLOAD * 5,
+}
+
+
+def _timeit(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6  # µs/op
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'payload':<10} {'codec':<16} {'bytes':>7} {'enc µs':>8} {'dec µs':>8}")
+    for payload_name, payload in PAYLOADS.items():
+        for codec_name, enc, _ in CODECS.values():
+            if enc is None:
+                continue
+            for comp_name, comp, _ in COMPRESSIONS.values():
+                if comp is None:
+                    continue
+                codec = CacheCodec(codec_name, comp_name, compress_min_bytes=0)
+                raw = codec.encode(payload)
+                assert CacheCodec.decode(raw) == payload
+                enc_us = _timeit(lambda: codec.encode(payload), args.iterations)
+                dec_us = _timeit(lambda: CacheCodec.decode(raw), args.iterations)
+                print(f"{payload_name:<10} {codec.name:<16} {len(raw):>7} {enc_us:>8.2f} {dec_us:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
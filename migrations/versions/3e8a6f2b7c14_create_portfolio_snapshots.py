@@ -0,0 +1,39 @@
+"""create portfolio_snapshots rollup
+
+Revision ID: 3e8a6f2b7c14
+Revises: 9c4e2d81f3a6
+Create Date: 2026-10-17 15:12:44.903127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8a6f2b7c14'
+down_revision: Union[str, Sequence[str], None] = '9c4e2d81f3a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('portfolio_snapshots',
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('value', sa.Numeric(precision=28, scale=8), nullable=False),
+    sa.Column('cost', sa.Numeric(precision=28, scale=8), nullable=False),
+    sa.Column('return_pct', sa.Numeric(precision=14, scale=6), nullable=True),
+    sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('client_id', 'date')
+    )
+    # Tabela criada vazia. Passo obrigatório do deploy (backfill do histórico):
+    #   python -m app.jobs.refresh_snapshots --from <primeiro buy_date>
+    # Até lá, source=auto cai para o cálculo ao vivo (snapshots_cover).
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('portfolio_snapshots')
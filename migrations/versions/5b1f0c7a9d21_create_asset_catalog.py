@@ -0,0 +1,37 @@
+"""create asset_catalog table
+
+Revision ID: 5b1f0c7a9d21
+Revises: 24300df987ac
+Create Date: 2026-10-17 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c7a9d21'
+down_revision: Union[str, Sequence[str], None] = '24300df987ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('asset_catalog',
+    sa.Column('symbol', sa.String(length=32), nullable=False),
+    sa.Column('shortname', sa.String(length=255), nullable=True),
+    sa.Column('longname', sa.String(length=255), nullable=True),
+    sa.Column('exch', sa.String(length=32), nullable=True),
+    sa.Column('exch_disp', sa.String(length=64), nullable=True),
+    sa.Column('type_disp', sa.String(length=64), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('symbol')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('asset_catalog')
@@ -0,0 +1,50 @@
+"""create positions read model
+
+Revision ID: 9c4e2d81f3a6
+Revises: 5b1f0c7a9d21
+Create Date: 2026-10-17 11:40:02.518734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2d81f3a6'
+down_revision: Union[str, Sequence[str], None] = '5b1f0c7a9d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('positions',
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('asset_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=28, scale=8), nullable=False),
+    sa.Column('cost_basis', sa.Numeric(precision=28, scale=8), nullable=False),
+    sa.Column('lot_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('client_id', 'asset_id')
+    )
+    op.create_index(op.f('ix_positions_asset_id'), 'positions', ['asset_id'], unique=False)
+
+    # Backfill a partir dos lotes existentes
+    op.execute(
+        """
+        INSERT INTO positions (client_id, asset_id, quantity, cost_basis, lot_count)
+        SELECT client_id, asset_id, SUM(quantity), SUM(quantity * buy_price), COUNT(*)
+        FROM allocations
+        GROUP BY client_id, asset_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_positions_asset_id'), table_name='positions')
+    op.drop_table('positions')
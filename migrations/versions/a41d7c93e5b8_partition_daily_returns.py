@@ -0,0 +1,99 @@
+"""partition daily_returns by year with BRIN on date
+
+Revision ID: a41d7c93e5b8
+Revises: 3e8a6f2b7c14
+Create Date: 2026-10-17 16:05:31.227410
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41d7c93e5b8'
+down_revision: Union[str, Sequence[str], None] = '3e8a6f2b7c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1) tira a tabela atual do caminho (mantendo a sequence de ids)
+    op.execute("ALTER TABLE daily_returns RENAME TO daily_returns_old")
+    op.execute("ALTER TABLE daily_returns_old RENAME CONSTRAINT daily_returns_pkey TO daily_returns_old_pkey")
+    op.execute("ALTER TABLE daily_returns_old RENAME CONSTRAINT uq_daily_returns_asset_date TO uq_daily_returns_old_asset_date")
+    op.drop_index('ix_daily_returns_asset_id', table_name='daily_returns_old')
+    op.drop_index('ix_daily_returns_date', table_name='daily_returns_old')
+    op.execute("ALTER SEQUENCE daily_returns_id_seq OWNED BY NONE")
+
+    # 2) tabela particionada por ano; PK/unique precisam conter a chave de partição.
+    #    A unique (asset_id, date) vira o índice composto de cada partição.
+    op.execute(
+        """
+        CREATE TABLE daily_returns (
+            id integer NOT NULL DEFAULT nextval('daily_returns_id_seq'),
+            asset_id integer NOT NULL REFERENCES assets (id) ON DELETE CASCADE,
+            date date NOT NULL,
+            close_price numeric(20, 8) NOT NULL,
+            CONSTRAINT daily_returns_pkey PRIMARY KEY (id, date),
+            CONSTRAINT uq_daily_returns_asset_date UNIQUE (asset_id, date)
+        ) PARTITION BY RANGE (date)
+        """
+    )
+    op.execute("ALTER SEQUENCE daily_returns_id_seq OWNED BY daily_returns.id")
+    op.execute("CREATE INDEX ix_daily_returns_date_brin ON daily_returns USING brin (date)")
+    op.execute("CREATE TABLE daily_returns_default PARTITION OF daily_returns DEFAULT")
+
+    # 3) partições dos anos com dados + ano corrente e o próximo
+    bind = op.get_bind()
+    lo, hi = bind.execute(sa.text("SELECT min(date), max(date) FROM daily_returns_old")).one()
+    this_year = date.today().year
+    first = min(lo.year, this_year) if lo else this_year
+    last = max(hi.year, this_year + 1) if hi else this_year + 1
+    for year in range(first, last + 1):
+        op.execute(
+            f"CREATE TABLE daily_returns_y{year} PARTITION OF daily_returns "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+
+    # 4) copia os dados e remove a tabela antiga
+    op.execute(
+        """
+        INSERT INTO daily_returns (id, asset_id, date, close_price)
+        SELECT id, asset_id, date, close_price FROM daily_returns_old
+        """
+    )
+    op.drop_table('daily_returns_old')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER SEQUENCE daily_returns_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE daily_returns RENAME TO daily_returns_part")
+    op.execute("ALTER TABLE daily_returns_part RENAME CONSTRAINT daily_returns_pkey TO daily_returns_part_pkey")
+    op.execute("ALTER TABLE daily_returns_part RENAME CONSTRAINT uq_daily_returns_asset_date TO uq_daily_returns_part_asset_date")
+    op.execute(
+        """
+        CREATE TABLE daily_returns (
+            id integer NOT NULL DEFAULT nextval('daily_returns_id_seq'),
+            asset_id integer NOT NULL REFERENCES assets (id) ON DELETE CASCADE,
+            date date NOT NULL,
+            close_price numeric(20, 8) NOT NULL,
+            CONSTRAINT daily_returns_pkey PRIMARY KEY (id),
+            CONSTRAINT uq_daily_returns_asset_date UNIQUE (asset_id, date)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE daily_returns_id_seq OWNED BY daily_returns.id")
+    op.execute(
+        """
+        INSERT INTO daily_returns (id, asset_id, date, close_price)
+        SELECT id, asset_id, date, close_price FROM daily_returns_part
+        """
+    )
+    op.execute("DROP TABLE daily_returns_part")  # remove as partições junto
+    op.create_index('ix_daily_returns_asset_id', 'daily_returns', ['asset_id'], unique=False)
+    op.create_index('ix_daily_returns_date', 'daily_returns', ['date'], unique=False)
@@ -0,0 +1,34 @@
+"""add (name, id) index on clients for keyset pagination
+
+Revision ID: c7d2b5e90a13
+Revises: a41d7c93e5b8
+Create Date: 2026-10-17 17:20:09.518734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2b5e90a13'
+down_revision: Union[str, Sequence[str], None] = 'a41d7c93e5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: não bloqueia escritas em clients durante a criação
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_clients_name_id', 'clients', ['name', 'id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_clients_name_id', table_name='clients', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,47 @@
+"""add pg_trgm search indexes on clients
+
+Revision ID: e58f1a3c6d27
+Revises: c7d2b5e90a13
+Create Date: 2026-10-17 18:02:41.337620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e58f1a3c6d27'
+down_revision: Union[str, Sequence[str], None] = 'c7d2b5e90a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY: não bloqueia escritas em clients durante a criação
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_clients_name_trgm', 'clients', ['name'], unique=False,
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_clients_email_trgm', 'clients', ['email'], unique=False,
+            postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_clients_email_lower_prefix', 'clients', [sa.text('lower(email) text_pattern_ops')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in ('ix_clients_email_lower_prefix', 'ix_clients_email_trgm', 'ix_clients_name_trgm'):
+            op.drop_index(name, table_name='clients', postgresql_concurrently=True, if_exists=True)
+    # a extensão pg_trgm fica (pode ser usada por outros objetos)